@@ -0,0 +1,196 @@
+"""Benchmark run_trading_cycle against recorded fixtures and in-memory stand-ins.
+
+    python benchmarks/bench_cycle.py                      # 5, 50 and 500 coins
+    python benchmarks/bench_cycle.py --coins 50 --binance-latency 0.05
+    python benchmarks/bench_cycle.py --check              # fail on regressions vs baseline.json
+    python benchmarks/bench_cycle.py --update-baseline
+
+Binance, CoinGecko, Groq and Cosmos DB are replaced by the fakes in benchmarks/fakes.py,
+each with its own injected latency. For every coin count the cycle is run once for
+wall time and request counts and once under tracemalloc for allocations.
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import fakes
+from shared import trader as trader_module
+from shared import cosmos_db, coingecko_service, http_session, kline_store, openai_service, symbol_index
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_COIN_COUNTS = (5, 50, 500)
+DEFAULT_LATENCY = {"binance": 0.02, "coingecko": 0.1, "llm": 0.1, "cosmos": 0.005}
+# Same shape as the stored production template; JSON braces are doubled for str.format
+PROMPT_TEMPLATE = (
+    "You are an aggressive crypto trader. Analyze this OHLC data for {coin_name} over the last 30 intervals. "
+    "Current price: ${current_price}. \n{holding_info}\n"
+    "Decide: BUY, SELL, or HOLD. Respond ONLY with valid JSON. "
+    "Format: {{\"action\": \"BUY\", \"target_profit_pct\": 10}} or {{\"action\": \"SELL\"}} or {{\"action\": \"HOLD\"}}."
+)
+
+def reset_process_state():
+    """Drop the process-level clients and caches so every run starts cold."""
+    coingecko_service.binance_client = None
+    kline_store.kline_store = None
+    symbol_index.symbol_index = None
+    http_session.session = None
+    openai_service.client = None
+    openai_service.rate_limiter = None
+    openai_service.signal_cache = None
+    cosmos_db.client_cache.clear()
+    cosmos_db.container_cache.clear()
+    cosmos_db.watchlist_cache.clear()
+
+def seed_settings(cosmos, coins, overrides=None):
+    settings = {
+        "id": "main_settings",
+        "COINS_TO_TRACK": coins,
+        "PROMPT_TEMPLATE": PROMPT_TEMPLATE,
+        # Paid-tier LLM limits so the limiter does not dominate the measurement
+        "LLM_REQUESTS_PER_MINUTE": 1000000,
+        "LLM_TOKENS_PER_MINUTE": 100000000,
+        **(overrides or {})
+    }
+    cosmos.get_container_client("settings").items[("main_settings", "main_settings")] = {**settings, "_etag": '"seed"'}
+
+def run_cycle_benchmark(coin_count, latency=None, settings=None, trace_allocations=False, instances=8):
+    """Run one trading cycle over `coin_count` fake coins. Returns the measurements.
+
+    With EXECUTION_MODE "fanout" the enqueued work items are processed by `instances`
+    threads standing in for queue-triggered Function instances.
+    """
+    latency = {**DEFAULT_LATENCY, **(latency or {})}
+    coins = fakes.coin_ids(coin_count)
+    binance = fakes.FakeBinanceClient(coins, latency["binance"])
+    session = fakes.FakeSession(latency["coingecko"])
+    llm = fakes.FakeOpenAI(latency["llm"])
+    cosmos = fakes.FakeCosmosClient(latency["cosmos"])
+    seed_settings(cosmos, coins, settings)
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.dict(os.environ, {
+             "COSMOS_DB_CONNECTION_STRING": "AccountEndpoint=https://benchmark.invalid/;AccountKey=YmVuY2g=;",
+             "COSMOS_DB_BOOTSTRAP": "false",
+             "KLINE_STORE_PATH": os.path.join(tmp, "klines.sqlite3"),
+             "SYMBOL_INDEX_PATH": os.path.join(tmp, "symbols.json"),
+             "SIGNAL_CACHE_PATH": ""
+         }), \
+         patch.object(cosmos_db, "get_cosmos_client", lambda connection_string: cosmos), \
+         patch.object(coingecko_service, "get_binance_client", lambda: binance), \
+         patch.object(coingecko_service, "get_session", lambda: session), \
+         patch.object(openai_service, "get_client", lambda: llm):
+        reset_process_state()
+        if trace_allocations:
+            tracemalloc.start()
+        start = time.perf_counter()
+        work_items = []
+        summary = trader_module.run_trading_cycle(enqueue=work_items.extend)
+        if work_items:
+            with ThreadPoolExecutor(max_workers=instances) as executor:
+                list(executor.map(trader_module.run_coin_work, work_items))
+        wall = time.perf_counter() - start
+        peak = None
+        if trace_allocations:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        reset_process_state()
+
+    requests = {
+        "binance": binance.total,
+        "coingecko": session.total,
+        "llm": llm.completions.total,
+        "cosmos": cosmos.total
+    }
+    return {
+        "coins": coin_count,
+        "wall_seconds": round(wall, 3),
+        "peak_alloc_mb": round(peak / 1e6, 2) if peak is not None else None,
+        "requests": requests,
+        "total_requests": sum(requests.values()),
+        "work_items": len(work_items),
+        "equity_points": len(cosmos.get_container_client("equity_logs").items),
+        "checkpoint": cosmos.get_container_client("settings").items.get(("cycle_checkpoint", "cycle_checkpoint")),
+        "cycle": summary
+    }
+
+def benchmark(coin_counts, latency=None, settings=None, allocations=True, instances=8):
+    results = {}
+    for count in coin_counts:
+        result = run_cycle_benchmark(count, latency, settings, instances=instances)
+        if allocations:
+            result["peak_alloc_mb"] = run_cycle_benchmark(count, latency, settings, True, instances)["peak_alloc_mb"]
+        results[str(count)] = result
+        print(
+            f"{count:>4} coins: {result['wall_seconds']:>7.2f}s wall, "
+            f"{result['peak_alloc_mb'] if result['peak_alloc_mb'] is not None else '-':>7} MB peak, "
+            f"{result['total_requests']:>5} requests {result['requests']}"
+        )
+    return results
+
+def find_regressions(results, baseline, tolerance=0.5, request_tolerance=0.1):
+    """Compare against baseline: time/memory may grow by `tolerance`, requests by `request_tolerance`."""
+    regressions = []
+    for count, result in results.items():
+        base = baseline.get(count)
+        if not base:
+            continue
+        for key in ("wall_seconds", "peak_alloc_mb"):
+            if result.get(key) is not None and base.get(key) and result[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{count} coins: {key} {result[key]} > baseline {base[key]} (+{tolerance:.0%})")
+        for service, value in result["requests"].items():
+            allowed = base["requests"].get(service, 0) * (1 + request_tolerance) + 2
+            if value > allowed:
+                regressions.append(f"{count} coins: {service} requests {value} > baseline {base['requests'].get(service, 0)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, nargs="+", default=list(DEFAULT_COIN_COUNTS))
+    for service, value in DEFAULT_LATENCY.items():
+        parser.add_argument(f"--{service}-latency", type=float, default=value, help=f"seconds per {service} request")
+    parser.add_argument("--settings", type=json.loads, default=None, help="JSON settings overrides, e.g. '{\"LLM_BATCH_SIZE\": 10}'")
+    parser.add_argument("--instances", type=int, default=8, help="queue workers when EXECUTION_MODE is fanout")
+    parser.add_argument("--no-allocations", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regressions against baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed wall time / memory growth (0.5 = +50%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="write the full results as JSON")
+    parser.add_argument("--log-level", default="CRITICAL", help="log level for the cycle itself")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+    latency = {service: getattr(args, f"{service}_latency") for service in DEFAULT_LATENCY}
+    results = benchmark(args.coins, latency, args.settings, allocations=not args.no_allocations, instances=args.instances)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        baseline = {count: {k: r[k] for k in ("wall_seconds", "peak_alloc_mb", "requests", "total_requests")} for count, r in results.items()}
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"latency": latency, "results": baseline}, f, indent=2)
+        print(f"Baseline written to {BASELINE_PATH}")
+    if args.check:
+        with open(BASELINE_PATH, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("latency") != latency:
+            print(f"Warning: baseline was recorded with latency {baseline.get('latency')}")
+        regressions = find_regressions(results, baseline["results"], tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Stand-ins for Binance, CoinGecko, Groq and Cosmos DB used by the cycle benchmark.
+
+Every fake replays the recorded fixtures, sleeps `latency` seconds per request to
+simulate the network and counts its requests.
+"""
+import os
+import copy
+import json
+import re
+import threading
+import time
+import uuid
+import hashlib
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError, CosmosBatchOperationError, CosmosResourceExistsError,
+    CosmosResourceNotFoundError
+)
+from shared import metrics
+from shared.cosmos_db import CONTAINERS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r") as f:
+        return json.load(f)
+
+def coin_ids(count):
+    return [f"bench{i:03d}" for i in range(count)]
+
+class RequestCounter:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = {}
+
+    def hit(self, name):
+        with self.lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def total(self):
+        with self.lock:
+            return sum(self.requests.values())
+
+class FakeBinanceClient(RequestCounter):
+    """python-binance Client replaying one recorded series for every benchmark coin.
+
+    Coin i gets the recorded closes raised to a coin-specific volatility exponent and
+    rescaled, so coins differ (some flat, some trending) while staying deterministic.
+    Timestamps are shifted so the last recorded candle is the current hour.
+    """
+    def __init__(self, coins, latency=0.0):
+        super().__init__(latency)
+        template = load_fixture("binance_exchange_info_symbol.json")
+        self.ticker_template = load_fixture("binance_ticker_24hr.json")
+        raw = load_fixture("binance_klines_1h.json")
+        shift = int(time.time() // 3600 * 3600 * 1000) - raw[-1][0]
+        self.recorded = [[k[0] + shift] + [float(v) for v in k[1:6]] for k in raw]
+        self.base_close = self.recorded[0][4]
+        self.symbols = {}
+        for i, coin_id in enumerate(coins):
+            symbol = f"{coin_id.upper()}USDT"
+            self.symbols[symbol] = {
+                "info": {**template, "symbol": symbol, "baseAsset": coin_id.upper()},
+                "volatility": 0.2 + (i * 37 % 100) / 25,
+                "scale": 0.5 + (i * 53 % 1000) / 10,
+                "quote_volume": 5e7 + (i * 89 % 1000) * 1e5
+            }
+
+    def _price(self, symbol, value):
+        coin = self.symbols[symbol]
+        return coin["scale"] * (value / self.base_close) ** coin["volatility"]
+
+    def _klines(self, symbol):
+        return [
+            [k[0]] + [f"{self._price(symbol, v):.8f}" for v in k[1:5]] + [f"{k[5]:.5f}", k[0] + 3_599_999, "0", 1, "0", "0", "0"]
+            for k in self.recorded
+        ]
+
+    def _ticker(self, symbol):
+        closes = [k[4] for k in self.recorded[-24:]]
+        last, first = self._price(symbol, closes[-1]), self._price(symbol, closes[0])
+        return {
+            **self.ticker_template, "symbol": symbol,
+            "lastPrice": f"{last:.8f}", "openPrice": f"{first:.8f}",
+            "priceChangePercent": f"{(last / first - 1) * 100:.3f}",
+            "highPrice": f"{max(self._price(symbol, c) for c in closes):.8f}",
+            "lowPrice": f"{min(self._price(symbol, c) for c in closes):.8f}",
+            "quoteVolume": f"{self.symbols[symbol]['quote_volume']:.4f}"
+        }
+
+    def get_exchange_info(self):
+        self.hit("exchange_info")
+        return {"symbols": [coin["info"] for coin in self.symbols.values()]}
+
+    def get_ticker(self, symbol=None, symbols=None):
+        self.hit("ticker_24hr")
+        if symbols is not None:
+            return [self._ticker(s) for s in json.loads(symbols) if s in self.symbols]
+        if symbol not in self.symbols:
+            raise ValueError(f"Invalid symbol {symbol}")
+        return self._ticker(symbol)
+
+    def get_symbol_ticker(self, symbol):
+        self.hit("ticker_price")
+        return {"symbol": symbol, "price": self._ticker(symbol)["lastPrice"]}
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, **kwargs):
+        self.hit("klines")
+        klines = self._klines(symbol)
+        if startTime is not None:
+            klines = [k for k in klines if k[0] >= startTime]
+        return klines[-limit:] if startTime is None else klines[:limit]
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return copy.deepcopy(self.data)
+
+class FakeSession(RequestCounter):
+    """requests.Session replaying the recorded CoinGecko /coins/markets page."""
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.markets = load_fixture("coingecko_markets.json")
+
+    def get(self, url, params=None, **kwargs):
+        self.hit("coingecko")
+        return FakeResponse(self.markets)
+
+class FakeRawResponse:
+    def __init__(self, headers, completion):
+        self.headers = headers
+        self.completion = completion
+
+    def parse(self):
+        return self.completion
+
+class FakeCompletions(RequestCounter):
+    """chat.completions for the OpenAI client, answering deterministically per prompt."""
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        from openai.types.chat import ChatCompletion
+        fixture = load_fixture("groq_completion.json")
+        self.headers = fixture["headers"]
+        self.body = fixture["body"]
+        self.completion_type = ChatCompletion
+        self.with_raw_response = self
+
+    def create(self, messages, **kwargs):
+        self.hit("chat_completions")
+        # Candle timestamps follow the wall clock; leave them out so answers are reproducible
+        prompt = re.sub(r"\d{10,}", "", messages[0]["content"])
+        bucket = int(hashlib.sha256(prompt.encode()).hexdigest(), 16) % 10
+        answer = {"action": "BUY", "target_profit_pct": 5} if bucket < 3 else {"action": "SELL"} if bucket == 3 else {"action": "HOLD"}
+        body = copy.deepcopy(self.body)
+        body["choices"][0]["message"]["content"] = json.dumps(answer)
+        body["usage"]["prompt_tokens"] = sum(len(m["content"]) for m in messages) // 4
+        body["usage"]["total_tokens"] = body["usage"]["prompt_tokens"] + body["usage"]["completion_tokens"]
+        return FakeRawResponse(self.headers, self.completion_type(**body))
+
+class FakeOpenAI:
+    def __init__(self, latency=0.0):
+        self.completions = FakeCompletions(latency)
+        self.chat = self
+
+class FakeContainer:
+    """In-memory Cosmos container supporting the operations CosmosDBService uses."""
+    # Rough RU charges of small documents, recorded on the current metrics span
+    READ_RU, WRITE_RU, QUERY_RU = 1.0, 6.0, 3.0
+
+    def __init__(self, store, container_id):
+        self.store = store
+        self.id = container_id
+        self.pk_field = CONTAINERS.get(container_id, ("/id",))[0].lstrip("/")
+        self.items = {}  # (partition key, id) -> document
+        # Fan-out workers hit the same container from several threads
+        self.lock = threading.RLock()
+
+    def _charge(self, name, ru):
+        self.store.hit(f"{self.id}.{name}")
+        metrics.record("cosmos_requests")
+        metrics.record("cosmos_ru", ru)
+
+    def _key(self, body):
+        return (body.get(self.pk_field, body["id"]), body["id"])
+
+    def _write(self, body, etag=None, must_exist=False, must_not_exist=False):
+        with self.lock:
+            return self._write_locked(body, etag, must_exist, must_not_exist)
+
+    def _write_locked(self, body, etag, must_exist, must_not_exist):
+        key = self._key(body)
+        existing = self.items.get(key)
+        if must_not_exist and existing is not None:
+            raise CosmosResourceExistsError(status_code=409, message="Entity with the specified id already exists")
+        if must_exist and existing is None:
+            raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+        if etag is not None and (existing is None or existing["_etag"] != etag):
+            raise CosmosAccessConditionFailedError(status_code=412, message="Precondition failed")
+        doc = copy.deepcopy(body)
+        doc["_etag"] = f'"{uuid.uuid4()}"'
+        self.items[key] = doc
+        return copy.deepcopy(doc)
+
+    def read_item(self, item, partition_key, **kwargs):
+        self._charge("read", self.READ_RU)
+        with self.lock:
+            doc = copy.deepcopy(self.items.get((partition_key, item)))
+        if doc is None:
+            raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+        return doc
+
+    def create_item(self, body, **kwargs):
+        self._charge("create", self.WRITE_RU)
+        return self._write(body, must_not_exist=True)
+
+    def upsert_item(self, body, etag=None, match_condition=None, **kwargs):
+        self._charge("upsert", self.WRITE_RU)
+        return self._write(body, etag=etag)
+
+    def replace_item(self, item, body, etag=None, match_condition=None, **kwargs):
+        self._charge("replace", self.WRITE_RU)
+        return self._write(body, etag=etag, must_exist=True)
+
+    def delete_item(self, item, partition_key, **kwargs):
+        self._charge("delete", self.WRITE_RU)
+        with self.lock:
+            deleted = self.items.pop((partition_key, item), None)
+        if deleted is None:
+            raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+
+    def patch_item(self, item, partition_key, patch_operations, etag=None, match_condition=None, **kwargs):
+        self._charge("patch", self.WRITE_RU)
+        with self.lock:
+            doc = self.items.get((partition_key, item))
+            if doc is None:
+                raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+            doc = copy.deepcopy(doc)
+            for operation in patch_operations:
+                apply_patch(doc, operation)
+            return self._write(doc, etag=etag, must_exist=True)
+
+    def query_items(self, query, parameters=None, partition_key=None, **kwargs):
+        self._charge("query", self.QUERY_RU)
+        values = {p["name"]: p["value"] for p in parameters or []}
+        with self.lock:
+            docs = [
+                d for (pk, _), d in self.items.items()
+                if (partition_key is None or pk == partition_key) and matches(query, values, d)
+            ]
+        if re.match(r"SELECT VALUE COUNT\(1\)", query, re.IGNORECASE):
+            return iter([len(docs)])
+        return iter(copy.deepcopy(docs))
+
+    def execute_item_batch(self, batch_operations, partition_key, **kwargs):
+        """Transactional batch: all operations apply or none do."""
+        self._charge("batch", self.WRITE_RU * len(batch_operations))
+        with self.lock:
+            return self._execute_batch_locked(batch_operations, partition_key)
+
+    def _execute_batch_locked(self, batch_operations, partition_key):
+        """Shaped like the SDK: per-operation {"statusCode", "eTag", "resourceBody"} results,
+        CosmosBatchOperationError if any operation fails."""
+        snapshot = copy.deepcopy(self.items)
+        results = []
+        for index, operation in enumerate(batch_operations):
+            name, args = operation[0], operation[1]
+            options = operation[2] if len(operation) > 2 else {}
+            etag = options.get("if_match_etag")
+            try:
+                if name == "create":
+                    doc, status = self._write(args[0], must_not_exist=True), 201
+                elif name == "upsert":
+                    doc, status = self._write(args[0], etag=etag), 200
+                elif name == "replace":
+                    doc, status = self._write(args[1], etag=etag, must_exist=True), 200
+                elif name in ("read", "delete", "patch"):
+                    existing = self.items.get((partition_key, args[0]))
+                    if existing is None:
+                        raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+                    if etag is not None and existing["_etag"] != etag:
+                        raise CosmosAccessConditionFailedError(status_code=412, message="Precondition failed")
+                    predicate = options.get("filter_predicate")
+                    if name == "patch" and predicate and not matches(predicate, {}, existing):
+                        raise CosmosAccessConditionFailedError(status_code=412, message="Precondition failed")
+                    if name == "read":
+                        doc, status = copy.deepcopy(existing), 200
+                    elif name == "delete":
+                        del self.items[(partition_key, args[0])]
+                        doc, status = None, 204
+                    else:
+                        doc = copy.deepcopy(existing)
+                        for patch in args[1]:
+                            apply_patch(doc, patch)
+                        doc, status = self._write(doc, must_exist=True), 200
+                else:
+                    raise ValueError(f"Unsupported batch operation {name}")
+            except (CosmosResourceExistsError, CosmosResourceNotFoundError, CosmosAccessConditionFailedError) as e:
+                self.items = snapshot
+                raise CosmosBatchOperationError(
+                    error_index=index, headers={}, status_code=e.status_code,
+                    message=f"There was an error in the transactional batch on index {index}",
+                    operation_responses=results + [{"statusCode": e.status_code}]
+                )
+            except Exception:
+                self.items = snapshot
+                raise
+            result = {"statusCode": status}
+            if doc is not None:
+                result.update({"eTag": doc["_etag"], "resourceBody": doc})
+            results.append(result)
+        return results
+
+def pointer_parts(path):
+    return [p.replace("~1", "/").replace("~0", "~") for p in path.lstrip("/").split("/")]
+
+def apply_patch(doc, operation):
+    parts = pointer_parts(operation["path"])
+    parent = doc
+    for part in parts[:-1]:
+        parent = parent[part]
+    key = parts[-1]
+    op = operation["op"]
+    if op in ("add", "set", "replace"):
+        if op == "replace" and key not in parent:
+            raise CosmosResourceNotFoundError(status_code=400, message=f"Path {operation['path']} not found")
+        parent[key] = copy.deepcopy(operation["value"])
+    elif op == "remove":
+        del parent[key]
+    elif op == "incr":
+        parent[key] = parent.get(key, 0) + operation["value"]
+    else:
+        raise ValueError(f"Unsupported patch operation {op}")
+
+def matches(query, values, doc):
+    """Evaluate the small WHERE clauses the services issue (equality, numeric >= and ARRAY_CONTAINS, AND-ed)."""
+    where = re.split(r"\bWHERE\b", query, flags=re.IGNORECASE)
+    if len(where) < 2:
+        return True
+    for condition in re.split(r"\bAND\b", where[1], flags=re.IGNORECASE):
+        condition = condition.strip()
+        contains = re.match(r"ARRAY_CONTAINS\((@\w+),\s*c\.(\w+)\)", condition, re.IGNORECASE)
+        equals = re.match(r"c\.(\w+)\s*=\s*(@\w+)", condition)
+        at_least = re.match(r"c\.(\w+)\s*>=\s*(\S+)$", condition)
+        if contains:
+            if doc.get(contains.group(2)) not in values[contains.group(1)]:
+                return False
+        elif equals:
+            if doc.get(equals.group(1)) != values[equals.group(2)]:
+                return False
+        elif at_least:
+            if doc.get(at_least.group(1), 0) < float(at_least.group(2)):
+                return False
+        else:
+            raise ValueError(f"Unsupported query condition: {condition}")
+    return True
+
+class FakeCosmosClient(RequestCounter):
+    """CosmosClient with in-memory containers, shared by every CosmosDBService."""
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.containers = {}
+
+    def get_database_client(self, database_name):
+        return self
+
+    def get_container_client(self, container_id):
+        if container_id not in self.containers:
+            self.containers[container_id] = FakeContainer(self, container_id)
+        return self.containers[container_id]
@@ -0,0 +1,122 @@
+"""Record the Binance / CoinGecko / Groq responses replayed by the cycle benchmark.
+
+    python benchmarks/record_fixtures.py             # record live public responses
+    python benchmarks/record_fixtures.py --synthetic # deterministic offline fixtures
+
+Only one kline series, one exchangeInfo symbol and one 24h ticker are stored; the
+fakes derive every benchmark coin from them (see benchmarks/fakes.py).
+"""
+import os
+import json
+import argparse
+import random
+import time
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+KLINE_COUNT = 720  # BinanceService.get_ohlc: 30 days of 1h candles
+
+def write(name, data):
+    with open(os.path.join(FIXTURES_DIR, name), "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    print(f"Wrote fixtures/{name}")
+
+def completion_fixture():
+    return {
+        "headers": {
+            # Paid-tier limits: the benchmark measures the cycle, not the free-tier quota
+            "x-ratelimit-limit-requests": "1000000",
+            "x-ratelimit-remaining-requests": "999999",
+            "x-ratelimit-reset-requests": "0.06s",
+            "x-ratelimit-limit-tokens": "100000000",
+            "x-ratelimit-remaining-tokens": "99998541",
+            "x-ratelimit-reset-tokens": "0.6s"
+        },
+        "body": {
+            "id": "chatcmpl-fixture",
+            "object": "chat.completion",
+            "created": 1735689600,
+            "model": "llama-3.1-8b-instant",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "{\"action\": \"HOLD\"}"}
+            }],
+            "usage": {"prompt_tokens": 1450, "completion_tokens": 9, "total_tokens": 1459}
+        }
+    }
+
+def record_live(symbol="BTCUSDT"):
+    import requests
+    base = "https://api.binance.com/api/v3"
+    info = requests.get(f"{base}/exchangeInfo", params={"symbol": symbol}, timeout=30).json()
+    write("binance_exchange_info_symbol.json", info["symbols"][0])
+    write("binance_ticker_24hr.json", requests.get(f"{base}/ticker/24hr", params={"symbol": symbol}, timeout=30).json())
+    klines = requests.get(f"{base}/klines", params={"symbol": symbol, "interval": "1h", "limit": KLINE_COUNT}, timeout=30).json()
+    write("binance_klines_1h.json", klines)
+    markets = requests.get(
+        "https://api.coingecko.com/api/v3/coins/markets",
+        params={"vs_currency": "usd", "order": "volume_desc", "per_page": 100, "page": 1, "sparkline": False},
+        timeout=30
+    ).json()
+    write("coingecko_markets.json", markets)
+    # LLM answers are not recorded live: the fixture only fixes the response shape and headers
+    write("groq_completion.json", completion_fixture())
+
+def record_synthetic(symbol="BTCUSDT", seed=7):
+    rng = random.Random(seed)
+    write("binance_exchange_info_symbol.json", {
+        "symbol": symbol, "status": "TRADING", "baseAsset": "BTC", "baseAssetPrecision": 8,
+        "quoteAsset": "USDT", "quotePrecision": 8, "quoteAssetPrecision": 8,
+        "orderTypes": ["LIMIT", "LIMIT_MAKER", "MARKET", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT"],
+        "isSpotTradingAllowed": True, "isMarginTradingAllowed": True,
+        "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": "0.01000000", "maxPrice": "1000000.00000000", "tickSize": "0.01000000"},
+            {"filterType": "LOT_SIZE", "minQty": "0.00001000", "maxQty": "9000.00000000", "stepSize": "0.00001000"}
+        ],
+        "permissions": [], "permissionSets": [["SPOT", "MARGIN"]]
+    })
+
+    start = int(time.time() // 3600 * 3600 * 1000) - KLINE_COUNT * 3_600_000
+    price, klines = 60000.0, []
+    for i in range(KLINE_COUNT):
+        open_price = price
+        price *= 1 + rng.gauss(0.0001, 0.006)
+        high = max(open_price, price) * (1 + abs(rng.gauss(0, 0.002)))
+        low = min(open_price, price) * (1 - abs(rng.gauss(0, 0.002)))
+        volume = 800 * (1 + abs(rng.gauss(0, 0.5)))
+        open_time = start + i * 3_600_000
+        klines.append([
+            open_time, f"{open_price:.2f}", f"{high:.2f}", f"{low:.2f}", f"{price:.2f}", f"{volume:.5f}",
+            open_time + 3_599_999, f"{volume * price:.4f}", rng.randint(20000, 90000),
+            f"{volume / 2:.5f}", f"{volume * price / 2:.4f}", "0"
+        ])
+    write("binance_klines_1h.json", klines)
+
+    last, first = float(klines[-1][4]), float(klines[-24][1])
+    write("binance_ticker_24hr.json", {
+        "symbol": symbol, "priceChange": f"{last - first:.2f}", "priceChangePercent": f"{(last / first - 1) * 100:.3f}",
+        "weightedAvgPrice": f"{(last + first) / 2:.2f}", "prevClosePrice": f"{first:.2f}",
+        "lastPrice": f"{last:.2f}", "lastQty": "0.01000000", "bidPrice": f"{last - 0.01:.2f}", "bidQty": "1.50000000",
+        "askPrice": f"{last:.2f}", "askQty": "2.10000000", "openPrice": f"{first:.2f}",
+        "highPrice": f"{max(float(k[2]) for k in klines[-24:]):.2f}", "lowPrice": f"{min(float(k[3]) for k in klines[-24:]):.2f}",
+        "volume": "20000.00000000", "quoteVolume": f"{20000 * last:.4f}", "openTime": klines[-24][0],
+        "closeTime": klines[-1][6], "firstId": 1, "lastId": 1000000, "count": 1000000
+    })
+
+    markets = []
+    for rank in range(1, 101):
+        change = rng.gauss(0, 6)
+        markets.append({
+            "id": f"coin-{rank}", "symbol": f"cg{rank:03d}", "name": f"Coin {rank}",
+            "current_price": round(rng.uniform(0.01, 500), 4), "market_cap_rank": rank,
+            "total_volume": round(5e9 / rank, 2), "price_change_percentage_24h": round(change, 3)
+        })
+    write("coingecko_markets.json", markets)
+    write("groq_completion.json", completion_fixture())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", action="store_true", help="generate deterministic fixtures offline")
+    args = parser.parse_args()
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    record_synthetic() if args.synthetic else record_live()
@@ -0,0 +1,31 @@
+
+import logging
+import sys
+import os
+import json
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load local.settings.json values into environment if running locally
+try:
+    with open("local.settings.json", "r") as f:
+        settings = json.load(f)
+        for k, v in settings.get("Values", {}).items():
+            os.environ.setdefault(k, str(v))
+except:
+    pass
+
+from shared.cosmos_db import bootstrap_cosmos
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+if __name__ == "__main__":
+    # One-time provisioning of the database and containers.
+    # Function invocations no longer create them; alternatively set COSMOS_DB_BOOTSTRAP=true.
+    if not os.environ.get("COSMOS_DB_CONNECTION_STRING"):
+        print("COSMOS_DB_CONNECTION_STRING is not set.")
+        sys.exit(1)
+    bootstrap_cosmos()
+    print("--- Cosmos DB bootstrap complete ---")
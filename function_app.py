@@ -1,24 +1,45 @@
 import azure.functions as func
 import logging
-from shared.trader import run_trading_cycle
+import typing
+from shared.trader import run_trading_cycle, run_coin_work
+from shared.fanout import WORK_QUEUE
+from shared.price_monitor import run_price_monitor
 
 app = func.FunctionApp()
 
 @app.schedule(schedule="0 */30 * * * *", arg_name="myTimer", run_on_startup=True,
               use_monitor=False) 
-def trader_timer(myTimer: func.TimerRequest) -> None:
+@app.queue_output(arg_name="workItems", queue_name=WORK_QUEUE, connection="AzureWebJobsStorage")
+def trader_timer(myTimer: func.TimerRequest, workItems: func.Out[typing.List[str]]) -> None:
     if myTimer.past_due:
         logging.info('The timer is past due!')
 
     logging.info('Python timer trigger function started.')
     
     try:
-        run_trading_cycle()
+        # In EXECUTION_MODE "fanout" the cycle only plans and enqueues one item per coin
+        run_trading_cycle(enqueue=workItems.set)
     except Exception as e:
         logging.error(f"Error running trading cycle: {e}")
     
     logging.info('Python timer trigger function finished.')
 
+@app.schedule(schedule="0 * * * * *", arg_name="monitorTimer", run_on_startup=False,
+              use_monitor=False)
+def price_monitor_timer(monitorTimer: func.TimerRequest) -> None:
+    # Streams prices for held coins for PRICE_MONITOR_WINDOW seconds, independent of the LLM cycle
+    # Opt-in: PRICE_MONITOR_ENABLED must be true as an app setting and in the settings document
+    try:
+        run_price_monitor()
+    except Exception as e:
+        logging.error(f"Error running price monitor: {e}")
+
+@app.queue_trigger(arg_name="workItem", queue_name=WORK_QUEUE, connection="AzureWebJobsStorage")
+def coin_worker(workItem: func.QueueMessage) -> None:
+    # Raising lets the queue retry the item: it is re-run if it failed before its trade was
+    # committed, otherwise the redelivery only finishes the (cycle, coin) bookkeeping
+    run_coin_work(workItem.get_body().decode("utf-8"))
+
 @app.route(route="ForceBuy", auth_level=func.AuthLevel.FUNCTION)
 def ForceBuy(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('ForceBuy HTTP trigger triggered.')
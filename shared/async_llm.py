@@ -0,0 +1,213 @@
+import os
+import json
+import asyncio
+import logging
+import time
+from openai import AsyncOpenAI, RateLimitError
+from . import metrics
+from .openai_service import (
+    GROQ_BASE_URL, DEFAULT_MODEL, MAX_ATTEMPTS, SIGNAL_FORMAT_INSTRUCTION, RateLimiter, SignalCache,
+    estimate_tokens, get_rate_limiter, get_signal_cache, normalize_signal
+)
+
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_DEADLINE_SECONDS = 20
+DEFAULT_HEDGE_AFTER_SECONDS = 5
+
+class Endpoint:
+    """One OpenAI-compatible chat completion endpoint and the rate limiter guarding it."""
+    def __init__(self, name, base_url, api_key, model=DEFAULT_MODEL, limiter=None):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.limiter = limiter or RateLimiter()
+
+def get_endpoints():
+    """Groq as primary plus the optional LLM_FALLBACK_* endpoint, in failover order."""
+    endpoints = []
+    if os.getenv("GROQ_API_KEY"):
+        endpoints.append(Endpoint("groq", GROQ_BASE_URL, os.getenv("GROQ_API_KEY"), DEFAULT_MODEL, get_rate_limiter()))
+    if os.getenv("LLM_FALLBACK_BASE_URL"):
+        endpoints.append(Endpoint(
+            "fallback",
+            os.getenv("LLM_FALLBACK_BASE_URL"),
+            os.getenv("LLM_FALLBACK_API_KEY", "none"),
+            os.getenv("LLM_FALLBACK_MODEL", DEFAULT_MODEL)
+        ))
+    return endpoints
+
+class AsyncLLMClient:
+    """Keeps several completions in flight with per-request deadlines, hedging and failover.
+
+    Each request goes to the first endpoint. If it has not answered after `hedge_after`
+    seconds a duplicate is sent to the next endpoint (or the same one if there is only
+    one) and the first answer wins. A failed request fails over to the next endpoint
+    immediately. The whole request, hedges included, must finish within `deadline`.
+    """
+    def __init__(self, endpoints, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 deadline=DEFAULT_DEADLINE_SECONDS, hedge_after=DEFAULT_HEDGE_AFTER_SECONDS):
+        self.endpoints = endpoints
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.deadline = float(deadline)
+        self.hedge_after = float(hedge_after)
+        self.clients = []
+        self.semaphore = None
+        self.latencies = []
+        self.counters = {"requests": 0, "hedged": 0, "failovers": 0, "deadline_exceeded": 0, "failed": 0}
+
+    async def __aenter__(self):
+        # Clients and the semaphore belong to the running event loop
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.clients = [
+            AsyncOpenAI(api_key=e.api_key, base_url=e.base_url, timeout=self.deadline, max_retries=0)
+            for e in self.endpoints
+        ]
+        return self
+
+    async def __aexit__(self, *exc):
+        for c in self.clients:
+            await c.close()
+        self.clients = []
+
+    async def _request(self, index, messages, max_tokens):
+        endpoint = self.endpoints[index]
+        reserved = sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+        metrics.record("llm_wait_seconds", await asyncio.to_thread(endpoint.limiter.acquire, reserved))
+        metrics.record("llm_requests")
+        try:
+            raw = await self.clients[index].chat.completions.with_raw_response.create(
+                model=endpoint.model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                max_tokens=max_tokens,
+                temperature=0.0,
+            )
+        except RateLimitError as e:
+            endpoint.limiter.on_rate_limited(getattr(e.response, "headers", None))
+            raise
+        endpoint.limiter.update_from_headers(raw.headers)
+        response = raw.parse()
+        usage = getattr(response, "usage", None)
+        endpoint.limiter.record_usage(reserved, getattr(usage, "total_tokens", None))
+        metrics.record("llm_tokens", getattr(usage, "total_tokens", None) or 0)
+        return response
+
+    async def _hedged(self, messages, max_tokens):
+        tasks = set()
+        errors = []
+        launched = 0
+
+        def launch():
+            nonlocal launched
+            index = launched % len(self.endpoints)
+            launched += 1
+            tasks.add(asyncio.create_task(self._request(index, messages, max_tokens)))
+
+        launch()
+        hedged = False
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=None if hedged else self.hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    self.counters["hedged"] += 1
+                    launch()
+                    continue
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+                    logging.warning(f"LLM request failed: {type(task.exception()).__name__}: {task.exception()}")
+                if not tasks and launched < max(MAX_ATTEMPTS, len(self.endpoints)):
+                    self.counters["failovers"] += 1
+                    launch()
+            raise errors[-1]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def complete(self, messages, max_tokens):
+        """Chat completion with deadline, hedging and failover. Raises on final failure."""
+        async with self.semaphore:
+            self.counters["requests"] += 1
+            start = time.monotonic()
+            try:
+                return await asyncio.wait_for(self._hedged(messages, max_tokens), self.deadline)
+            except asyncio.TimeoutError:
+                self.counters["deadline_exceeded"] += 1
+                raise
+            except Exception:
+                self.counters["failed"] += 1
+                raise
+            finally:
+                self.latencies.append(time.monotonic() - start)
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        percentile = lambda p: round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+        return {**self.counters, "p50_seconds": percentile(0.5), "p99_seconds": percentile(0.99)}
+
+async def fetch_signal(llm, item, cache):
+    coin_id = item["coin_id"]
+    try:
+        response = await llm.complete(
+            [
+                {"role": "system", "content": item["prompt"]},
+                {"role": "user", "content": SIGNAL_FORMAT_INSTRUCTION}
+            ],
+            max_tokens=60
+        )
+        content = response.choices[0].message.content
+        signal = normalize_signal(json.loads(content))
+    except asyncio.TimeoutError:
+        logging.error(f"LLM deadline exceeded for {coin_id} → defaulting to HOLD")
+        return {"action": "HOLD"}
+    except Exception as e:
+        logging.error(f"LLM signal failed for {coin_id} on every endpoint ({type(e).__name__}: {e}) → defaulting to HOLD")
+        return {"action": "HOLD"}
+    if cache is not None:
+        cache.put(item["cache_key"], signal)
+    return signal
+
+async def gather_signals(items, endpoints, settings, cache):
+    async with AsyncLLMClient(
+        endpoints,
+        max_in_flight=settings.get("LLM_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT),
+        deadline=settings.get("LLM_DEADLINE_SECONDS", DEFAULT_DEADLINE_SECONDS),
+        hedge_after=settings.get("LLM_HEDGE_AFTER_SECONDS", DEFAULT_HEDGE_AFTER_SECONDS)
+    ) as llm:
+        signals = await asyncio.gather(*(fetch_signal(llm, item, cache) for item in items))
+        logging.info(f"Async LLM stats: {llm.summary()}")
+    return signals
+
+def get_trading_signals_async(items, settings=None, use_cache=True, endpoints=None):
+    """Signals for many coins with several requests in flight. Same `items` as
+    get_trading_signals_batch; returns {coin_id: signal}."""
+    settings = settings or {}
+    cache = get_signal_cache() if use_cache else None
+    signals = {}
+    pending = []
+    for item in items:
+        if cache is not None:
+            item["cache_key"] = item.get("cache_key") or SignalCache.key_for(item["prompt"])
+            cached = cache.get(item["cache_key"])
+            if cached is not None:
+                logging.info(f"Signal cache hit for {item['coin_id']}: {cached}")
+                signals[item["coin_id"]] = cached
+                continue
+        pending.append(item)
+    if not pending:
+        return signals
+
+    endpoints = endpoints if endpoints is not None else get_endpoints()
+    if not endpoints:
+        logging.warning("No LLM endpoint configured (missing API key). Defaulting to HOLD.")
+        return {**signals, **{item["coin_id"]: {"action": "HOLD"} for item in pending}}
+
+    results = asyncio.run(gather_signals(pending, endpoints, settings, cache))
+    signals.update({item["coin_id"]: signal for item, signal in zip(pending, results)})
+    return signals
@@ -0,0 +1,214 @@
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Same 1% sell fee as TradingService.simulate_sell
+SELL_FEE_MULTIPLIER = 0.99
+
+def load_price_history(store, symbols, interval="1h", start_time=None, end_time=None):
+    """Build an aligned close-price matrix from a KlineStore.
+
+    Returns (timestamps, prices): open times in ms and a (len(symbols), n_candles) float array.
+    Gaps are forward-filled; candles before a symbol's first stored kline stay NaN.
+    """
+    series = {}
+    for symbol in symbols:
+        rows = store.get_window(symbol, interval, start_time=start_time, end_time=end_time)
+        if rows:
+            frame = pd.DataFrame(rows, columns=["open_time", "open", "high", "low", "close"])
+            series[symbol] = frame.set_index("open_time")["close"]
+        else:
+            logging.warning(f"No stored {interval} klines for {symbol}")
+    frame = pd.DataFrame(series).sort_index().ffill().reindex(columns=list(symbols))
+    return frame.index.to_numpy(dtype=np.int64), frame.to_numpy(dtype=np.float64).T
+
+def find_exits(prices, coins, entry_index, upper, lower, chunk=256):
+    """Vectorized TP/SL search for positions opened at `entry_index`.
+
+    For each coin, return the first later candle whose price is >= upper or <= lower,
+    or -1 if the position is still open at the end of the data. The scan looks at all
+    pending coins at once over growing windows of candles.
+    """
+    n_candles = prices.shape[1]
+    exit_index = np.full(len(coins), -1, dtype=np.int64)
+    pending = np.arange(len(coins))
+    start = entry_index + 1
+    while pending.size and start < n_candles:
+        end = min(n_candles, start + chunk)
+        window = prices[coins[pending], start:end]
+        hits = (window >= upper[pending, None]) | (window <= lower[pending, None])
+        found = hits.any(axis=1)
+        exit_index[pending[found]] = start + hits[found].argmax(axis=1)
+        pending = pending[~found]
+        start = end
+        chunk *= 2
+    return exit_index
+
+class BacktestResult:
+    """Equity arrays, trade log and summary statistics of one backtest run."""
+    def __init__(self, coins, timestamps, balance, invested, market_value, holdings_count, trades, trade_count, initial_balance):
+        self.coins = coins
+        self.timestamps = timestamps
+        self.balance = balance
+        # Same valuation as TradingService.get_total_value: open positions at entry price
+        self.total_value = balance + invested
+        # Mark-to-market value if every open position were sold (after fee)
+        self.market_value = market_value
+        self.holdings_count = holdings_count
+        self.trades = trades
+        self.trade_count = trade_count
+        self.initial_balance = initial_balance
+
+    def stats(self):
+        final_value = float(self.market_value[-1]) if len(self.market_value) else self.initial_balance
+        peak = np.maximum.accumulate(self.market_value) if len(self.market_value) else np.array([1.0])
+        drawdown = (self.market_value - peak) / peak if len(self.market_value) else np.array([0.0])
+        sells = [t for t in self.trades if t["action"] == "SELL"]
+        wins = [t for t in sells if t["pnl"] > 0]
+        return {
+            "final_value": round(final_value, 2),
+            "return_pct": round((final_value / self.initial_balance - 1) * 100, 4),
+            "max_drawdown_pct": round(float(-drawdown.min()) * 100, 4),
+            "trade_count": self.trade_count,
+            "win_rate_pct": round(len(wins) / len(sells) * 100, 2) if sells else None
+        }
+
+    def equity_curve(self):
+        """Equity points with the same fields as TradingService.log_equity_curve."""
+        return [
+            {
+                "timestamp": datetime.utcfromtimestamp(ts / 1000).isoformat(),
+                "total_value": round(float(total), 2),
+                "balance_usd": round(float(balance), 2),
+                "holdings_count": int(count)
+            }
+            for ts, total, balance, count in zip(self.timestamps, self.total_value, self.balance, self.holdings_count)
+        ]
+
+def exit_reason(entry_price, price, target_pct, take_profit, stop_loss):
+    """Mirror the order of checks in TradingService.check_sell_conditions."""
+    if not np.isnan(target_pct) and price >= entry_price * (1 + target_pct / 100):
+        return f"Dynamic Take Profit ({target_pct:.1f}%)"
+    if price >= entry_price * (1 + take_profit):
+        return f"Take Profit (Fixed {int(take_profit*100)}%)"
+    return f"Stop Loss (Fixed {int(stop_loss*100)}%)"
+
+def run_backtest(timestamps, prices, coins=None, entries=None, targets=None,
+                 order_amount=50, take_profit=15, stop_loss=8, initial_balance=1000, record_trades=True):
+    """Replay a price matrix through TradingService's buy/sell/fee rules.
+
+    `prices` is (n_coins, n_candles) of closes, as checked each cycle by check_sell_conditions.
+    `entries` is a boolean matrix of BUY signals (default: buy whenever flat) and `targets`
+    the LLM target_profit_pct at each candle (NaN for none). `take_profit` and `stop_loss`
+    are percentages, like the TAKE_PROFIT / STOP_LOSS settings.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n_coins, n_candles = prices.shape
+    coins = list(coins) if coins is not None else [str(i) for i in range(n_coins)]
+    take_profit = float(take_profit) / 100
+    stop_loss = float(stop_loss) / 100
+    order_amount = float(order_amount)
+
+    tradable = np.isfinite(prices) & (prices > 0)
+    entries = tradable if entries is None else (np.asarray(entries, dtype=bool) & tradable)
+    targets = np.full(prices.shape, np.nan) if targets is None else np.asarray(targets, dtype=np.float64)
+
+    balance = float(initial_balance)
+    holding = np.zeros(n_coins, dtype=bool)
+    entry_price = np.zeros(n_coins)
+    entry_target = np.full(n_coins, np.nan)
+    quantity = np.zeros(n_coins)
+    exit_at = np.full(n_coins, -1, dtype=np.int64)
+    entry_at = np.zeros(n_coins, dtype=np.int64)
+
+    # State is only recorded at candles where something happens, then forward-filled
+    event_index, event_balance, event_count = [0], [balance], [0]
+    market_value = np.full(n_candles, 0.0)
+    trades = []
+    trade_count = 0
+
+    def record(t, action, coin, price, qty, pnl, reason):
+        if record_trades:
+            trades.append({
+                "timestamp": datetime.utcfromtimestamp(timestamps[t] / 1000).isoformat(),
+                "action": action,
+                "coin": coins[coin],
+                "price": float(price),
+                "quantity": float(qty) if action == "BUY" else "all",
+                "pnl": float(pnl) if pnl is not None else "",
+                "reason": reason,
+                "balance_usd": float(balance),
+                "total_value": float(balance + holding.sum() * order_amount)
+            })
+
+    def add_market_value(coin, start, end):
+        market_value[start:end] += quantity[coin] * prices[coin, start:end] * SELL_FEE_MULTIPLIER
+
+    t = 0
+    while t < n_candles:
+        # Coins are handled in list order like execute_coin: a scheduled exit sells,
+        # otherwise a BUY signal on a flat coin buys while the balance allows it
+        sold = np.flatnonzero(holding & (exit_at == t))
+        candidates = np.flatnonzero(~holding & entries[:, t])
+        if balance < order_amount and not sold.size:
+            candidates = candidates[:0]
+        bought = []
+        for coin in np.union1d(sold, candidates):
+            price = prices[coin, t]
+            if holding[coin]:
+                net_value = quantity[coin] * price * SELL_FEE_MULTIPLIER
+                pnl = net_value - order_amount
+                balance += net_value
+                holding[coin] = False
+                add_market_value(coin, entry_at[coin], t)
+                trade_count += 1
+                record(t, "SELL", coin, price, None, pnl,
+                       exit_reason(entry_price[coin], price, entry_target[coin], take_profit, stop_loss))
+            elif balance >= order_amount and coin not in sold:
+                holding[coin] = True
+                entry_price[coin] = price
+                entry_target[coin] = targets[coin, t]
+                quantity[coin] = order_amount / price
+                entry_at[coin] = t
+                balance -= order_amount
+                bought.append(coin)
+                trade_count += 1
+                record(t, "BUY", coin, price, quantity[coin], None, "Backtest signal")
+
+        if bought:
+            bought = np.array(bought)
+            upper = entry_price[bought] * (1 + take_profit)
+            dynamic = ~np.isnan(entry_target[bought])
+            upper[dynamic] = np.minimum(upper[dynamic], entry_price[bought][dynamic] * (1 + entry_target[bought][dynamic] / 100))
+            lower = entry_price[bought] * (1 - stop_loss)
+            exit_at[bought] = find_exits(prices, bought, t, upper, lower)
+
+        if len(sold) or len(bought):
+            event_index.append(t)
+            event_balance.append(balance)
+            event_count.append(int(holding.sum()))
+
+        # Jump straight to the next exit when no new entry is possible
+        pending_exits = exit_at[holding & (exit_at > t)]
+        next_exit = pending_exits.min() if pending_exits.size else n_candles
+        if balance < order_amount or holding.all():
+            t = int(next_exit)
+        else:
+            t += 1
+
+    # Positions still open at the end are valued at the last price
+    for coin in np.flatnonzero(holding):
+        add_market_value(coin, entry_at[coin], n_candles)
+
+    # Forward-fill balance and holdings count between events
+    positions = np.searchsorted(np.array(event_index), np.arange(n_candles), side="right") - 1
+    balance_curve = np.array(event_balance)[positions]
+    count_curve = np.array(event_count)[positions]
+    invested = count_curve * order_amount
+    market_value += balance_curve
+
+    return BacktestResult(
+        coins, np.asarray(timestamps), balance_curve, invested, market_value,
+        count_curve, trades, trade_count, float(initial_balance)
+    )
@@ -1,12 +1,29 @@
+import json
 import logging
 import time
-import requests
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
+from .symbol_index import get_symbol_index
+from .kline_store import get_kline_store
+from .http_session import get_session
+
+binance_client = None
+# Binance error code for an unknown (e.g. delisted) symbol
+INVALID_SYMBOL_CODE = -1121
+
+def get_binance_client():
+    """Public Binance client (no API key) reused across warm invocations on the shared session."""
+    global binance_client
+    if binance_client is None:
+        client = Client(ping=False)
+        client.session.close()
+        client.session = get_session()
+        binance_client = client
+    return binance_client
 
 class BinanceService:
     def __init__(self):
-        self.client = Client()  # public client, no API key needed
+        self.client = get_binance_client()
         self.coin_mapping = {
             "btc": "BTCUSDT",
             "eth": "ETHUSDT",
@@ -18,6 +35,66 @@ class BinanceService:
             "shib": "SHIBUSDT",
             # Add more mappings here as needed
         }
+        # symbol -> 24h ticker, filled by load_snapshot() once per cycle
+        self.snapshot = {}
+        self.snapshot_time = None
+
+    def load_snapshot(self, coin_ids, chunk_size=100):
+        """Fetch 24h tickers for all coins in bulk and serve later price/market lookups from them.
+
+        Binance accepts a `symbols` list on /ticker/24hr, so N coins cost one request per
+        `chunk_size` symbols instead of two requests per coin.
+        """
+        symbols = []
+        for coin_id in coin_ids:
+            symbol = self._get_symbol(coin_id)
+            if symbol and symbol not in symbols:
+                symbols.append(symbol)
+
+        snapshot = {}
+        for i in range(0, len(symbols), chunk_size):
+            self._load_ticker_chunk(symbols[i:i + chunk_size], snapshot)
+
+        self.snapshot = snapshot
+        self.snapshot_time = time.time()
+        logging.info(f"Loaded market snapshot for {len(snapshot)}/{len(symbols)} symbols")
+        return len(snapshot)
+
+    def _load_ticker_chunk(self, chunk, snapshot):
+        """Bulk-fetch one chunk into `snapshot`.
+
+        Binance rejects the whole request if any symbol is invalid (e.g. delisted), so such
+        a chunk is split in halves and retried and a single invalid symbol is dropped. Any
+        other error leaves the chunk to the per-coin fallback rather than multiplying requests.
+        """
+        try:
+            tickers = self.client.get_ticker(symbols=json.dumps(chunk, separators=(",", ":")))
+            for ticker in tickers:
+                snapshot[ticker["symbol"]] = ticker
+        except BinanceAPIException as e:
+            if e.code != INVALID_SYMBOL_CODE:
+                logging.error(f"Bulk ticker error for {len(chunk)} symbols: {e}")
+                return
+            if len(chunk) == 1:
+                logging.warning(f"Dropping {chunk[0]} from the market snapshot: {e}")
+                return
+            logging.warning(f"Invalid symbol among {len(chunk)} symbols; splitting the request")
+            middle = len(chunk) // 2
+            self._load_ticker_chunk(chunk[:middle], snapshot)
+            self._load_ticker_chunk(chunk[middle:], snapshot)
+        except Exception as e:
+            logging.error(f"Bulk ticker error for {len(chunk)} symbols: {e}")
+
+    def clear_snapshot(self):
+        self.snapshot = {}
+        self.snapshot_time = None
+
+    def _get_ticker24(self, symbol):
+        """24h ticker from the snapshot, falling back to a single-symbol request."""
+        ticker24 = self.snapshot.get(symbol)
+        if ticker24 is None:
+            ticker24 = self.client.get_ticker(symbol=symbol)
+        return ticker24
 
     def _get_symbol(self, coin_id: str) -> str:
         coin_id_lower = coin_id.lower()
@@ -25,38 +102,67 @@ class BinanceService:
              return None # ignore obviously fake ones or just rely on binance check
 
         symbol = self.coin_mapping.get(coin_id_lower)
-        if not symbol:
-            dyn_symbol = f"{coin_id.upper()}USDT"
-            try:
-                # verify it exists
-                self.client.get_symbol_ticker(symbol=dyn_symbol)
-                self.coin_mapping[coin_id_lower] = dyn_symbol
-                return dyn_symbol
-            except Exception:
+        if symbol:
+            return symbol
+
+        index = get_symbol_index()
+        if index.ensure_loaded(self.client):
+            symbol = index.lookup(coin_id_lower)
+            if not symbol:
                 logging.error(f"No Binance mapping for {coin_id}")
                 return None
-        return symbol
+            self.coin_mapping[coin_id_lower] = symbol
+            return symbol
+
+        # Index unavailable (exchangeInfo failed and no cache): probe the ticker instead
+        dyn_symbol = f"{coin_id.upper()}USDT"
+        try:
+            # verify it exists
+            self.client.get_symbol_ticker(symbol=dyn_symbol)
+            self.coin_mapping[coin_id_lower] = dyn_symbol
+            return dyn_symbol
+        except Exception:
+            logging.error(f"No Binance mapping for {coin_id}")
+            return None
+
+    def get_tick_size(self, coin_id: str):
+        """Price tick size from the symbol index, or None if unknown."""
+        symbol = self._get_symbol(coin_id)
+        if not symbol:
+            return None
+        return get_symbol_index().tick_size(symbol)
 
     def get_current_price(self, coin_id: str) -> float:
         symbol = self._get_symbol(coin_id)
         if not symbol:
             return 0.0
         try:
+            if symbol in self.snapshot:
+                return float(self.snapshot[symbol]["lastPrice"])
             ticker = self.client.get_symbol_ticker(symbol=symbol)
             return float(ticker["price"])
         except Exception as e:
             logging.error(f"Price error for {coin_id}: {e}")
             return 0.0
 
-    def get_ohlc(self, coin_id: str, days: int = 30) -> list:
+    def get_ohlc(self, coin_id: str, days: int = 30, include_volume: bool = False) -> list:
         symbol = self._get_symbol(coin_id)
         if not symbol:
             return []
+        interval = "1h" if days <= 30 else "4h"
+        limit = min(1000, days * 24)
+        columns = 6 if include_volume else 5
         try:
-            interval = "1h" if days <= 30 else "4h"
-            limit = min(1000, days * 24)
+            store = get_kline_store()
+        except Exception as e:
+            logging.warning(f"Kline store unavailable, downloading {coin_id} directly: {e}")
+            store = None
+        try:
+            if store:
+                store.sync(self.client, symbol, interval, limit)
+                return store.get_window(symbol, interval, limit=limit, include_volume=include_volume)
             klines = self.client.get_klines(symbol=symbol, interval=interval, limit=limit)
-            return [[int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4])] for k in klines]
+            return [[int(k[0])] + [float(v) for v in k[1:columns]] for k in klines]
         except Exception as e:
             logging.error(f"OHLC error for {coin_id}: {e}")
             return []
@@ -66,7 +172,7 @@ class BinanceService:
         if not symbol:
             return {}
         try:
-            ticker24 = self.client.get_ticker(symbol=symbol)
+            ticker24 = self._get_ticker24(symbol)
             return {
                 "current_price": float(ticker24["lastPrice"]),
                 "price_change_percentage_24h": float(ticker24["priceChangePercent"]),
@@ -95,7 +201,7 @@ class CoinGeckoDiscovery:
                 "page": 1,
                 "sparkline": False
             }
-            resp = requests.get(url, params=params, timeout=10)
+            resp = get_session().get(url, params=params, timeout=10)
             resp.raise_for_status()
             data = resp.json()
             
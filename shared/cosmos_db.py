@@ -1,16 +1,186 @@
 import os
+import copy
+import atexit
 import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from azure.core import MatchConditions
 from azure.cosmos import CosmosClient, PartitionKey
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError, CosmosBatchOperationError
 from datetime import datetime
+from . import metrics
 
 # Silence verbose Azure SDK logging
 logging.getLogger("azure.cosmos").setLevel(logging.WARNING)
 logging.getLogger("azure.core.pipeline.policies.http_logging_policy").setLevel(logging.WARNING)
 
+# Cosmos DB allows at most 100 operations per transactional batch and 10 per patch
+MAX_BATCH_OPERATIONS = 100
+MAX_PATCH_OPERATIONS = 10
+# Properties Cosmos adds to every document
+SYSTEM_PROPERTIES = ("_rid", "_self", "_etag", "_attachments", "_ts")
+PORTFOLIO_ID = "main_portfolio"
+DEFAULT_MAX_BUFFERED_EVENTS = 500
+
+# Services with an active event buffer, flushed at interpreter shutdown
+active_services = weakref.WeakSet()
+
+@atexit.register
+def flush_all_event_buffers():
+    for service in list(active_services):
+        service.flush_events()
+
+class EventBuffer:
+    """Bounded in-memory queue of (container, partition key, item) records awaiting a batch write."""
+    def __init__(self, max_events=DEFAULT_MAX_BUFFERED_EVENTS):
+        self.max_events = max_events
+        self.lock = threading.Lock()
+        self.events = []
+
+    def add(self, container, partition_key, item):
+        """Queue a record. Returns True once the buffer is full and should be flushed."""
+        with self.lock:
+            self.events.append((container, partition_key, item))
+            return len(self.events) >= self.max_events
+
+    def drain(self):
+        with self.lock:
+            events, self.events = self.events, []
+        return events
+
+class PortfolioConflictError(Exception):
+    """The portfolio document was changed by another writer since it was read."""
+
+# Container layout: id -> (partition key path, dedicated throughput or None for shared)
+CONTAINERS = {
+    # Portfolios container - Partition Key: /id (we only have one portfolio for now)
+    "portfolio": ("/id", 400),
+    # Trades container - Partition Key: /coin
+    "trades": ("/coin", 400),
+    # Settings container - Partition Key: /id
+    "settings": ("/id", 400),
+    # Equity logs container - Partition Key: /year (for basic partitioning)
+    "equity_logs": ("/year", 400),
+    # Watchlist container - Partition Key: /coin, shared throughput
+    "watchlist": ("/coin", None),
+    # Fan-out work items - Partition Key: /cycle_id, shared throughput
+    "cycle_work": ("/cycle_id", None),
+    # Sharded portfolio (cash + one document per position) - Partition Key: /portfolio_id
+    "positions": ("/portfolio_id", None),
+}
+# Default time-to-live of the documents in a container (seconds), for containers that expire them
+CONTAINER_TTL_SECONDS = {
+    # Fan-out bookkeeping is only needed while a cycle runs and for its redeliveries
+    "cycle_work": int(os.environ.get("CYCLE_WORK_TTL_SECONDS", 7 * 24 * 3600)),
+}
+
+def json_pointer(*parts):
+    """JSON Pointer (RFC 6901) path for a patch operation, escaping '~' and '/' in keys."""
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in parts)
+
+def patch_operations(old, new, prefix=()):
+    """Patch operations turning the top-level fields of `old` into `new` (under `prefix`)."""
+    operations = []
+    for key, value in new.items():
+        if key not in SYSTEM_PROPERTIES and (key not in old or old[key] != value):
+            operations.append({"op": "set", "path": json_pointer(*prefix, key), "value": value})
+    for key in old:
+        if key not in new and key not in SYSTEM_PROPERTIES:
+            operations.append({"op": "remove", "path": json_pointer(*prefix, key)})
+    return operations
+
+def position_id(coin_id):
+    return f"position:{coin_id}"
+
+def position_doc(portfolio_id, coin_id, holding):
+    return {**holding, "id": position_id(coin_id), "portfolio_id": portfolio_id, "type": "position", "coin": coin_id}
+
+def holding_from_position(doc):
+    return {k: v for k, v in doc.items() if k not in ("id", "portfolio_id", "type", "coin") + SYSTEM_PROPERTIES}
+
+# Process-level caches so warm Function invocations skip client setup
+client_cache = {}
+container_cache = {}
+cache_lock = threading.Lock()
+bootstrapped = set()
+
+class WatchlistCache:
+    """Small in-process TTL cache of watchlist items by coin (None is cached for misses too)."""
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.items = {}  # coin -> (expires_at, item)
+
+    def get(self, coin_id):
+        """Return (hit, item)."""
+        with self.lock:
+            entry = self.items.get(coin_id)
+            if entry is None or entry[0] < time.monotonic():
+                return False, None
+            # Callers may modify the item; keep the cached copy intact
+            return True, copy.deepcopy(entry[1])
+
+    def put(self, coin_id, item):
+        with self.lock:
+            self.items[coin_id] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(item))
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+watchlist_cache = WatchlistCache(float(os.environ.get("WATCHLIST_CACHE_TTL_SECONDS", 60)))
+
+def get_cosmos_client(connection_string):
+    """Return a CosmosClient shared by every CosmosDBService in this worker process."""
+    client = client_cache.get(connection_string)
+    if client is None:
+        with cache_lock:
+            client = client_cache.get(connection_string)
+            if client is None:
+                # Every response reports its request count and RU charge to the current metrics span
+                client = CosmosClient.from_connection_string(
+                    connection_string, raw_response_hook=metrics.record_cosmos_response
+                )
+                client_cache[connection_string] = client
+    return client
+
+def get_container(client, database_name, container_id):
+    """Cached container handle. Creating a handle makes no network call."""
+    key = (id(client), database_name, container_id)
+    container = container_cache.get(key)
+    if container is None:
+        container = client.get_database_client(database_name).get_container_client(container_id)
+        container_cache[key] = container
+    return container
+
+def bootstrap_cosmos(connection_string=None, database_name=None):
+    """Create the database and containers if missing. Run once per deployment, not per invocation."""
+    connection_string = connection_string or os.environ.get("COSMOS_DB_CONNECTION_STRING")
+    database_name = database_name or os.environ.get("COSMOS_DB_DATABASE_NAME", "tradingdb")
+    client = get_cosmos_client(connection_string)
+    database = client.create_database_if_not_exists(id=database_name)
+    for container_id, (partition_key, throughput) in CONTAINERS.items():
+        options = {"offer_throughput": throughput} if throughput else {}
+        if container_id in CONTAINER_TTL_SECONDS:
+            options["default_ttl"] = CONTAINER_TTL_SECONDS[container_id]
+        database.create_container_if_not_exists(
+            id=container_id,
+            partition_key=PartitionKey(path=partition_key),
+            **options
+        )
+    bootstrapped.add((connection_string, database_name))
+    logging.info(f"Cosmos DB bootstrap complete for database '{database_name}'")
+
 class CosmosDBService:
     def __init__(self):
         self.connection_string = os.environ.get("COSMOS_DB_CONNECTION_STRING")
         self.database_name = os.environ.get("COSMOS_DB_DATABASE_NAME", "tradingdb")
+        # Set by begin_event_buffer() to batch trade/equity writes
+        self.event_buffer = None
+        # PORTFOLIO_LAYOUT: "document" (one main_portfolio document) or "sharded" (positions container)
+        self.portfolio_layout = "document"
         
         if not self.connection_string:
             logging.warning("COSMOS_DB_CONNECTION_STRING is not set.")
@@ -18,55 +188,35 @@ class CosmosDBService:
             self.database = None
         else:
             try:
-                self.client = CosmosClient.from_connection_string(self.connection_string)
-                self.database = self.client.create_database_if_not_exists(id=self.database_name)
+                # Opt-in provisioning on the first instance of this process
+                if os.environ.get("COSMOS_DB_BOOTSTRAP", "false").lower() == "true" and \
+                        (self.connection_string, self.database_name) not in bootstrapped:
+                    bootstrap_cosmos(self.connection_string, self.database_name)
+                self.client = get_cosmos_client(self.connection_string)
+                self.database = self.client.get_database_client(self.database_name)
                 self._init_containers()
             except Exception as e:
                 logging.error(f"Failed to initialize Cosmos DB: {e}")
                 self.client = None
 
     def _init_containers(self):
-        """Initialize containers if they don't exist."""
+        """Resolve cached container handles (no control-plane calls; see bootstrap_cosmos)."""
         if not self.client: return
 
-        # Portfolios container - Partition Key: /id (we only have one portfolio for now)
-        self.portfolios_container = self.database.create_container_if_not_exists(
-            id="portfolio",
-            partition_key=PartitionKey(path="/id"),
-            offer_throughput=400
-        )
-
-        # Trades container - Partition Key: /coin
-        self.trades_container = self.database.create_container_if_not_exists(
-            id="trades",
-            partition_key=PartitionKey(path="/coin"),
-            offer_throughput=400
-        )
-        
-        # Settings container - Partition Key: /id
-        self.settings_container = self.database.create_container_if_not_exists(
-            id="settings",
-            partition_key=PartitionKey(path="/id"),
-            offer_throughput=400
-        )
-
-        # Equity logs container - Partition Key: /year (for basic partitioning)
-        self.equity_container = self.database.create_container_if_not_exists(
-            id="equity_logs",
-            partition_key=PartitionKey(path="/year"),
-            offer_throughput=400
-        )
-
-        # Watchlist container - Partition Key: /coin, shared throughput
-        self.watchlist_container = self.database.create_container_if_not_exists(
-            id="watchlist",
-            partition_key=PartitionKey(path="/coin")
-        )
+        self.portfolios_container = get_container(self.client, self.database_name, "portfolio")
+        self.trades_container = get_container(self.client, self.database_name, "trades")
+        self.settings_container = get_container(self.client, self.database_name, "settings")
+        self.equity_container = get_container(self.client, self.database_name, "equity_logs")
+        self.watchlist_container = get_container(self.client, self.database_name, "watchlist")
+        self.cycle_work_container = get_container(self.client, self.database_name, "cycle_work")
+        self.positions_container = get_container(self.client, self.database_name, "positions")
 
     def get_portfolio(self):
         """Retrieve the portfolio state."""
         if not self.client:
             return {"holdings": {}, "balance_usd": 1000, "id": "main_portfolio"}
+        if self.portfolio_layout == "sharded":
+            return self.get_sharded_portfolio()
             
         try:
             # We assume a single portfolio with id='main_portfolio'
@@ -75,20 +225,175 @@ class CosmosDBService:
         except Exception:
             # Initialize if not found
             initial_portfolio = {"id": "main_portfolio", "holdings": {}, "balance_usd": 1000}
-            self.portfolios_container.create_item(body=initial_portfolio)
-            return initial_portfolio
+            return self.portfolios_container.create_item(body=initial_portfolio)
 
     def save_portfolio(self, portfolio_data):
-        """Save the portfolio state."""
+        """Save the portfolio state.
+
+        If the document carries an `_etag` the write only succeeds when nobody else
+        changed it since it was read; otherwise PortfolioConflictError is raised.
+        """
         if not self.client: return
+        if self.portfolio_layout == "sharded":
+            return self.save_sharded_portfolio(portfolio_data)
         
         # Ensure ID is present
         if "id" not in portfolio_data:
             portfolio_data["id"] = "main_portfolio"
-            
-        self.portfolios_container.upsert_item(body=portfolio_data)
+
+        etag = portfolio_data.get("_etag")
+        conditions = {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+        try:
+            saved = self.portfolios_container.upsert_item(body=portfolio_data, **conditions)
+        except CosmosAccessConditionFailedError:
+            raise PortfolioConflictError("Portfolio was modified by another writer")
+
+        # Keep the new etag so the next write is conditional on this one
+        portfolio_data["_etag"] = saved.get("_etag")
         logging.info("Portfolio updated in Cosmos DB.")
 
+    def patch_holdings(self, portfolio_data, fields_by_coin):
+        """Write changed holding fields as a patch conditional on the portfolio's etag.
+
+        Falls back to save_portfolio when there are more than MAX_PATCH_OPERATIONS fields,
+        the document has no etag yet, or the patch itself fails for another reason.
+        """
+        if not self.client: return
+        operations = [
+            {"op": "set", "path": json_pointer("holdings", coin_id, field), "value": value}
+            for coin_id, fields in fields_by_coin.items()
+            for field, value in fields.items()
+        ]
+        etag = portfolio_data.get("_etag")
+        if not etag or len(operations) > MAX_PATCH_OPERATIONS:
+            return self.save_portfolio(portfolio_data)
+        portfolio_id = portfolio_data.get("id", PORTFOLIO_ID)
+        try:
+            saved = self.portfolios_container.patch_item(
+                item=portfolio_id, partition_key=portfolio_id, patch_operations=operations,
+                etag=etag, match_condition=MatchConditions.IfNotModified
+            )
+        except CosmosAccessConditionFailedError:
+            raise PortfolioConflictError("Portfolio was modified by another writer")
+        except Exception as e:
+            logging.warning(f"Portfolio patch failed ({e}); writing the full document")
+            return self.save_portfolio(portfolio_data)
+        portfolio_data["_etag"] = saved.get("_etag")
+        logging.info(f"Portfolio patched in Cosmos DB ({len(operations)} fields).")
+
+    def get_sharded_portfolio(self, portfolio_id=PORTFOLIO_ID):
+        """Assemble the portfolio from its cash and position documents, migrating the legacy document once.
+
+        The returned dict has the same shape as the single document, plus `_shards`: what was
+        read (balance, position etags and contents) so save_sharded_portfolio can write only
+        the difference.
+        """
+        docs = list(self.positions_container.query_items(query="SELECT * FROM c", partition_key=portfolio_id))
+        cash = next((d for d in docs if d.get("type") == "cash"), None)
+        if cash is None:
+            return self.migrate_portfolio(portfolio_id)
+
+        portfolio = {"id": portfolio_id, "balance_usd": cash["balance_usd"], "holdings": {}}
+        positions = {}
+        for doc in docs:
+            if doc.get("type") == "position":
+                holding = holding_from_position(doc)
+                portfolio["holdings"][doc["coin"]] = holding
+                positions[doc["coin"]] = {"etag": doc["_etag"], "holding": copy.deepcopy(holding)}
+        portfolio["_shards"] = {"balance_usd": cash["balance_usd"], "positions": positions}
+        return portfolio
+
+    def migrate_portfolio(self, portfolio_id=PORTFOLIO_ID):
+        """Copy the main_portfolio document into cash + position documents (left in place as a backup)."""
+        try:
+            legacy = self.portfolios_container.read_item(item=portfolio_id, partition_key=portfolio_id)
+        except Exception:
+            legacy = {"id": portfolio_id, "holdings": {}, "balance_usd": 1000}
+
+        operations = [
+            ("upsert", (position_doc(portfolio_id, coin_id, holding),))
+            for coin_id, holding in legacy.get("holdings", {}).items()
+        ]
+        # Cash goes last: its presence marks the migration as complete
+        operations.append(("upsert", ({"id": "cash", "portfolio_id": portfolio_id, "type": "cash",
+                                       "balance_usd": legacy.get("balance_usd", 1000)},)))
+        for i in range(0, len(operations), MAX_BATCH_OPERATIONS):
+            self.positions_container.execute_item_batch(
+                batch_operations=operations[i:i + MAX_BATCH_OPERATIONS], partition_key=portfolio_id
+            )
+        logging.info(f"Migrated portfolio {portfolio_id} to the sharded layout ({len(operations) - 1} positions)")
+        return self.get_sharded_portfolio(portfolio_id)
+
+    def save_sharded_portfolio(self, portfolio_data):
+        """Write only what changed since the portfolio was read, as transactional batches.
+
+        Cash moves are applied as increments, so writers touching different positions never
+        conflict; a withdrawal only applies if the stored balance covers it. Changed
+        positions are patched (or replaced) conditionally on their etag, new ones created
+        and sold ones deleted. A conflict rolls back its batch and raises
+        PortfolioConflictError.
+
+        The write is atomic only up to MAX_BATCH_OPERATIONS changes. Larger change sets go
+        out in consecutive batches, and a conflict in a later batch leaves the earlier ones
+        applied; callers reload the portfolio on PortfolioConflictError either way.
+        """
+        portfolio_id = portfolio_data.get("id", PORTFOLIO_ID)
+        shards = portfolio_data["_shards"]
+        holdings = portfolio_data["holdings"]
+        operations, targets = [], []
+
+        delta = portfolio_data["balance_usd"] - shards["balance_usd"]
+        if delta:
+            increment = ("cash", [{"op": "incr", "path": "/balance_usd", "value": delta}])
+            if delta < 0:
+                # Concurrent buys must not together spend more than the stored balance
+                operations.append(("patch", increment, {"filter_predicate": f"FROM c WHERE c.balance_usd >= {-delta:.8f}"}))
+            else:
+                operations.append(("patch", increment))
+            targets.append(None)
+        for coin_id, holding in holdings.items():
+            known = shards["positions"].get(coin_id)
+            if known is None:
+                operations.append(("create", (position_doc(portfolio_id, coin_id, holding),)))
+            else:
+                changes = patch_operations(known["holding"], holding)
+                if not changes:
+                    continue
+                condition = {"if_match_etag": known["etag"]}
+                if len(changes) <= MAX_PATCH_OPERATIONS:
+                    operations.append(("patch", (position_id(coin_id), changes), condition))
+                else:
+                    operations.append(("replace", (position_id(coin_id), position_doc(portfolio_id, coin_id, holding)), condition))
+            targets.append(coin_id)
+        for coin_id, known in shards["positions"].items():
+            if coin_id not in holdings:
+                operations.append(("delete", (position_id(coin_id),), {"if_match_etag": known["etag"]}))
+                targets.append(coin_id)
+        if not operations:
+            return
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            logging.warning(f"{len(operations)} portfolio changes exceed one batch; writing in several (not atomic)")
+
+        results = []
+        try:
+            for i in range(0, len(operations), MAX_BATCH_OPERATIONS):
+                results.extend(self.positions_container.execute_item_batch(
+                    batch_operations=operations[i:i + MAX_BATCH_OPERATIONS], partition_key=portfolio_id
+                ))
+        except (CosmosBatchOperationError, CosmosAccessConditionFailedError):
+            raise PortfolioConflictError("Portfolio positions were modified by another writer")
+
+        for coin_id, result in zip(targets, results):
+            if coin_id is None:
+                # Includes increments made by other writers meanwhile
+                balance = result["resourceBody"]["balance_usd"]
+                portfolio_data["balance_usd"] = shards["balance_usd"] = balance
+            elif coin_id in holdings:
+                shards["positions"][coin_id] = {"etag": result["eTag"], "holding": copy.deepcopy(holdings[coin_id])}
+            else:
+                shards["positions"].pop(coin_id, None)
+        logging.info(f"Portfolio updated in Cosmos DB ({len(operations)} document operations).")
+
     def log_trade(self, trade_data):
         """Log a trade event."""
         if not self.client: return
@@ -96,6 +401,10 @@ class CosmosDBService:
         # Ensure unique ID and timestamp
         if "id" not in trade_data:
             trade_data["id"] = str(datetime.now().timestamp())
+
+        if self.event_buffer is not None:
+            self._buffer_event(self.trades_container, trade_data["coin"], trade_data)
+            return
         
         self.trades_container.create_item(body=trade_data)
         logging.info(f"Trade logged to Cosmos DB: {trade_data.get('action')} {trade_data.get('coin')}")
@@ -107,6 +416,30 @@ class CosmosDBService:
             "TAKE_PROFIT": 15,
             "STOP_LOSS": 8,
             "ORDER_AMOUNT": 50,
+            "MAX_CONCURRENT_COINS": 4,
+            "PERSIST_TRADES_IMMEDIATELY": True,
+            "LLM_REQUESTS_PER_MINUTE": 30,
+            "LLM_TOKENS_PER_MINUTE": 6000,
+            "LLM_BATCH_SIZE": 1,
+            "LLM_CLIENT_MODE": "sync",
+            "LLM_MAX_IN_FLIGHT": 4,
+            "LLM_DEADLINE_SECONDS": 20,
+            "LLM_HEDGE_AFTER_SECONDS": 5,
+            "CYCLE_TIME_BUDGET_SECONDS": 480,
+            "EXECUTION_MODE": "inline",
+            "PORTFOLIO_LAYOUT": "document",
+            "PRICE_MONITOR_ENABLED": False,
+            "PRICE_MONITOR_WINDOW": 55,
+            "SIGNAL_CACHE_MODE": "quantized",
+            "SIGNAL_CACHE_TTL": 3600,
+            "INDICATOR_GATE_ENABLED": True,
+            "GATE_MIN_VOLATILITY_PCT": 0.3,
+            "GATE_MIN_MOMENTUM_PCT": 1.5,
+            "GATE_MIN_ATR_PCT": 0.5,
+            "GATE_MIN_VOLUME_Z": 2.0,
+            "PROMPT_FEATURES": "ohlc",
+            "PROMPT_OHLC_ENCODING": "raw",
+            "REVIEW_PROMPT_ENCODING": "raw",
             "COINS_TO_TRACK": ["btc", "eth", "sol", "pepe", "bonk"],
             "PROMPT_TEMPLATE": "You are an aggressive crypto trader chasing volatile opportunities for quick marginal gains. Analyze this OHLC data for {coin_name} over the last 30 intervals. Current price: ${current_price}. \n{holding_info}\nSpot potential pumps, high volatility spikes, or momentum shifts—even if risky. Embrace hype if volume supports it; aim for 3-10% swings.\nDecide: BUY (if any upside potential soon), SELL (only on clear downturn or to lock in profits), or HOLD (only if flat).\nLook at the data and decide immediately.\nRespond ONLY with valid JSON. Format: {\"action\": \"BUY\", \"target_profit_pct\": 10} or {\"action\": \"SELL\"} or {\"action\": \"HOLD\"}."
         }
@@ -133,6 +466,38 @@ class CosmosDBService:
         self.settings_container.upsert_item(body=settings_data)
         logging.info("Settings updated in Cosmos DB.")
 
+    def get_cycle_checkpoint(self):
+        """Scheduler state left by the previous cycle (rotation offset, unfinished coins)."""
+        empty = {"id": "cycle_checkpoint", "rotation": 0, "pending": []}
+        if not self.client: return empty
+        try:
+            return {**empty, **self.settings_container.read_item(item="cycle_checkpoint", partition_key="cycle_checkpoint")}
+        except Exception:
+            return empty
+
+    def save_cycle_checkpoint(self, checkpoint):
+        if not self.client: return
+        try:
+            self.settings_container.upsert_item(body={**checkpoint, "id": "cycle_checkpoint"})
+        except Exception as e:
+            logging.error(f"Failed to save cycle checkpoint: {e}")
+
+    def patch_settings(self, settings_data, keys):
+        """Update only `keys` of the settings document instead of rewriting all of it."""
+        if not self.client: return
+        operations = [{"op": "set", "path": json_pointer(key), "value": settings_data[key]} for key in keys]
+        if len(operations) > MAX_PATCH_OPERATIONS:
+            return self.update_settings(settings_data)
+        try:
+            self.settings_container.patch_item(
+                item=settings_data.get("id", "main_settings"), partition_key=settings_data.get("id", "main_settings"),
+                patch_operations=operations
+            )
+            logging.info(f"Settings patched in Cosmos DB: {list(keys)}")
+        except Exception as e:
+            logging.warning(f"Settings patch failed ({e}); writing the full document")
+            self.update_settings(settings_data)
+
     def log_equity(self, equity_data):
         """Log equity point."""
         if not self.client: return
@@ -142,31 +507,111 @@ class CosmosDBService:
         
         # Add year for partitioning
         equity_data["year"] = str(datetime.now().year)
+
+        if self.event_buffer is not None:
+            self._buffer_event(self.equity_container, equity_data["year"], equity_data)
+            return
         
         self.equity_container.create_item(body=equity_data)
         logging.info(f"Equity point logged to Cosmos DB: ${equity_data.get('total_value')}")
 
+    def begin_event_buffer(self, max_events=DEFAULT_MAX_BUFFERED_EVENTS):
+        """Buffer trade and equity records until flush_events() instead of writing each one."""
+        if self.event_buffer is None:
+            self.event_buffer = EventBuffer(max_events)
+            active_services.add(self)
+
+    def _buffer_event(self, container, partition_key, item):
+        if self.event_buffer.add(container, partition_key, item):
+            # Bound memory: flush as soon as the buffer fills up
+            self.flush_events()
+
+    def flush_events(self):
+        """Write buffered records with one transactional batch per partition key (max 100 ops each)."""
+        if self.event_buffer is None or not self.client:
+            return 0
+        events = self.event_buffer.drain()
+        if not events:
+            return 0
+
+        groups = {}
+        for container, partition_key, item in events:
+            groups.setdefault((container.id, partition_key), (container, []))[1].append(item)
+
+        written = 0
+        for (container_id, partition_key), (container, items) in groups.items():
+            for i in range(0, len(items), MAX_BATCH_OPERATIONS):
+                chunk = items[i:i + MAX_BATCH_OPERATIONS]
+                try:
+                    container.execute_item_batch(
+                        batch_operations=[("create", (item,)) for item in chunk],
+                        partition_key=partition_key
+                    )
+                    written += len(chunk)
+                except Exception as e:
+                    # The batch is atomic, so nothing was written: retry item by item
+                    logging.error(f"Batch write to {container_id}/{partition_key} failed ({e}); writing individually")
+                    for item in chunk:
+                        try:
+                            container.create_item(body=item)
+                            written += 1
+                        except Exception as item_error:
+                            logging.error(f"Failed to write {container_id} record {item.get('id')}: {item_error}")
+
+        logging.info(f"Flushed {written}/{len(events)} buffered events to Cosmos DB in {len(groups)} partition batches")
+        return written
+
+    def end_event_buffer(self):
+        """Flush remaining records and go back to writing events immediately."""
+        try:
+            self.flush_events()
+        finally:
+            self.event_buffer = None
+            active_services.discard(self)
+
+    @contextmanager
+    def buffered_events(self, max_events=DEFAULT_MAX_BUFFERED_EVENTS):
+        """Buffer events for the duration of the block; always flushes, even on exceptions."""
+        self.begin_event_buffer(max_events)
+        try:
+            yield self
+        finally:
+            self.end_event_buffer()
+
     def get_watchlist_item(self, coin_id):
-        """Retrieve a watchlist item by coin."""
+        """Retrieve a watchlist item by coin (cached, single-partition query)."""
         if not self.client: return None
+        hit, item = watchlist_cache.get(coin_id)
+        if hit:
+            return item
         try:
-            # Query by coin since id is composite {coin}-{pairAddress}
+            # id is composite {coin}-{pairAddress}, but the container is partitioned on /coin
             query = "SELECT * FROM c WHERE c.coin = @coin"
             items = list(self.watchlist_container.query_items(
                 query=query,
                 parameters=[{"name": "@coin", "value": coin_id}],
-                enable_cross_partition_query=True
+                partition_key=coin_id
             ))
-            return items[0] if items else None
+            item = items[0] if items else None
+            watchlist_cache.put(coin_id, item)
+            return item
         except Exception as e:
             logging.error(f"Error getting watchlist item for {coin_id}: {e}")
             return None
 
+    def get_watchlist_items(self, coin_ids):
+        """Retrieve watchlist items for many coins with one single-partition query per cache miss.
+
+        Returns {coin: item or None}.
+        """
+        return {coin_id: self.get_watchlist_item(coin_id) for coin_id in coin_ids}
+
     def upsert_watchlist_item(self, item_data):
         """Upsert a watchlist item."""
         if not self.client: return
         try:
-            self.watchlist_container.upsert_item(body=item_data)
+            saved = self.watchlist_container.upsert_item(body=item_data)
+            watchlist_cache.put(item_data.get("coin"), saved)
             logging.info(f"Watchlist item upserted: {item_data.get('id')}")
         except Exception as e:
             logging.error(f"Error upserting watchlist item: {e}")
@@ -0,0 +1,140 @@
+import json
+import logging
+import time
+from datetime import datetime
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError, CosmosResourceExistsError, CosmosResourceNotFoundError
+)
+
+# Queue shared by the planning timer (output binding) and the per-coin worker (trigger)
+WORK_QUEUE = "coin-work"
+# A claim older than this is treated as abandoned by a crashed worker
+CLAIM_TIMEOUT_SECONDS = 600
+# Status writes after a trade are retried: by then the trade is committed and must not run again
+WRITE_ATTEMPTS = 3
+WRITE_BACKOFF_SECONDS = 1.0
+
+def new_cycle_id():
+    return datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+
+def plan_cycle(cosmos, coins, cycle_id=None):
+    """Record a fan-out cycle and return one queue message per coin.
+
+    The cycle document is what the fan-in step later completes; per-coin documents
+    in the same partition are the idempotency keys for (cycle, coin).
+    """
+    cycle_id = cycle_id or new_cycle_id()
+    cosmos.cycle_work_container.create_item(body={
+        "id": "cycle",
+        "cycle_id": cycle_id,
+        "coins": list(coins),
+        "status": "running",
+        "created_at": datetime.utcnow().isoformat()
+    })
+    logging.info(f"Planned fan-out cycle {cycle_id} with {len(coins)} coins")
+    return [json.dumps({"cycle_id": cycle_id, "coin_id": coin_id}) for coin_id in coins]
+
+def claim(cosmos, cycle_id, coin_id):
+    """Claim (cycle, coin) for this worker. False if it was executed already or is being worked on elsewhere.
+
+    A work document goes "claimed" -> "committed" (trade written) -> "done" (counted by the fan-in).
+    """
+    container = cosmos.cycle_work_container
+    doc = {"id": coin_id, "cycle_id": cycle_id, "status": "claimed", "claimed_at": datetime.utcnow().isoformat()}
+    try:
+        container.create_item(body=doc)
+        return True
+    except CosmosResourceExistsError:
+        pass
+
+    existing = container.read_item(item=coin_id, partition_key=cycle_id)
+    if existing.get("status") in ("committed", "done"):
+        logging.info(f"Skipping {coin_id} in cycle {cycle_id}: already {existing['status']} (duplicate delivery)")
+        return False
+    age = (datetime.utcnow() - datetime.fromisoformat(existing["claimed_at"])).total_seconds()
+    if age < CLAIM_TIMEOUT_SECONDS:
+        logging.info(f"Skipping {coin_id} in cycle {cycle_id}: claimed {age:.0f}s ago by another worker")
+        return False
+    # Take over an abandoned claim, unless another worker just did
+    try:
+        container.replace_item(item=coin_id, body=doc, etag=existing["_etag"], match_condition=MatchConditions.IfNotModified)
+        logging.warning(f"Took over abandoned claim for {coin_id} in cycle {cycle_id}")
+        return True
+    except CosmosAccessConditionFailedError:
+        return False
+
+def release(cosmos, cycle_id, coin_id):
+    """Drop a claim after a failure so the queue's retry can claim it again."""
+    try:
+        cosmos.cycle_work_container.delete_item(item=coin_id, partition_key=cycle_id)
+    except CosmosResourceNotFoundError:
+        pass
+
+def write_status(cosmos, cycle_id, coin_id, status, result=None, attempts=WRITE_ATTEMPTS):
+    """Upsert the work document with `status`, retrying transient failures. Raises the last error."""
+    body = {
+        "id": coin_id,
+        "cycle_id": cycle_id,
+        "status": status,
+        "result": result,
+        f"{status}_at": datetime.utcnow().isoformat()
+    }
+    for attempt in range(1, attempts + 1):
+        try:
+            cosmos.cycle_work_container.upsert_item(body=body)
+            return True
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            logging.warning(f"Could not mark {coin_id} {status} in cycle {cycle_id} (attempt {attempt}/{attempts}): {e}")
+            time.sleep(WRITE_BACKOFF_SECONDS * attempt)
+
+def mark_committed(cosmos, cycle_id, coin_id, result=None):
+    """Record that the coin's trade is written, so a redelivery completes it instead of trading again."""
+    return write_status(cosmos, cycle_id, coin_id, "committed", result)
+
+def complete(cosmos, cycle_id, coin_id, result=None):
+    return write_status(cosmos, cycle_id, coin_id, "done", result)
+
+def resume(cosmos, cycle_id, coin_id):
+    """Redelivered message that could not be claimed: finish the bookkeeping of an executed coin.
+
+    A "committed" coin is marked done; for a done coin the fan-in is retried, since the
+    worker that completed it may have failed before the cycle was finished. True if this
+    call finished the cycle.
+    """
+    try:
+        existing = cosmos.cycle_work_container.read_item(item=coin_id, partition_key=cycle_id)
+    except CosmosResourceNotFoundError:
+        return False
+    if existing.get("status") == "committed":
+        logging.info(f"Completing {coin_id} in cycle {cycle_id}, committed by an earlier delivery")
+        complete(cosmos, cycle_id, coin_id, existing.get("result"))
+    elif existing.get("status") != "done":
+        return False
+    return try_finish(cosmos, cycle_id)
+
+def try_finish(cosmos, cycle_id):
+    """Fan-in: True for exactly one caller, once every coin of the cycle is done."""
+    container = cosmos.cycle_work_container
+    cycle = container.read_item(item="cycle", partition_key=cycle_id)
+    if cycle.get("status") != "running":
+        return False
+    done = list(container.query_items(
+        query="SELECT VALUE COUNT(1) FROM c WHERE c.status = @status",
+        parameters=[{"name": "@status", "value": "done"}],
+        partition_key=cycle_id
+    ))[0]
+    if done < len(cycle["coins"]):
+        logging.info(f"Cycle {cycle_id}: {done}/{len(cycle['coins'])} coins done")
+        return False
+    cycle["status"] = "completed"
+    cycle["completed_at"] = datetime.utcnow().isoformat()
+    try:
+        container.replace_item(item="cycle", body=cycle, etag=cycle["_etag"], match_condition=MatchConditions.IfNotModified)
+    except CosmosAccessConditionFailedError:
+        # Another worker finished the cycle first
+        return False
+    logging.info(f"Cycle {cycle_id} completed ({done} coins)")
+    return True
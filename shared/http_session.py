@@ -0,0 +1,105 @@
+import os
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from . import metrics
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 10  # keep-alive connections per host
+
+class ConnectionStats:
+    """Counts HTTP requests against newly opened connections to measure keep-alive reuse."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self.lock:
+            self.new_connections += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": max(0, self.requests - self.new_connections)
+            }
+
+stats = ConnectionStats()
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        stats.record_new_connection()
+        return super()._new_conn()
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        stats.record_new_connection()
+        return super()._new_conn()
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with a default timeout and connection-counting pools."""
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool
+        }
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        stats.record_request()
+        metrics.record("http_requests")
+        return super().send(request, **kwargs)
+
+session = None
+session_lock = threading.Lock()
+
+def build_session():
+    retry = Retry(
+        total=int(os.getenv("HTTP_MAX_RETRIES", 3)),
+        backoff_factor=float(os.getenv("HTTP_BACKOFF_FACTOR", 0.5)),
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    pool_size = int(os.getenv("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE))
+    adapter = PooledHTTPAdapter(
+        timeout=float(os.getenv("HTTP_TIMEOUT_SECONDS", DEFAULT_TIMEOUT)),
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        pool_block=True,  # cap concurrent connections per host
+        max_retries=retry
+    )
+    new_session = requests.Session()
+    new_session.mount("https://", adapter)
+    new_session.mount("http://", adapter)
+    new_session.headers.update({"Accept": "application/json"})
+    return new_session
+
+def get_session():
+    """Process-level pooled session shared by all data services across warm invocations."""
+    global session
+    if session is None:
+        with session_lock:
+            if session is None:
+                session = build_session()
+                logging.info("Created shared HTTP session")
+    return session
+
+def get_connection_stats():
+    return stats.snapshot()
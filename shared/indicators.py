@@ -0,0 +1,86 @@
+import numpy as np
+
+DEFAULT_PERIOD = 14
+MOMENTUM_LOOKBACK = 24
+VOLUME_LOOKBACK = 48
+
+# Default gate thresholds: a coin is "flat" only if it is below all of them
+DEFAULT_GATE_THRESHOLDS = {
+    "GATE_MIN_VOLATILITY_PCT": 0.3,
+    "GATE_MIN_MOMENTUM_PCT": 1.5,
+    "GATE_MIN_ATR_PCT": 0.5,
+    "GATE_MIN_VOLUME_Z": 2.0,
+    "GATE_RSI_BAND": 30,  # RSI outside 20-80 always goes to the LLM
+}
+
+def compute_indicators(klines, period=DEFAULT_PERIOD):
+    """Volatility, momentum, RSI, ATR and volume z-score from [[t, o, h, l, c, v], ...] rows.
+
+    All values are computed on NumPy arrays over the whole window. Returns None when
+    there are not enough candles.
+    """
+    data = np.asarray(klines, dtype=np.float64)
+    if data.ndim != 2 or data.shape[0] < period + 2 or data.shape[1] < 5:
+        return None
+    high, low, close = data[:, 2], data[:, 3], data[:, 4]
+    last = close[-1]
+
+    log_returns = np.diff(np.log(close))
+    volatility_pct = float(np.std(log_returns[-MOMENTUM_LOOKBACK:]) * 100)
+
+    lookback = min(MOMENTUM_LOOKBACK, len(close) - 1)
+    momentum_pct = float((last / close[-1 - lookback] - 1) * 100)
+
+    changes = np.diff(close)[-period:]
+    gains = changes.clip(min=0).mean()
+    losses = (-changes).clip(min=0).mean()
+    rsi = 100.0 if losses == 0 else float(100 - 100 / (1 + gains / losses))
+
+    prev_close = close[:-1]
+    true_range = np.maximum.reduce([
+        high[1:] - low[1:],
+        np.abs(high[1:] - prev_close),
+        np.abs(low[1:] - prev_close)
+    ])
+    atr_pct = float(true_range[-period:].mean() / last * 100)
+
+    volume_z = 0.0
+    if data.shape[1] >= 6:
+        volume = data[:, 5]
+        history = volume[-VOLUME_LOOKBACK - 1:-1]
+        std = history.std()
+        volume_z = float((volume[-1] - history.mean()) / std) if std > 0 else 0.0
+
+    return {
+        "volatility_pct": round(volatility_pct, 3),
+        "momentum_pct": round(momentum_pct, 3),
+        "rsi": round(rsi, 1),
+        "atr_pct": round(atr_pct, 3),
+        "volume_z": round(volume_z, 2)
+    }
+
+def is_flat(indicators, settings=None):
+    """True when every indicator is inside its threshold, i.e. the LLM call can be skipped."""
+    if indicators is None:
+        return False
+    settings = settings or {}
+    limit = lambda key: float(settings.get(key, DEFAULT_GATE_THRESHOLDS[key]))
+    return (
+        indicators["volatility_pct"] < limit("GATE_MIN_VOLATILITY_PCT")
+        and abs(indicators["momentum_pct"]) < limit("GATE_MIN_MOMENTUM_PCT")
+        and indicators["atr_pct"] < limit("GATE_MIN_ATR_PCT")
+        and abs(indicators["volume_z"]) < limit("GATE_MIN_VOLUME_Z")
+        and abs(indicators["rsi"] - 50) < limit("GATE_RSI_BAND")
+    )
+
+def format_indicators(indicators):
+    """Compact one-line feature summary for prompts."""
+    if indicators is None:
+        return "n/a"
+    return (
+        f"volatility={indicators['volatility_pct']:.2f}% "
+        f"momentum_24={indicators['momentum_pct']:+.2f}% "
+        f"RSI14={indicators['rsi']:.0f} "
+        f"ATR14={indicators['atr_pct']:.2f}% "
+        f"volume_z={indicators['volume_z']:+.1f}"
+    )
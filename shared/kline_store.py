@@ -0,0 +1,159 @@
+import os
+import logging
+import sqlite3
+import tempfile
+import threading
+import time
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+}
+
+# Skip the delta request if the same series was synced this recently
+DEFAULT_MIN_SYNC_INTERVAL = 60
+
+class KlineStore:
+    """Persistent SQLite store of Binance klines keyed by (symbol, interval).
+
+    After the first download only candles newer than the last stored open time are
+    fetched, and any trailing window can be served locally (also usable for backtests).
+    """
+    def __init__(self, path=None, min_sync_interval=DEFAULT_MIN_SYNC_INTERVAL):
+        self.path = path or os.getenv(
+            "KLINE_STORE_PATH",
+            os.path.join(tempfile.gettempdir(), "binance_klines.sqlite3")
+        )
+        self.min_sync_interval = min_sync_interval
+        self.lock = threading.Lock()
+        self.synced_at = {}  # (symbol, interval) -> time.time() of the last successful sync
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS klines (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    open_time INTEGER NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    PRIMARY KEY (symbol, interval, open_time)
+                ) WITHOUT ROWID"""
+            )
+            self.conn.commit()
+
+    def last_open_time(self, symbol, interval):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MAX(open_time) FROM klines WHERE symbol = ? AND interval = ?",
+                (symbol, interval)
+            ).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, symbol, interval, klines):
+        """Insert or replace raw Binance klines ([open_time, o, h, l, c, v, ...])."""
+        rows = [
+            (symbol, interval, int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]))
+            for k in klines
+        ]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO klines VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+        return len(rows)
+
+    def get_window(self, symbol, interval, limit=None, start_time=None, end_time=None, include_volume=False):
+        """Return candles in ascending order as [open_time, o, h, l, c(, v)].
+
+        With `limit`, only the trailing `limit` candles (within the optional time range) are returned.
+        """
+        columns = "open_time, open, high, low, close" + (", volume" if include_volume else "")
+        query = f"SELECT {columns} FROM klines WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if start_time is not None:
+            query += " AND open_time >= ?"
+            params.append(int(start_time))
+        if end_time is not None:
+            query += " AND open_time <= ?"
+            params.append(int(end_time))
+        query += " ORDER BY open_time DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        rows.reverse()
+        return [list(r) for r in rows]
+
+    def sync(self, client, symbol, interval, limit):
+        """Bring the stored series up to date, fetching only what is missing."""
+        key = (symbol, interval)
+        if time.time() - self.synced_at.get(key, 0) < self.min_sync_interval:
+            return 0
+
+        step = INTERVAL_MS[interval]
+        window_start = int(time.time() * 1000) - limit * step
+        last = self.last_open_time(symbol, interval)
+
+        if last is None or last < window_start:
+            klines = client.get_klines(symbol=symbol, interval=interval, limit=limit)
+        else:
+            # Re-fetch the last stored candle too: it was probably still open when stored
+            klines = client.get_klines(symbol=symbol, interval=interval, startTime=last, limit=1000)
+
+        count = self.upsert(symbol, interval, klines)
+        self.synced_at[key] = time.time()
+        logging.debug(f"Synced {count} {interval} klines for {symbol} (last stored: {last})")
+        return count
+
+    def missing_ranges(self, symbol, interval, start_time):
+        """[(start, stop)) open-time ranges without candles from `start_time` (ms) to the last stored candle.
+
+        Covers the stretch before the first stored candle and every hole inside the stored
+        history (missed syncs, outages). With nothing stored, the range runs up to now.
+        """
+        step = INTERVAL_MS[interval]
+        start_time = int(start_time)
+        with self.lock:
+            first = self.conn.execute(
+                "SELECT MIN(open_time) FROM klines WHERE symbol = ? AND interval = ? AND open_time >= ?",
+                (symbol, interval, start_time)
+            ).fetchone()[0]
+            holes = self.conn.execute(
+                """SELECT open_time, next_open FROM (
+                    SELECT open_time, LEAD(open_time) OVER (ORDER BY open_time) AS next_open
+                    FROM klines WHERE symbol = ? AND interval = ? AND open_time >= ?
+                ) WHERE next_open - open_time > ?""",
+                (symbol, interval, start_time, step)
+            ).fetchall()
+        if first is None:
+            return [(start_time, int(time.time() * 1000))]
+        ranges = [(start_time, first)] if first > start_time else []
+        ranges.extend((open_time + step, next_open) for open_time, next_open in holes)
+        return ranges
+
+    def backfill(self, client, symbol, interval, start_time):
+        """Page through history from `start_time` (ms) in 1000-candle requests, fetching only missing candles."""
+        step = INTERVAL_MS[interval]
+        total = 0
+        for cursor, stop in self.missing_ranges(symbol, interval, start_time):
+            while cursor < stop:
+                klines = client.get_klines(symbol=symbol, interval=interval, startTime=cursor, endTime=stop - 1, limit=1000)
+                if not klines:
+                    break
+                total += self.upsert(symbol, interval, klines)
+                cursor = int(klines[-1][0]) + step
+        logging.info(f"Backfilled {total} {interval} klines for {symbol}")
+        return total
+
+kline_store = None
+
+def get_kline_store():
+    """Process-level store reused across warm invocations."""
+    global kline_store
+    if kline_store is None:
+        kline_store = KlineStore()
+    return kline_store
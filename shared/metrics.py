@@ -0,0 +1,153 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+current_span = ContextVar("current_span", default=None)
+
+class Span:
+    """One timed stage. Counters (requests, RU, tokens...) are charged to the innermost span."""
+    def __init__(self, name, parent, recorder):
+        self.name = name
+        self.parent = parent
+        self.recorder = recorder
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.counters = {}
+
+    def add(self, counter, amount=1):
+        with self.recorder.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    @property
+    def end_ns(self):
+        return self.start_ns + int((self.duration or 0) * 1e9)
+
+class CycleRecorder:
+    """Collects the finished spans of one trading cycle."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = []
+
+    def finish(self, span):
+        span.duration = time.perf_counter() - span.started
+        with self.lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """One record per cycle: totals plus per-stage count, busy time, wall time and counters.
+
+        Per-coin stages run on several threads, so their summed `duration_seconds` can
+        exceed `wall_seconds` (first start to last end).
+        """
+        with self.lock:
+            spans = list(self.spans)
+        root = next((s for s in spans if s.parent is None), None)
+        totals, stages = {}, {}
+        for s in spans:
+            for counter, amount in s.counters.items():
+                totals[counter] = totals.get(counter, 0) + amount
+            if s is root:
+                continue
+            stage = stages.setdefault(s.name, {"count": 0, "duration_seconds": 0.0, "start_ns": s.start_ns, "end_ns": s.end_ns})
+            stage["count"] += 1
+            stage["duration_seconds"] += s.duration
+            stage["start_ns"] = min(stage["start_ns"], s.start_ns)
+            stage["end_ns"] = max(stage["end_ns"], s.end_ns)
+            for counter, amount in s.counters.items():
+                stage[counter] = stage.get(counter, 0) + amount
+        for stage in stages.values():
+            stage["wall_seconds"] = (stage.pop("end_ns") - stage.pop("start_ns")) / 1e9
+        return rounded({
+            "cycle": root.name if root else None,
+            "duration_seconds": root.duration if root else None,
+            "totals": totals,
+            "stages": stages
+        })
+
+def rounded(value):
+    if isinstance(value, float):
+        return round(value, 4)
+    if isinstance(value, dict):
+        return {k: rounded(v) for k, v in value.items()}
+    return value
+
+@contextmanager
+def cycle(name="trading_cycle"):
+    """Root span of a cycle; yields the recorder holding every span finished inside it."""
+    recorder = CycleRecorder()
+    root = Span(name, None, recorder)
+    token = current_span.set(root)
+    try:
+        yield recorder
+    finally:
+        current_span.reset(token)
+        recorder.finish(root)
+
+@contextmanager
+def span(name):
+    """Time a stage as a child of the current span. A no-op outside a cycle."""
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent, parent.recorder)
+    token = current_span.set(child)
+    try:
+        yield child
+    finally:
+        current_span.reset(token)
+        parent.recorder.finish(child)
+
+def record(counter, amount=1):
+    """Charge `amount` of `counter` to the current span, if any."""
+    active = current_span.get()
+    if active is not None:
+        active.add(counter, amount)
+
+def submit(executor, fn, *args, **kwargs):
+    """executor.submit that keeps the caller's current span for the worker thread."""
+    return executor.submit(copy_context().run, fn, *args, **kwargs)
+
+def record_cosmos_response(response):
+    """azure-core raw_response_hook: count the request and its RU charge."""
+    try:
+        record("cosmos_requests")
+        charge = response.http_response.headers.get("x-ms-request-charge")
+        if charge:
+            record("cosmos_ru", float(charge))
+    except Exception as e:
+        logging.debug(f"Could not record Cosmos response metrics: {e}")
+
+def log_summary(recorder):
+    summary = recorder.summary()
+    logging.info(f"Cycle metrics: {json.dumps(summary)}")
+    return summary
+
+def export_otel(recorder):
+    """Replay the recorded spans through the OpenTelemetry tracer, if the API is installed.
+
+    Spans go to whatever tracer provider/exporter the host configured (a no-op otherwise).
+    """
+    if otel_trace is None:
+        logging.warning("opentelemetry is not installed; skipping metrics export")
+        return False
+    tracer = otel_trace.get_tracer("crypto_bot.trading_cycle")
+    exported = {}
+    with recorder.lock:
+        spans = sorted(recorder.spans, key=lambda s: s.start_ns)
+    for s in spans:
+        parent = exported.get(s.parent)
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        exported[s] = tracer.start_span(s.name, context=context, start_time=s.start_ns, attributes=dict(s.counters))
+    for s, otel_span in exported.items():
+        otel_span.end(end_time=s.end_ns)
+    return True
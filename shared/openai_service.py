@@ -1,9 +1,280 @@
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 import os
+import re
+import math
+import hashlib
 import logging
 import json
+import threading
+import time
+from collections import OrderedDict
+from . import metrics
 
 client = None
+rate_limiter = None
+signal_cache = None
+
+# Groq free-tier defaults for llama-3.1-8b-instant
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_TOKENS_PER_MINUTE = 6000
+MAX_ATTEMPTS = 3
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+DEFAULT_SIGNAL_CACHE_TTL = 3600
+DEFAULT_SIGNAL_CACHE_SIZE = 512
+
+class RateLimiter:
+    """Token-bucket limiter shared by all LLM calls.
+
+    Tracks a requests/min and a tokens/min bucket, tightens them from the provider's
+    x-ratelimit-* response headers and backs off exponentially on 429s. Callers only
+    block when a budget is actually exhausted.
+    """
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE):
+        self.lock = threading.Lock()
+        self.requests_per_minute = float(requests_per_minute)
+        self.tokens_per_minute = float(tokens_per_minute)
+        self.request_budget = self.requests_per_minute
+        self.token_budget = self.tokens_per_minute
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff_seconds = 0.0
+
+    def configure(self, requests_per_minute, tokens_per_minute):
+        with self.lock:
+            self.requests_per_minute = float(requests_per_minute)
+            self.tokens_per_minute = float(tokens_per_minute)
+            self.request_budget = min(self.request_budget, self.requests_per_minute)
+            self.token_budget = min(self.token_budget, self.tokens_per_minute)
+
+    def _refill(self, now):
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.request_budget = min(self.requests_per_minute, self.request_budget + elapsed * self.requests_per_minute / 60)
+        self.token_budget = min(self.tokens_per_minute, self.token_budget + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_time(self, now, tokens):
+        """Seconds until a request of `tokens` fits in both buckets (0 if it fits now)."""
+        wait = max(0.0, self.blocked_until - now)
+        if self.request_budget < 1:
+            wait = max(wait, (1 - self.request_budget) * 60 / self.requests_per_minute)
+        # A single request larger than the whole bucket only waits for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        if self.token_budget < tokens:
+            wait = max(wait, (tokens - self.token_budget) * 60 / self.tokens_per_minute)
+        return wait
+
+    def acquire(self, tokens):
+        """Block until the budgets allow one request of roughly `tokens` tokens, then reserve it."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self.request_budget -= 1
+                    self.token_budget -= tokens
+                    if waited:
+                        logging.info(f"Rate limiter delayed LLM call by {waited:.1f}s")
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def record_usage(self, reserved_tokens, used_tokens):
+        """Correct the token bucket once the real usage of a request is known."""
+        if used_tokens is None:
+            return
+        with self.lock:
+            self.token_budget = min(self.tokens_per_minute, self.token_budget + reserved_tokens - used_tokens)
+
+    def update_from_headers(self, headers):
+        """Sync the buckets with x-ratelimit-remaining-* / x-ratelimit-reset-* headers."""
+        if not headers:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            for kind in ("requests", "tokens"):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is None:
+                    continue
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+                if kind == "requests":
+                    self.request_budget = min(self.request_budget, remaining)
+                else:
+                    self.token_budget = min(self.token_budget, remaining)
+                if remaining <= 0:
+                    reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    self.blocked_until = max(self.blocked_until, now + reset)
+            # Successful response: clear adaptive backoff
+            self.backoff_seconds = 0.0
+
+    def on_rate_limited(self, headers=None):
+        """Handle a 429: honour retry-after and grow the backoff for consecutive failures."""
+        with self.lock:
+            self.backoff_seconds = min(60.0, max(2.0, self.backoff_seconds * 2))
+            delay = self.backoff_seconds
+            if headers:
+                retry_after = parse_reset_duration(headers.get("retry-after"))
+                delay = max(delay, retry_after)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            logging.warning(f"LLM rate limited (429). Backing off {delay:.1f}s")
+            return delay
+
+def parse_reset_duration(value):
+    """Parse rate-limit reset values such as '7.66s', '2m59.56s', '120ms' or '12'."""
+    if not value:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        amount = float(amount)
+        total += {"h": 3600, "m": 60, "s": 1, "ms": 0.001}[unit] * amount
+    return total
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+class SignalCache:
+    """TTL + LRU cache of trading signals so unchanged market states cost no LLM call.
+
+    Keys are hashes of the rendered prompt or of a quantized market state. Entries can
+    optionally be persisted to a JSON file (SIGNAL_CACHE_PATH) across invocations.
+    """
+    def __init__(self, max_entries=DEFAULT_SIGNAL_CACHE_SIZE, ttl_seconds=DEFAULT_SIGNAL_CACHE_TTL, path=None):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.entries = OrderedDict()  # key -> (expires_at, signal)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self.load()
+
+    @staticmethod
+    def key_for(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key, signal):
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl_seconds, dict(signal))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self.entries)
+            }
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            now = time.time()
+            with self.lock:
+                for key, expires_at, signal in data:
+                    if expires_at > now:
+                        self.entries[key] = (expires_at, signal)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Could not load signal cache {self.path}: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with self.lock:
+                data = [[key, expires_at, signal] for key, (expires_at, signal) in self.entries.items()]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.warning(f"Could not save signal cache {self.path}: {e}")
+
+def quantize_bucket(value, step):
+    return int(math.floor(value / step + 0.5))
+
+def quantized_market_key(coin_id, current_price, ohlc, holding_pl=None, step_pct=0.5, prompt_template="", features=""):
+    """Cache key from a coarse market state instead of the exact prompt.
+
+    Price is bucketed on a log grid, and the trend is reduced to bucketed 30-candle and
+    5-candle returns plus the 30-candle range, all in `step_pct` percent steps. Holding
+    P/L (None when not holding) is bucketed the same way. The prompt template and
+    feature set are hashed in, so editing either invalidates cached signals.
+    """
+    step = step_pct / 100
+    closes = [c[4] for c in ohlc[-30:]] if ohlc else []
+    highs = [c[2] for c in ohlc[-30:]] if ohlc else []
+    lows = [c[3] for c in ohlc[-30:]] if ohlc else []
+    state = [coin_id, quantize_bucket(math.log(current_price), math.log(1 + step))]
+    if closes:
+        state.append(quantize_bucket(current_price / closes[0] - 1, step))
+        state.append(quantize_bucket(current_price / closes[-5 if len(closes) >= 5 else 0] - 1, step))
+        state.append(quantize_bucket((max(highs) - min(lows)) / current_price, step))
+    state.append("flat" if holding_pl is None else quantize_bucket(holding_pl / 100, step))
+    state.append(SignalCache.key_for(f"{features}\n{prompt_template}"))
+    return SignalCache.key_for(json.dumps(state))
+
+def get_signal_cache():
+    global signal_cache
+    if signal_cache is None:
+        signal_cache = SignalCache(path=os.getenv("SIGNAL_CACHE_PATH"))
+    return signal_cache
+
+def configure_signal_cache(settings):
+    """Apply SIGNAL_CACHE_TTL / SIGNAL_CACHE_SIZE from the settings document."""
+    cache = get_signal_cache()
+    cache.ttl_seconds = float(settings.get("SIGNAL_CACHE_TTL", DEFAULT_SIGNAL_CACHE_TTL))
+    cache.max_entries = int(settings.get("SIGNAL_CACHE_SIZE", DEFAULT_SIGNAL_CACHE_SIZE))
+    return cache
+
+def get_rate_limiter():
+    global rate_limiter
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+    return rate_limiter
+
+def configure_rate_limiter(settings):
+    """Apply LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE from the settings document."""
+    get_rate_limiter().configure(
+        settings.get("LLM_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE),
+        settings.get("LLM_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE)
+    )
 
 def get_client():
     global client
@@ -14,26 +285,87 @@ def get_client():
             return None
         client = OpenAI(
             api_key=api_key,
-            base_url="https://api.groq.com/openai/v1"
+            base_url=GROQ_BASE_URL,
+            timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", 30)),
+            max_retries=0  # 429 retries are handled by the rate limiter
         )
     return client
 
-def get_trading_signal(prompt):
+def create_completion(current_client, messages, max_tokens):
+    """Run a chat completion under the shared rate limiter, retrying on 429."""
+    limiter = get_rate_limiter()
+    reserved = sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+
+    for attempt in range(MAX_ATTEMPTS):
+        metrics.record("llm_wait_seconds", limiter.acquire(reserved))
+        metrics.record("llm_requests")
+        try:
+            raw = current_client.chat.completions.with_raw_response.create(
+                model=DEFAULT_MODEL,
+                messages=messages,
+                response_format={"type": "json_object"},
+                max_tokens=max_tokens,
+                temperature=0.0,
+            )
+        except RateLimitError as e:
+            limiter.on_rate_limited(getattr(e.response, "headers", None))
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            continue
+
+        limiter.update_from_headers(raw.headers)
+        response = raw.parse()
+        usage = getattr(response, "usage", None)
+        limiter.record_usage(reserved, getattr(usage, "total_tokens", None))
+        metrics.record("llm_tokens", getattr(usage, "total_tokens", None) or 0)
+        logging.info(
+            f"LLM tokens: prompt={getattr(usage, 'prompt_tokens', None)} "
+            f"completion={getattr(usage, 'completion_tokens', None)} (estimated prompt={reserved - max_tokens})"
+        )
+        return response
+
+SIGNAL_FORMAT_INSTRUCTION = "Decide now. You MUST output valid JSON only. Format: {\"action\": \"BUY\", \"target_profit_pct\": 10} or {\"action\": \"SELL\"} or {\"action\": \"HOLD\"}. Give target_profit_pct 3-20 if action is BUY."
+BATCH_FORMAT_INSTRUCTION = "Decide now for every coin above. You MUST output valid JSON only: one object keyed by the coin ids exactly as given, e.g. {\"bitcoin\": {\"action\": \"BUY\", \"target_profit_pct\": 10}, \"solana\": {\"action\": \"HOLD\"}}. Each action is BUY, SELL or HOLD; give target_profit_pct 3-20 if action is BUY."
+# Completion budget per coin in a batched request
+BATCH_TOKENS_PER_COIN = 30
+
+def normalize_signal(data):
+    """Validate one parsed LLM answer into {"action": BUY/SELL/HOLD, "target": pct or None}.
+
+    Raises ValueError if `data` is not a JSON object.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Signal is not an object: {data!r}")
+    action = str(data.get("action", "HOLD")).strip().upper()
+    if action not in ["BUY", "SELL", "HOLD"]:
+        logging.warning(f"Unexpected action: '{action}' → defaulting to HOLD")
+        action = "HOLD"
+    return {"action": action, "target": data.get("target_profit_pct")}
+
+def get_trading_signal(prompt, cache_key=None, use_cache=True):
+    """Ask the LLM for BUY/SELL/HOLD. Parsed signals are cached under `cache_key`
+    (default: hash of the prompt); fallback HOLDs after errors are never cached."""
+    cache = get_signal_cache() if use_cache else None
+    if cache is not None:
+        cache_key = cache_key or SignalCache.key_for(prompt)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logging.info(f"Signal cache hit: {cached}")
+            return cached
+
     try:
         current_client = get_client()
         if not current_client:
             logging.warning("No OpenAI client available (missing API key). Defaulting to HOLD.")
-            return "HOLD"
+            return {"action": "HOLD"}
 
-        response = current_client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        response = create_completion(
+            current_client,
             messages=[
                 {"role": "system", "content": prompt},
-                {"role": "user", "content": "Decide now. You MUST output valid JSON only. Format: {\"action\": \"BUY\", \"target_profit_pct\": 10} or {\"action\": \"SELL\"} or {\"action\": \"HOLD\"}. Give target_profit_pct 3-20 if action is BUY."}
+                {"role": "user", "content": SIGNAL_FORMAT_INSTRUCTION}
             ],
-            response_format={"type": "json_object"},
             max_tokens=60,
-            temperature=0.0,
         )
 
         content = response.choices[0].message.content
@@ -42,16 +374,11 @@ def get_trading_signal(prompt):
             return {"action": "HOLD"}
 
         try:
-            data = json.loads(content)
-            action = data.get("action", "HOLD").strip().upper()
-            target = data.get("target_profit_pct")
-            
-            if action not in ["BUY", "SELL", "HOLD"]:
-                logging.warning(f"Unexpected action: '{action}' → defaulting to HOLD")
-                action = "HOLD"
-                
-            return {"action": action, "target": target}
-        except json.JSONDecodeError:
+            signal = normalize_signal(json.loads(content))
+            if cache is not None:
+                cache.put(cache_key, signal)
+            return signal
+        except (json.JSONDecodeError, ValueError):
             logging.error(f"Failed to parse JSON: {content}")
             return {"action": "HOLD"}
 
@@ -59,6 +386,68 @@ def get_trading_signal(prompt):
         logging.error(f"Groq API error: {e}")
         return {"action": "HOLD"}
 
+def get_trading_signals_batch(items, system_prompt, batch_size=10, use_cache=True):
+    """Evaluate several coins per chat completion.
+
+    `items` is a list of {"coin_id", "section", "prompt", "cache_key"}: `section` is the
+    coin's data for the batched request and `prompt` the full single-coin prompt used
+    when the batch answer for that coin is missing or malformed. The shared instructions
+    in `system_prompt` are sent once per batch. Returns {coin_id: signal}.
+    """
+    cache = get_signal_cache() if use_cache else None
+    signals = {}
+    pending = []
+    for item in items:
+        if cache is not None:
+            item["cache_key"] = item.get("cache_key") or SignalCache.key_for(item["prompt"])
+            cached = cache.get(item["cache_key"])
+            if cached is not None:
+                logging.info(f"Signal cache hit for {item['coin_id']}: {cached}")
+                signals[item["coin_id"]] = cached
+                continue
+        pending.append(item)
+
+    current_client = get_client() if pending else None
+    if pending and not current_client:
+        logging.warning("No OpenAI client available (missing API key). Defaulting to HOLD.")
+        return {**signals, **{item["coin_id"]: {"action": "HOLD"} for item in pending}}
+
+    batch_size = max(1, int(batch_size))
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        answers = {}
+        try:
+            sections = "\n\n".join(f"### {item['coin_id']}\n{item['section']}" for item in chunk)
+            response = create_completion(
+                current_client,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"{sections}\n\n{BATCH_FORMAT_INSTRUCTION}"}
+                ],
+                max_tokens=BATCH_TOKENS_PER_COIN * len(chunk) + 20,
+            )
+            content = response.choices[0].message.content
+            answers = json.loads(content) if content and content.strip() else {}
+            if not isinstance(answers, dict):
+                raise ValueError(f"Batch response is not an object: {content}")
+        except Exception as e:
+            logging.error(f"Batched signal request failed for {len(chunk)} coins: {e}")
+            answers = {}
+
+        for item in chunk:
+            coin_id = item["coin_id"]
+            try:
+                signal = normalize_signal(answers[coin_id])
+            except (KeyError, ValueError):
+                logging.warning(f"No valid batched signal for {coin_id}, falling back to a single request")
+                signals[coin_id] = get_trading_signal(item["prompt"], cache_key=item.get("cache_key"), use_cache=use_cache)
+                continue
+            if cache is not None:
+                cache.put(item["cache_key"], signal)
+            signals[coin_id] = signal
+
+    return signals
+
 def evaluate_holding_target(prompt):
     try:
         current_client = get_client()
@@ -66,15 +455,13 @@ def evaluate_holding_target(prompt):
             logging.warning("No OpenAI client available. Defaulting to KEEP.")
             return {"action": "KEEP"}
 
-        response = current_client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        response = create_completion(
+            current_client,
             messages=[
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": "Review the holding target profit. You MUST output valid JSON only. Format: {\"action\": \"KEEP\"} or {\"action\": \"ADJUST\", \"new_target_pct\": 5}."}
             ],
-            response_format={"type": "json_object"},
             max_tokens=60,
-            temperature=0.0,
         )
 
         content = response.choices[0].message.content
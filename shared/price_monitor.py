@@ -0,0 +1,144 @@
+import os
+import json
+import logging
+import time
+from websockets.sync.client import connect
+from .trading_service import TradingService
+from .coingecko_service import BinanceService
+
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443/stream"
+DEFAULT_WINDOW_SECONDS = 55
+
+class BinanceTickerFeed:
+    """Live last prices from Binance's combined miniTicker websocket stream."""
+    def __init__(self, symbols, url=None):
+        self.symbols = list(symbols)
+        self.url = url or os.getenv("BINANCE_STREAM_URL", BINANCE_STREAM_URL)
+
+    def ticks(self, deadline):
+        """Yield (symbol, price) until the monotonic `deadline`."""
+        streams = "/".join(f"{s.lower()}@miniTicker" for s in self.symbols)
+        with connect(f"{self.url}?streams={streams}", open_timeout=10) as ws:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    message = json.loads(ws.recv(timeout=remaining))
+                except TimeoutError:
+                    return
+                data = message.get("data", message)
+                if "s" in data and "c" in data:
+                    yield data["s"], float(data["c"])
+
+class ReplayFeed:
+    """Replays recorded (symbol, price) ticks, optionally `interval` seconds apart."""
+    def __init__(self, ticks, interval=0.0):
+        self.recorded = list(ticks)
+        self.interval = interval
+
+    @classmethod
+    def from_file(cls, path, interval=0.0):
+        """Load ticks from a JSON-lines file of {"s": symbol, "c": price} records."""
+        with open(path, "r") as f:
+            return cls([(r["s"], float(r["c"])) for r in map(json.loads, f) if r], interval)
+
+    def ticks(self, deadline):
+        for symbol, price in self.recorded:
+            if time.monotonic() >= deadline:
+                return
+            yield symbol, price
+            if self.interval:
+                time.sleep(self.interval)
+
+def sell_thresholds(trader, coin_id):
+    """(upper, lower) prices at which check_sell_conditions would sell a holding."""
+    holding = trader.portfolio["holdings"][coin_id]
+    entry_price = holding["entry_price"]
+    upper = entry_price * (1 + trader.take_profit)
+    target_pct = holding.get("target_profit_pct")
+    if target_pct is not None:
+        try:
+            upper = min(upper, entry_price * (1 + float(target_pct) / 100))
+        except (ValueError, TypeError):
+            pass
+    return upper, entry_price * (1 - trader.stop_loss)
+
+class PriceMonitor:
+    """Watches held coins tick by tick and sells as soon as TP/SL is crossed.
+
+    Thresholds are kept in memory, so a tick costs two comparisons; Cosmos is only
+    touched when a sell actually happens. Runs independently of the LLM cycle.
+    """
+    def __init__(self, trader, binance, feed_factory=None):
+        self.trader = trader
+        self.binance = binance
+        self.feed_factory = feed_factory or BinanceTickerFeed
+        self.watched = {}     # symbol -> coin_id
+        self.thresholds = {}  # coin_id -> (upper, lower)
+        self.sells = []
+
+    def load_thresholds(self):
+        self.watched.clear()
+        self.thresholds.clear()
+        for coin_id in self.trader.portfolio["holdings"]:
+            symbol = self.binance._get_symbol(coin_id)
+            if symbol:
+                self.watched[symbol] = coin_id
+                self.thresholds[coin_id] = sell_thresholds(self.trader, coin_id)
+        return len(self.watched)
+
+    def on_tick(self, symbol, price, received_at=None):
+        coin_id = self.watched.get(symbol)
+        if coin_id is None:
+            return False
+        upper, lower = self.thresholds[coin_id]
+        if lower < price < upper:
+            return False
+        return self.sell(coin_id, price, received_at or time.monotonic())
+
+    def sell(self, coin_id, price, received_at):
+        # A conflicting portfolio write reloads the portfolio; re-check against it once
+        for _ in range(2):
+            reason = self.trader.check_sell_conditions(coin_id, price)
+            if not reason:
+                break
+            if self.trader.simulate_sell(coin_id, price, f"{reason} [price monitor]"):
+                latency = time.monotonic() - received_at
+                logging.info(f"Price monitor sold {coin_id} at ${price} ({reason}) {latency * 1000:.0f}ms after the tick")
+                self.sells.append({"coin": coin_id, "price": price, "reason": reason, "latency_seconds": latency})
+                break
+        # Sold, or the thresholds no longer apply to the (reloaded) portfolio
+        self.load_thresholds()
+        return coin_id not in self.trader.portfolio["holdings"]
+
+    def run(self, window_seconds=DEFAULT_WINDOW_SECONDS):
+        """Watch held coins for `window_seconds`, or until nothing is held anymore."""
+        if not self.load_thresholds():
+            logging.info("Price monitor: no holdings to watch")
+            return self.sells
+        logging.info(f"Price monitor watching {list(self.watched)} for {window_seconds}s")
+        deadline = time.monotonic() + window_seconds
+        feed = self.feed_factory(list(self.watched))
+        for symbol, price in feed.ticks(deadline):
+            self.on_tick(symbol, price)
+            if not self.watched:
+                break
+        return self.sells
+
+def run_price_monitor(window_seconds=None, feed_factory=None):
+    # The timer fires every minute: the app setting gates it before any Cosmos read
+    if os.getenv("PRICE_MONITOR_ENABLED", "false").lower() != "true":
+        logging.debug("Price monitor disabled (PRICE_MONITOR_ENABLED app setting).")
+        return []
+    trader = TradingService()
+    if not trader.settings.get("PRICE_MONITOR_ENABLED", False):
+        logging.info("Price monitor disabled in settings.")
+        return []
+    window_seconds = window_seconds or float(trader.settings.get("PRICE_MONITOR_WINDOW", DEFAULT_WINDOW_SECONDS))
+    monitor = PriceMonitor(trader, BinanceService(), feed_factory)
+    try:
+        return monitor.run(window_seconds)
+    finally:
+        # Sells are written immediately; this only catches a failed write left dirty
+        trader.commit()
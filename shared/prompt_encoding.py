@@ -0,0 +1,57 @@
+import math
+
+ENCODINGS = ("raw", "compact")
+DEFAULT_PCT_DECIMALS = 2
+MAX_PCT_DECIMALS = 3
+
+def tick_decimals(tick_size):
+    """Number of decimals in a Binance tickSize such as 0.00010000."""
+    if not tick_size:
+        return None
+    return max(0, -int(math.floor(math.log10(float(tick_size)) + 1e-9)))
+
+def format_price(price, tick_size=None):
+    decimals = tick_decimals(tick_size)
+    if decimals is None:
+        return f"{price:.6g}"
+    return f"{price:.{decimals}f}"
+
+def pct_decimals(base_price, tick_size=None):
+    """Decimals needed for one tick to show up as a percent change of `base_price`."""
+    if not tick_size or not base_price:
+        return DEFAULT_PCT_DECIMALS
+    tick_pct = float(tick_size) / base_price * 100
+    return min(MAX_PCT_DECIMALS, max(0, math.ceil(-math.log10(tick_pct))))
+
+def encode_ohlc(ohlc, mode="raw", tick_size=None):
+    """Render [[open_time_ms, o, h, l, c], ...] candles for a prompt.
+
+    "raw" is the plain list repr. "compact" gives times in candles relative to the
+    latest one and o/h/l/c as percent changes from the first open, e.g.
+    "base=101.25 (candle 1h) t,o,h,l,c%: -2,+0.00,+0.41,-0.12,+0.30|..."
+    """
+    if mode != "compact" or not ohlc:
+        return str(ohlc)
+
+    base = ohlc[0][1]
+    decimals = pct_decimals(base, tick_size)
+    step_ms = ohlc[-1][0] - ohlc[-2][0] if len(ohlc) > 1 else 3_600_000
+    step_ms = step_ms or 3_600_000
+    last_time = ohlc[-1][0]
+
+    def pct(price):
+        return f"{(price / base - 1) * 100:+.{decimals}f}"
+
+    rows = "|".join(
+        f"{round((row[0] - last_time) / step_ms)}," + ",".join(pct(p) for p in row[1:5])
+        for row in ohlc
+    )
+    return f"base={format_price(base, tick_size)} (candle {interval_label(step_ms)}) t,o,h,l,c%: {rows}"
+
+def interval_label(step_ms):
+    minutes = step_ms // 60_000
+    if minutes % 1440 == 0:
+        return f"{minutes // 1440}d"
+    if minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m"
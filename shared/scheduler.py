@@ -0,0 +1,87 @@
+import logging
+import time
+from datetime import datetime
+from .price_monitor import sell_thresholds
+
+DEFAULT_BUDGET_SECONDS = 480
+
+def threshold_distance(trader, coin_id, price):
+    """Relative distance from `price` to the nearer of the holding's TP/SL prices (0 = at or past one)."""
+    if not price:
+        return 0.0
+    upper, lower = sell_thresholds(trader, coin_id)
+    return max(0.0, min((upper - price) / price, (price - lower) / price))
+
+class CycleScheduler:
+    """Orders a cycle's coins by priority and stops evaluating before the time budget runs out.
+
+    Held coins go first, nearest to their TP/SL first, then coins left unfinished by the
+    previous cycle, then everything else starting from a rotating offset so the same
+    coins do not always end up last. What does not fit is checkpointed for next time.
+    """
+    def __init__(self, budget_seconds=DEFAULT_BUDGET_SECONDS, checkpoint=None, started_at=None, clock=time.monotonic):
+        self.budget_seconds = budget_seconds
+        self.clock = clock
+        self.started_at = started_at if started_at is not None else clock()
+        checkpoint = checkpoint or {}
+        self.rotation = int(checkpoint.get("rotation", 0))
+        self.previous_pending = list(checkpoint.get("pending", []))
+        self.rotation_coins = []
+        self.evaluated = []
+        self.unfinished = []
+        self.seconds_per_coin = 0.0
+
+    def remaining(self):
+        return self.budget_seconds - (self.clock() - self.started_at)
+
+    def plan(self, coins, trader, cg):
+        """Return `coins` in evaluation order."""
+        held = [c for c in coins if c in trader.portfolio["holdings"]]
+        try:
+            held.sort(key=lambda c: threshold_distance(trader, c, cg.get_current_price(c)))
+        except Exception as e:
+            # Priority is an optimization; evaluate held coins in their original order instead
+            logging.warning(f"Could not rank held coins by TP/SL distance: {e}")
+        pending = [c for c in self.previous_pending if c in coins and c not in held]
+        rest = [c for c in coins if c not in held and c not in pending]
+        if rest:
+            offset = self.rotation % len(rest)
+            rest = rest[offset:] + rest[:offset]
+        self.rotation_coins = rest
+        order = held + pending + rest
+        logging.info(f"Scheduler order: {len(held)} held, {len(pending)} resumed, {len(rest)} rotated from offset {self.rotation}")
+        return order
+
+    def run(self, coins, evaluate, wave_size):
+        """Evaluate `coins` in waves of `wave_size` while the next wave still fits the budget.
+
+        `evaluate(batch)` returns {coin_id: evaluation}. The per-coin cost is the slowest
+        wave seen so far, so a wave is only started if it can finish in time.
+        """
+        evaluations = {}
+        wave_size = max(1, wave_size)
+        for i in range(0, len(coins), wave_size):
+            wave = coins[i:i + wave_size]
+            remaining = self.remaining()
+            if remaining <= 0 or (self.evaluated and remaining < self.seconds_per_coin * len(wave)):
+                self.unfinished = coins[i:]
+                logging.warning(
+                    f"Cycle budget reached with {remaining:.1f}s left (~{self.seconds_per_coin:.1f}s/coin): "
+                    f"deferring {len(self.unfinished)} coins to the next cycle"
+                )
+                break
+            started = self.clock()
+            evaluations.update(evaluate(wave))
+            self.seconds_per_coin = max(self.seconds_per_coin, (self.clock() - started) / len(wave))
+            self.evaluated.extend(wave)
+        return evaluations
+
+    def checkpoint(self):
+        """State for the next cycle: resume the unfinished coins and advance the rotation."""
+        done = sum(1 for c in self.rotation_coins if c in self.evaluated)
+        return {
+            "id": "cycle_checkpoint",
+            "rotation": self.rotation + done,
+            "pending": list(self.unfinished),
+            "updated_at": datetime.utcnow().isoformat()
+        }
@@ -0,0 +1,123 @@
+import os
+import logging
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+import numpy as np
+from .backtest import run_backtest
+
+# Arrays attached from shared memory in each worker process
+worker_arrays = {}
+worker_segments = []
+
+def grid_search(take_profits, stop_losses, order_amounts):
+    """Every combination of the given TAKE_PROFIT / STOP_LOSS / ORDER_AMOUNT values."""
+    return [
+        {"take_profit": tp, "stop_loss": sl, "order_amount": amount}
+        for tp, sl, amount in itertools.product(take_profits, stop_losses, order_amounts)
+    ]
+
+def random_search(count, take_profit_range=(2, 30), stop_loss_range=(2, 20), order_amount_range=(10, 200), seed=None):
+    """`count` random combinations drawn uniformly from the given ranges (rounded like the settings)."""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "take_profit": round(float(rng.uniform(*take_profit_range)), 1),
+            "stop_loss": round(float(rng.uniform(*stop_loss_range)), 1),
+            "order_amount": round(float(rng.uniform(*order_amount_range)))
+        }
+        for _ in range(count)
+    ]
+
+def share_array(array):
+    """Copy an array into a new shared memory segment. Returns (segment, descriptor)."""
+    array = np.ascontiguousarray(array)
+    segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    return segment, (segment.name, array.shape, array.dtype.str)
+
+def attach_arrays(descriptors):
+    """Worker initializer: map the parent's shared memory segments without copying."""
+    for key, descriptor in descriptors.items():
+        if descriptor is None:
+            worker_arrays[key] = None
+            continue
+        name, shape, dtype = descriptor
+        # Workers share the parent's resource tracker, so the parent's unlink() cleans up
+        segment = shared_memory.SharedMemory(name=name)
+        worker_segments.append(segment)
+        worker_arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+
+def evaluate_params(params):
+    result = run_backtest(
+        worker_arrays["timestamps"], worker_arrays["prices"],
+        entries=worker_arrays["entries"], targets=worker_arrays["targets"],
+        initial_balance=worker_arrays["initial_balance"][0],
+        record_trades=False, **params
+    )
+    return {**params, **result.stats()}
+
+def rank_results(results, max_drawdown_pct=None, min_trades=0):
+    """Filter by drawdown/trade count, then sort by return (desc), drawdown (asc), trades (desc)."""
+    ranked = [
+        r for r in results
+        if r["trade_count"] >= min_trades and (max_drawdown_pct is None or r["max_drawdown_pct"] <= max_drawdown_pct)
+    ]
+    ranked.sort(key=lambda r: (-r["return_pct"], r["max_drawdown_pct"], -r["trade_count"]))
+    return ranked
+
+def run_sweep(timestamps, prices, param_sets, entries=None, targets=None, initial_balance=1000,
+              max_workers=None, max_drawdown_pct=None, min_trades=0):
+    """Backtest every parameter set in a process pool and return the ranked results.
+
+    Price, entry and target arrays are placed in shared memory once; workers map them
+    instead of receiving a pickled copy per task.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    arrays = {
+        "timestamps": np.asarray(timestamps, dtype=np.int64),
+        "prices": np.asarray(prices, dtype=np.float64),
+        "entries": None if entries is None else np.asarray(entries, dtype=bool),
+        "targets": None if targets is None else np.asarray(targets, dtype=np.float64),
+        "initial_balance": np.array([initial_balance], dtype=np.float64)
+    }
+    segments = []
+    descriptors = {}
+    try:
+        for key, array in arrays.items():
+            if array is None:
+                descriptors[key] = None
+                continue
+            segment, descriptors[key] = share_array(array)
+            segments.append(segment)
+
+        start = datetime.now()
+        chunksize = max(1, len(param_sets) // (max_workers * 8))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=attach_arrays, initargs=(descriptors,)) as executor:
+            results = list(executor.map(evaluate_params, param_sets, chunksize=chunksize))
+        elapsed = (datetime.now() - start).total_seconds()
+        logging.info(f"Swept {len(param_sets)} parameter sets on {max_workers} workers in {elapsed:.1f}s")
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    return rank_results(results, max_drawdown_pct=max_drawdown_pct, min_trades=min_trades)
+
+def to_settings_document(result, base_settings, doc_id="candidate_settings"):
+    """Candidate settings document: the live settings with the swept parameters applied."""
+    candidate = {k: v for k, v in base_settings.items() if not k.startswith("_")}
+    candidate.update({
+        "id": doc_id,
+        "TAKE_PROFIT": result["take_profit"],
+        "STOP_LOSS": result["stop_loss"],
+        "ORDER_AMOUNT": result["order_amount"],
+        "SWEEP_RESULT": {
+            "return_pct": result["return_pct"],
+            "max_drawdown_pct": result["max_drawdown_pct"],
+            "trade_count": result["trade_count"],
+            "generated_at": datetime.utcnow().isoformat()
+        }
+    })
+    return candidate
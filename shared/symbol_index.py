@@ -0,0 +1,124 @@
+import os
+import json
+import logging
+import tempfile
+import threading
+import time
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+# Minimum gap between exchangeInfo downloads after a failure
+RETRY_COOLDOWN_SECONDS = 300
+
+def price_tick_size(symbol_info):
+    """tickSize of the symbol's PRICE_FILTER as a float, or None."""
+    for f in symbol_info.get("filters", []):
+        if f.get("filterType") == "PRICE_FILTER" and float(f.get("tickSize", 0)) > 0:
+            return float(f["tickSize"])
+    return None
+
+class SymbolIndex:
+    """Binance symbol index built from a single exchangeInfo download.
+
+    Holds base/quote assets and trading status for every symbol, cached on local disk
+    with a TTL so warm and cold invocations alike resolve coins without network calls.
+    """
+    def __init__(self, path=None, ttl_seconds=None):
+        self.path = path or os.getenv(
+            "SYMBOL_INDEX_PATH",
+            os.path.join(tempfile.gettempdir(), "binance_symbol_index.json")
+        )
+        self.ttl_seconds = float(ttl_seconds or os.getenv("SYMBOL_INDEX_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        self.lock = threading.Lock()
+        self.symbols = {}   # symbol -> {"base": ..., "quote": ..., "status": ..., "tick_size": ...}
+        self.by_pair = {}   # (base, quote) -> symbol
+        self.loaded_at = 0.0
+        self.last_attempt = 0.0
+
+    @property
+    def available(self):
+        return bool(self.symbols)
+
+    def is_fresh(self):
+        return self.available and time.time() - self.loaded_at < self.ttl_seconds
+
+    def _set_symbols(self, symbols, loaded_at):
+        self.symbols = symbols
+        self.by_pair = {(info["base"], info["quote"]): symbol for symbol, info in symbols.items()}
+        self.loaded_at = loaded_at
+
+    def _load_from_disk(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self._set_symbols(data["symbols"], float(data["loaded_at"]))
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logging.warning(f"Could not read symbol index cache {self.path}: {e}")
+            return False
+
+    def _save_to_disk(self):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"loaded_at": self.loaded_at, "symbols": self.symbols}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.warning(f"Could not write symbol index cache {self.path}: {e}")
+
+    def refresh(self, client):
+        """Download exchangeInfo once and rebuild the index."""
+        info = client.get_exchange_info()
+        symbols = {
+            s["symbol"]: {
+                "base": s["baseAsset"], "quote": s["quoteAsset"], "status": s["status"],
+                "tick_size": price_tick_size(s)
+            }
+            for s in info.get("symbols", [])
+        }
+        self._set_symbols(symbols, time.time())
+        self._save_to_disk()
+        logging.info(f"Symbol index refreshed from exchangeInfo ({len(symbols)} symbols)")
+
+    def ensure_loaded(self, client):
+        """Load the index from memory, disk or exchangeInfo (in that order)."""
+        if self.is_fresh():
+            return self.available
+        with self.lock:
+            if self.is_fresh():
+                return True
+            if self._load_from_disk() and self.is_fresh():
+                return True
+            if time.time() - self.last_attempt < RETRY_COOLDOWN_SECONDS:
+                return self.available
+            self.last_attempt = time.time()
+            try:
+                self.refresh(client)
+            except Exception as e:
+                # A stale index is still better than probing every coin
+                logging.error(f"Failed to download exchangeInfo: {e}")
+        return self.available
+
+    def lookup(self, coin_id, quote="USDT"):
+        """Return the trading symbol for a coin, or None if it is not listed or not trading."""
+        symbol = self.by_pair.get((coin_id.upper(), quote))
+        if symbol and self.symbols[symbol]["status"] == "TRADING":
+            return symbol
+        return None
+
+    def get(self, symbol):
+        return self.symbols.get(symbol)
+
+    def tick_size(self, symbol):
+        # Indexes cached before tick sizes were recorded simply have no entry
+        return (self.symbols.get(symbol) or {}).get("tick_size")
+
+symbol_index = None
+
+def get_symbol_index():
+    """Process-level index shared by every BinanceService across warm invocations."""
+    global symbol_index
+    if symbol_index is None:
+        symbol_index = SymbolIndex()
+    return symbol_index
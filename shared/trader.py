@@ -1,216 +1,529 @@
+import json
 import logging
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from shared import metrics
 from shared.trading_service import TradingService
 from shared.coingecko_service import BinanceService, CoinGeckoDiscovery
-from shared.openai_service import get_trading_signal, evaluate_holding_target
+from shared.http_session import get_connection_stats
+from shared.indicators import compute_indicators, is_flat, format_indicators
+from shared.prompt_encoding import encode_ohlc
+from shared.async_llm import get_trading_signals_async
+from shared.scheduler import CycleScheduler
+from shared import fanout
+from shared.openai_service import (
+    get_trading_signal, get_trading_signals_batch, evaluate_holding_target, configure_rate_limiter,
+    configure_signal_cache, quantized_market_key, estimate_tokens
+)
 
-def run_trading_cycle():
+def prepare_coin(trader, cg, coin_id, prompt_template, min_volume):
+    """Fetch market data for one coin and build its LLM request.
+
+    Runs on a worker thread, so it only reads the portfolio. Returns None if the coin is
+    skipped. The returned "signal" is already set when the indicator gate decided HOLD.
+    """
+    market_data = cg.get_market_data(coin_id)
+    if not market_data:
+        logging.warning(f"Skipping {coin_id}: No market data found")
+        return None
+        
+    if market_data.get("total_volume", 0) < min_volume:
+        logging.info(f"Skipping {coin_id}: Low volume ({market_data.get('total_volume', 0)})")
+        return None
+    
+    klines = cg.get_ohlc(coin_id, include_volume=True)
+    if not klines:
+        logging.warning(f"Skipping {coin_id}: No OHLC data")
+        return None
+    ohlc = [k[:5] for k in klines]
+    
+    current_price = cg.get_current_price(coin_id)
+    if current_price == 0:
+        logging.warning(f"Skipping {coin_id}: Invalid price")
+        return None
+
+    # Cheap indicator gate: flat markets get an immediate HOLD without an LLM call
+    indicators = compute_indicators(klines)
+    if trader.settings.get("INDICATOR_GATE_ENABLED", True) and is_flat(indicators, trader.settings):
+        logging.info(f"Signal for {coin_id}: HOLD (indicator gate: {format_indicators(indicators)})")
+        return {"current_price": current_price, "signal": "HOLD", "target": None}
+
+    coin_name = market_data.get("name", coin_id)
+    
+    # Context Awareness: Are we already holding this?
+    holding_info = "Status: Not currently holding."
+    perf = None
+    if coin_id in trader.portfolio["holdings"]:
+        holding = trader.portfolio["holdings"][coin_id]
+        perf = trader.get_coin_performance(coin_id, current_price)
+        holding_info = f"Status: HOLDING. Entry: ${holding['entry_price']:.4f}, Current P/L: {perf:.2f}%"
+
+    # PROMPT_FEATURES: "ohlc" (raw candles), "indicators" (compact features) or "both"
+    features = trader.settings.get("PROMPT_FEATURES", "ohlc")
+    feature_text = ""
+    if features in ("indicators", "both"):
+        feature_text += f"\nIndicators (1h candles): {format_indicators(indicators)}"
+    if features in ("ohlc", "both"):
+        # Append OHLC data to prompt - use 30 for better trend analysis
+        encoding = trader.settings.get("PROMPT_OHLC_ENCODING", "raw")
+        tick_size = cg.get_tick_size(coin_id) if encoding == "compact" else None
+        feature_text += f"\nOHLC Data (last 30 intervals): {encode_ohlc(ohlc[-30:], encoding, tick_size)} "
+
+    prompt = prompt_template.format(
+        coin_name=coin_name, 
+        current_price=current_price,
+        holding_info=holding_info,
+        indicators=format_indicators(indicators)
+    ) + feature_text
+    # Per-coin part of a batched request; the template itself is sent once per batch
+    section = f"Coin: {coin_name}\nCurrent price: ${current_price}\n{holding_info}{feature_text}"
+    logging.info(f"Prompt for {coin_id}: ~{estimate_tokens(prompt)} tokens (section ~{estimate_tokens(section)})")
+
+    # Unchanged markets reuse the cached signal instead of calling the LLM
+    cache_key = None
+    if trader.settings.get("SIGNAL_CACHE_MODE", "quantized") == "quantized":
+        cache_key = quantized_market_key(
+            coin_id, current_price, ohlc, perf,
+            step_pct=float(trader.settings.get("SIGNAL_CACHE_STEP_PCT", 0.5)),
+            prompt_template=prompt_template,
+            features=f"{features}:{trader.settings.get('PROMPT_OHLC_ENCODING', 'raw')}"
+        )
+
+    return {
+        "current_price": current_price, "signal": None, "target": None,
+        "coin_id": coin_id, "prompt": prompt, "section": section, "cache_key": cache_key
+    }
+
+def batch_system_prompt(prompt_template):
+    """The prompt template rendered once for a multi-coin request."""
+    return prompt_template.format(
+        coin_name="each coin listed below",
+        current_price="(given per coin)",
+        holding_info="Holding status is given per coin.",
+        indicators="(given per coin)"
+    )
+
+def apply_signal(coin_id, evaluation, signal_data):
+    evaluation["signal"] = signal_data.get("action", "HOLD")
+    evaluation["target"] = signal_data.get("target")
+    logging.info(f"Signal for {coin_id}: {evaluation['signal']} (Target: {evaluation['target']}%)")
+    return evaluation
+
+def evaluate_coin(trader, cg, coin_id, prompt_template, min_volume):
+    """Prepare one coin and ask the LLM for its signal (unbatched mode).
+
+    Runs on a worker thread. Returns None if the coin is skipped.
+    """
+    try:
+        with metrics.span("data_fetch"):
+            evaluation = prepare_coin(trader, cg, coin_id, prompt_template, min_volume)
+        if evaluation is None or evaluation["signal"] is not None:
+            return evaluation
+        use_cache = trader.settings.get("SIGNAL_CACHE_MODE", "quantized") != "off"
+        with metrics.span("signal"):
+            signal_data = get_trading_signal(evaluation["prompt"], cache_key=evaluation["cache_key"], use_cache=use_cache)
+        return apply_signal(coin_id, evaluation, signal_data)
+    except Exception as e:
+        logging.error(f"Error evaluating {coin_id}: {e}")
+        return None
+
+def prepare_coin_safe(trader, cg, coin_id, prompt_template, min_volume):
+    try:
+        with metrics.span("data_fetch"):
+            return prepare_coin(trader, cg, coin_id, prompt_template, min_volume)
+    except Exception as e:
+        logging.error(f"Error evaluating {coin_id}: {e}")
+        return None
+
+def evaluate_coins(trader, cg, coins, prompt_template, min_volume, max_workers):
+    """Evaluate every coin and return {coin_id: evaluation or None}.
+
+    Data is fetched concurrently. With LLM_BATCH_SIZE > 1 the coins that still need a
+    signal are then sent to the LLM several at a time instead of one request each; with
+    LLM_CLIENT_MODE "async" their requests are kept in flight together.
+    """
+    batch_size = int(trader.settings.get("LLM_BATCH_SIZE", 1))
+    async_mode = trader.settings.get("LLM_CLIENT_MODE", "sync") == "async"
+    inline_signals = batch_size <= 1 and not async_mode
+    worker = evaluate_coin if inline_signals else prepare_coin_safe
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            metrics.submit(executor, worker, trader, cg, coin_id, prompt_template, min_volume)
+            for coin_id in coins
+        ]
+    evaluations = {}
+    for coin_id, future in zip(coins, futures):
+        try:
+            evaluations[coin_id] = future.result()
+        except Exception as e:
+            logging.error(f"Error evaluating {coin_id}: {e}")
+            evaluations[coin_id] = None
+    if inline_signals:
+        return evaluations
+
+    pending = [e for e in evaluations.values() if e is not None and e["signal"] is None]
+    if pending:
+        use_cache = trader.settings.get("SIGNAL_CACHE_MODE", "quantized") != "off"
+        with metrics.span("signal"):
+            if batch_size > 1:
+                logging.info(f"Requesting signals for {len(pending)} coins in batches of {batch_size}")
+                signals = get_trading_signals_batch(
+                    pending, batch_system_prompt(prompt_template), batch_size=batch_size, use_cache=use_cache
+                )
+            else:
+                logging.info(f"Requesting signals for {len(pending)} coins concurrently")
+                signals = get_trading_signals_async(pending, trader.settings, use_cache=use_cache)
+        for evaluation in pending:
+            coin_id = evaluation["coin_id"]
+            apply_signal(coin_id, evaluation, signals.get(coin_id, {"action": "HOLD"}))
+    return evaluations
+
+def review_prompt(trader, cg, coin_id):
+    """Build the target review request for one holding. Returns (current_price, target_pct, prompt) or None."""
+    # Prices come from the cycle snapshot and candles from the kline store, so the main
+    # loop reuses this data instead of fetching it again
+    current_price = cg.get_current_price(coin_id)
+    if current_price == 0:
+        return None
+    ohlc = cg.get_ohlc(coin_id)
+    holding = trader.portfolio["holdings"][coin_id]
+    target_pct = holding.get("target_profit_pct", trader.settings.get("TAKE_PROFIT", 15))
+
+    prompt = f"You are reviewing an open position for {coin_id}.\n"
+    prompt += f"Entry Price: ${holding['entry_price']:.4f}\n"
+    prompt += f"Current Price: ${current_price:.4f}\n"
+    prompt += f"Current Target Profit: {target_pct}%\n"
+    encoding = trader.settings.get("REVIEW_PROMPT_ENCODING", "raw")
+    tick_size = cg.get_tick_size(coin_id) if encoding == "compact" else None
+    prompt += f"Recent OHLC (last 30 intervals): {encode_ohlc(ohlc[-30:], encoding, tick_size)}\n"
+    prompt += "Is the current target still realistic given the recent trend? If momentum is slowing or dropping hard, lower it. If pumping, maybe raise it or keep it."
+    logging.info(f"Review prompt for {coin_id}: ~{estimate_tokens(prompt)} tokens")
+    return current_price, target_pct, prompt
+
+def review_holding(trader, cg, coin_id):
+    """Ask the LLM whether one holding's target still holds. Runs on a worker thread.
+
+    Returns (current_price, new_target_pct or None), or None if the holding was skipped.
+    """
+    request = review_prompt(trader, cg, coin_id)
+    if request is None:
+        return None
+    current_price, target_pct, prompt = request
+    eval_res = evaluate_holding_target(prompt)
+    if eval_res.get("action") == "ADJUST" and eval_res.get("new_target_pct"):
+        new_pct = float(eval_res["new_target_pct"])
+        logging.info(f"LLM adjusted target for {coin_id} from {target_pct}% to {new_pct}%")
+        return current_price, new_pct
+    return current_price, None
+
+def review_holdings(trader, cg, holdings, max_workers):
+    """Review every holding's target concurrently and apply the changes in one portfolio write.
+
+    Returns {coin_id: new_target_pct} for the adjusted holdings.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [metrics.submit(executor, review_holding, trader, cg, coin_id) for coin_id in holdings]
+
+    adjusted = {}
+    for coin_id, future in zip(holdings, futures):
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.error(f"Error reviewing target for {coin_id}: {e}")
+            continue
+        if result is None or result[1] is None or coin_id not in trader.portfolio["holdings"]:
+            continue
+        current_price, new_pct = result
+        trader.update_holding_fields(coin_id, {"target_profit_pct": new_pct, "current_price": current_price})
+        adjusted[coin_id] = new_pct
+
+    logging.info(f"Target review: {len(adjusted)}/{len(holdings)} holdings adjusted")
+    return adjusted
+
+def execute_coin(trader, coin_id, evaluation):
+    """Apply an evaluated signal to the portfolio. Must be called serially."""
+    current_price = evaluation["current_price"]
+    signal = evaluation["signal"]
+    target_profit = evaluation["target"]
+
+    # Refresh holding stats (price/URL) if we own it
+    trader.update_holding_stats(coin_id, current_price)
+
+    sell_reason = trader.check_sell_conditions(coin_id, current_price)
+    
+    if sell_reason:
+        trader.simulate_sell(coin_id, current_price, sell_reason)
+    elif signal == "BUY":
+        if coin_id not in trader.portfolio["holdings"]:
+            trader.simulate_buy(coin_id, current_price, target_profit)
+        else:
+            logging.info(f"HOLD for {coin_id}: Already holding a position")
+    elif signal == "SELL":
+        if coin_id in trader.portfolio["holdings"]:
+            trader.simulate_sell(coin_id, current_price, "AI Signal")
+        else:
+            logging.info(f"HOLD for {coin_id}: No position to sell")
+    else:
+        logging.info(f"HOLD for {coin_id}: Neutral signal")
+
+def load_prompt_template(trader):
+    """Prompt template from settings with fallback to local file. None if neither exists."""
+    prompt_template = trader.settings.get("PROMPT_TEMPLATE")
+    if prompt_template:
+        logging.info("Using dynamic PROMPT_TEMPLATE from Cosmos DB")
+        return prompt_template
+
+    template_path = os.path.join(os.path.dirname(__file__), "prompt_template.txt")
+    if os.path.exists(template_path):
+        with open(template_path, "r") as f:
+            prompt_template = f.read()
+        logging.info("Using local prompt_template.txt (fallback)")
+        return prompt_template
+    logging.error("Prompt template not found in settings or local file!")
+    return None
+
+def execute_with_retry(trader, coin_id, evaluation, attempts=3):
+    """execute_coin against a portfolio other workers write concurrently.
+
+    A lost conditional write reloads the portfolio; the decision is then re-applied to
+    the fresh copy (sell conditions and holdings may have changed meanwhile).
+    """
+    for _ in range(attempts):
+        conflicts = trader.conflicts
+        execute_coin(trader, coin_id, evaluation)
+        trader.commit()
+        if trader.conflicts == conflicts:
+            return True
+        logging.info(f"Portfolio changed while executing {coin_id}, retrying on the reloaded portfolio")
+    logging.error(f"Could not execute {coin_id} after {attempts} conflicting writes")
+    return False
+
+def finish_cycle(trader):
+    """Fan-in of a fan-out cycle: log one equity point for the whole cycle."""
+    trader.portfolio = trader.cosmos.get_portfolio()
+    trader.log_equity_curve()
+
+def run_coin_work(message):
+    """Queue worker for EXECUTION_MODE "fanout": evaluate and execute one coin of a planned cycle."""
+    item = json.loads(message)
+    cycle_id, coin_id = item["cycle_id"], item["coin_id"]
+    with metrics.cycle("coin_work") as recorder:
+        trader = TradingService(deferred_writes=True)
+        if not fanout.claim(trader.cosmos, cycle_id, coin_id):
+            # Executed by an earlier delivery (or in progress elsewhere): only the bookkeeping is left
+            with metrics.span("persistence"):
+                if fanout.resume(trader.cosmos, cycle_id, coin_id):
+                    finish_cycle(trader)
+            return False
+        try:
+            cg = BinanceService()
+            configure_rate_limiter(trader.settings)
+            signal_cache = configure_signal_cache(trader.settings)
+            prompt_template = load_prompt_template(trader)
+            min_volume = float(os.getenv("MIN_VOLUME_24H", 100000))
+            evaluation = evaluate_coin(trader, cg, coin_id, prompt_template, min_volume) if prompt_template else None
+            with metrics.span("execution"):
+                if evaluation:
+                    execute_with_retry(trader, coin_id, evaluation)
+        except Exception:
+            # Let the queue retry this message. A trade flushed before the error (e.g. while
+            # logging it) is not repeated: BUY needs no holding and SELL needs one.
+            fanout.release(trader.cosmos, cycle_id, coin_id)
+            raise
+        result = {"signal": evaluation["signal"] if evaluation else None}
+        with metrics.span("persistence"):
+            # From here on the claim is never released; a redelivery resumes at resume()
+            try:
+                fanout.mark_committed(trader.cosmos, cycle_id, coin_id, result)
+            except Exception as e:
+                logging.error(f"Executed {coin_id} but could not record it in cycle {cycle_id}: {e}")
+                raise
+            signal_cache.save()
+            fanout.complete(trader.cosmos, cycle_id, coin_id, result)
+            if fanout.try_finish(trader.cosmos, cycle_id):
+                finish_cycle(trader)
+    metrics.log_summary(recorder)
+    return True
+
+def run_trading_cycle(enqueue=None):
+    """Run one cycle and log its per-stage timing/request/RU/token summary.
+
+    `enqueue(messages)` sends per-coin work items to the queue when EXECUTION_MODE is "fanout".
+    """
+    with metrics.cycle("trading_cycle") as recorder:
+        trading_cycle(enqueue)
+    summary = metrics.log_summary(recorder)
+    if os.getenv("METRICS_OTEL_EXPORT", "false").lower() == "true":
+        metrics.export_otel(recorder)
+    return summary
+
+def trading_cycle(enqueue=None):
     logging.info("Starting trading cycle...")
     
+    trader = None
     try:
-        trader = TradingService()
+        # Portfolio writes are coalesced and flushed at the end of the cycle
+        trader = TradingService(deferred_writes=True)
+        # Coins are evaluated in priority order until the time budget (within functionTimeout) runs out
+        scheduler = CycleScheduler(
+            float(trader.settings.get("CYCLE_TIME_BUDGET_SECONDS", 480)), trader.cosmos.get_cycle_checkpoint()
+        )
+        # Trade and equity records are written in batches when the cycle ends
+        trader.cosmos.begin_event_buffer()
         cg = BinanceService()
         cgd = CoinGeckoDiscovery()
-        
-        # 1. Volatile Coin Discovery (Hybrid Mode - Every 2 Hours)
-        last_discovery_str = trader.settings.get("LAST_DISCOVERY_TIME")
-        last_discovery = None
-        if last_discovery_str:
-            try:
-                last_discovery = datetime.fromisoformat(last_discovery_str)
-            except:
-                pass
-
-        volatile_coins = []
-        if not last_discovery or datetime.utcnow() - last_discovery > timedelta(hours=2):
-            logging.info("Running CoinGecko discovery (2h interval reached)...")
-            candidates = cgd.get_trending_candidates(min_volume=1000000, limit=10)
-            
-            new_additions = False
-            for cand in candidates:
-                coin_symbol = cand["coin"]
-                # Check if exists on Binance
-                if cg._get_symbol(coin_symbol):
-                    volatile_coins.append(coin_symbol)
-                    
-            logging.info(f"Top volatile coins discovered on Binance: {volatile_coins}")
-            
-            # Update last discovery time
-            trader.settings["LAST_DISCOVERY_TIME"] = datetime.utcnow().isoformat()
-            trader.cosmos.update_settings(trader.settings)
-        else:
-            logging.info("Skipping CoinGecko discovery (within 2h interval).")
-        
+        # LLM calls are paced by the shared rate limiter instead of fixed sleeps
+        configure_rate_limiter(trader.settings)
+        signal_cache = configure_signal_cache(trader.settings)
+
+        with metrics.span("discovery"):
+            # 1. Volatile Coin Discovery (Hybrid Mode - Every 2 Hours)
+            last_discovery_str = trader.settings.get("LAST_DISCOVERY_TIME")
+            last_discovery = None
+            if last_discovery_str:
+                try:
+                    last_discovery = datetime.fromisoformat(last_discovery_str)
+                except:
+                    pass
+
+            volatile_coins = []
+            if not last_discovery or datetime.utcnow() - last_discovery > timedelta(hours=2):
+                logging.info("Running CoinGecko discovery (2h interval reached)...")
+                candidates = cgd.get_trending_candidates(min_volume=1000000, limit=10)
+
+                for cand in candidates:
+                    coin_symbol = cand["coin"]
+                    # Check if exists on Binance
+                    if cg._get_symbol(coin_symbol):
+                        volatile_coins.append(coin_symbol)
+
+                logging.info(f"Top volatile coins discovered on Binance: {volatile_coins}")
+
+                # Update last discovery time
+                trader.settings["LAST_DISCOVERY_TIME"] = datetime.utcnow().isoformat()
+                trader.cosmos.patch_settings(trader.settings, ["LAST_DISCOVERY_TIME"])
+            else:
+                logging.info("Skipping CoinGecko discovery (within 2h interval).")
+
         # 2. Status Update & Daily Holding Target Review
         logging.info(f"Current USD Balance: ${trader.portfolio['balance_usd']:.2f}")
         holdings_list = list(trader.portfolio['holdings'].keys())
         logging.info(f"Current holdings: {holdings_list}")
 
-        last_review_str = trader.settings.get("LAST_TARGET_REVIEW_TIME")
-        last_review = None
-        if last_review_str:
-            try:
-                last_review = datetime.fromisoformat(last_review_str)
-            except:
-                pass
-
-        if holdings_list and (not last_review or datetime.utcnow() - last_review > timedelta(hours=24)):
-            logging.info("Running daily target profit review for holdings...")
-            for h_coin in holdings_list:
-                h_data = trader.portfolio['holdings'][h_coin]
-                current_price = cg.get_current_price(h_coin)
-                if current_price == 0: continue
-                
-                ohlc = cg.get_ohlc(h_coin)
-                target_pct = h_data.get("target_profit_pct", trader.settings.get("TAKE_PROFIT", 15))
-                
-                review_prompt = f"You are reviewing an open position for {h_coin}.\n"
-                review_prompt += f"Entry Price: ${h_data['entry_price']:.4f}\n"
-                review_prompt += f"Current Price: ${current_price:.4f}\n"
-                review_prompt += f"Current Target Profit: {target_pct}%\n"
-                review_prompt += f"Recent OHLC (last 30 intervals): {ohlc[-30:]}\n"
-                review_prompt += "Is the current target still realistic given the recent trend? If momentum is slowing or dropping hard, lower it. If pumping, maybe raise it or keep it."
-                
-                eval_res = evaluate_holding_target(review_prompt)
-                if eval_res.get("action") == "ADJUST" and eval_res.get("new_target_pct"):
-                    new_pct = float(eval_res["new_target_pct"])
-                    logging.info(f"LLM adjusted target for {h_coin} from {target_pct}% to {new_pct}%")
-                    h_data["target_profit_pct"] = new_pct
-                    trader.portfolio["holdings"][h_coin] = h_data
-                    trader.update_holding_stats(h_coin, current_price)
-                
-                time.sleep(10) # Rate limiting
-                
-            trader.settings["LAST_TARGET_REVIEW_TIME"] = datetime.utcnow().isoformat()
-            trader.cosmos.update_settings(trader.settings)
-        else:
-            logging.info("Skipping daily target review (within 24h interval).")
-
-        # Summary of current performance (Optional/Logging only)
-        if holdings_list:
-            prices = {cid: cg.get_current_price(cid) for cid in holdings_list}
-            cost, net_val, gain_pct = trader.get_portfolio_performance(prices)
-            logging.info(f"Portfolio Status: Cost: ${cost:.2f}, Net Value (after fees): ${net_val:.2f}, Gain: {gain_pct:.2f}%")
-        # ----------------------------------------
-        
-        # 3. Watchlist Discovery (DexScreener Disabled)
-        logging.info("Watchlist discovery with DexScreener is disabled.")
-        # ----------------------------------------
-        
-        # Load prompt template from settings with fallback to local file
-        prompt_template = trader.settings.get("PROMPT_TEMPLATE")
-        
-        if not prompt_template:
-            template_path = os.path.join(os.path.dirname(__file__), "prompt_template.txt")
-            if os.path.exists(template_path):
-                with open(template_path, "r") as f:
-                    prompt_template = f.read()
-                logging.info("Using local prompt_template.txt (fallback)")
-            else:
-                logging.error("Prompt template not found in settings or local file!")
-                return
-        else:
-            logging.info("Using dynamic PROMPT_TEMPLATE from Cosmos DB")
-
         coins_to_track = trader.settings.get("COINS_TO_TRACK", [])
         if isinstance(coins_to_track, str):
             coins_to_track = [c.strip() for c in coins_to_track.split(",")]
-            
+        # Copy so the merges below never leak into the persisted settings document
+        coins_to_track = list(coins_to_track)
+
         # Merge with dynamically discovered volatile coins
         initial_count = len(coins_to_track)
         for v_coin in volatile_coins:
             if v_coin not in coins_to_track:
                 coins_to_track.append(v_coin)
-        
+
         # Merge with current holdings (in case any are not in tracking/volatile lists)
         for h_coin in holdings_list:
             if h_coin not in coins_to_track:
                 coins_to_track.append(h_coin)
-                
+
         new_coins_added = len(coins_to_track) - initial_count
         if new_coins_added > 0:
             logging.info(f"Added {new_coins_added} coins (volatile/holdings) to track. Total: {len(coins_to_track)}")
 
+        # One bulk ticker request serves every price/24h lookup below
+        with metrics.span("market_snapshot"):
+            cg.load_snapshot(coins_to_track)
+
+        with metrics.span("review"):
+            last_review_str = trader.settings.get("LAST_TARGET_REVIEW_TIME")
+            last_review = None
+            if last_review_str:
+                try:
+                    last_review = datetime.fromisoformat(last_review_str)
+                except:
+                    pass
+
+            if holdings_list and (not last_review or datetime.utcnow() - last_review > timedelta(hours=24)):
+                logging.info("Running daily target profit review for holdings...")
+                max_workers = max(1, int(trader.settings.get("MAX_CONCURRENT_COINS", 4)))
+                review_holdings(trader, cg, holdings_list, max_workers)
+                trader.settings["LAST_TARGET_REVIEW_TIME"] = datetime.utcnow().isoformat()
+                trader.cosmos.patch_settings(trader.settings, ["LAST_TARGET_REVIEW_TIME"])
+            else:
+                logging.info("Skipping daily target review (within 24h interval).")
+
+        # Summary of current performance (Optional/Logging only)
+        if holdings_list:
+            prices = {cid: cg.get_current_price(cid) for cid in holdings_list}
+            cost, net_val, gain_pct = trader.get_portfolio_performance(prices)
+            logging.info(f"Portfolio Status: Cost: ${cost:.2f}, Net Value (after fees): ${net_val:.2f}, Gain: {gain_pct:.2f}%")
+        # ----------------------------------------
+
+        # 3. Watchlist Discovery (DexScreener Disabled)
+        logging.info("Watchlist discovery with DexScreener is disabled.")
+        # ----------------------------------------
+        
+        prompt_template = load_prompt_template(trader)
+        if not prompt_template:
+            return
+
         # Fallback for min volume if not in environment
         min_volume = float(os.getenv("MIN_VOLUME_24H", 100000))
 
         logging.info(f"Tracking coins: {coins_to_track}")
+        coins_to_track = scheduler.plan(coins_to_track, trader, cg)
 
-        for coin_id in coins_to_track:
-            try:
-                market_data = cg.get_market_data(coin_id)
-                if not market_data:
-                    logging.warning(f"Skipping {coin_id}: No market data found")
-                    continue
-                    
-                if market_data.get("total_volume", 0) < min_volume:
-                    logging.info(f"Skipping {coin_id}: Low volume ({market_data.get('total_volume', 0)})")
-                    continue
-                
-                ohlc = cg.get_ohlc(coin_id)
-                if not ohlc:
-                    logging.warning(f"Skipping {coin_id}: No OHLC data")
-                    continue
-                
-                current_price = cg.get_current_price(coin_id)
-                if current_price == 0:
-                    logging.warning(f"Skipping {coin_id}: Invalid price")
-                    continue
+        # Fan-out: coins are evaluated by queue-triggered workers; the last one logs equity
+        if trader.settings.get("EXECUTION_MODE", "inline") == "fanout" and enqueue is not None:
+            with metrics.span("fanout"):
+                enqueue(fanout.plan_cycle(trader.cosmos, coins_to_track))
+            with metrics.span("persistence"):
+                trader.commit()
+            signal_cache.save()
+            logging.info(f"Trading cycle planned: {len(coins_to_track)} coins enqueued.")
+            return
 
-                # Refresh holding stats (price/URL) if we own it
-                trader.update_holding_stats(coin_id, current_price)
-
-                coin_name = market_data.get("name", coin_id)
-                
-                # Context Awareness: Are we already holding this?
-                holding_info = "Status: Not currently holding."
-                if coin_id in trader.portfolio["holdings"]:
-                    holding = trader.portfolio["holdings"][coin_id]
-                    perf = trader.get_coin_performance(coin_id, current_price)
-                    holding_info = f"Status: HOLDING. Entry: ${holding['entry_price']:.4f}, Current P/L: {perf:.2f}%"
-
-                prompt = prompt_template.format(
-                    coin_name=coin_name, 
-                    current_price=current_price,
-                    holding_info=holding_info
-                )
-                # Append OHLC data to prompt - use 30 for better trend analysis
-                prompt += f"\nOHLC Data (last 30 intervals): {ohlc[-30:]} "
-
-                signal_data = get_trading_signal(prompt)
-                signal = signal_data.get("action", "HOLD")
-                target_profit = signal_data.get("target")
-                
-                logging.info(f"Signal for {coin_id}: {signal} (Target: {target_profit}%)")
-                
-                # Rate limiting: 10s delay between Groq calls
-                time.sleep(10)
-                
-                sell_reason = trader.check_sell_conditions(coin_id, current_price)
-                
-                if sell_reason:
-                    trader.simulate_sell(coin_id, current_price, sell_reason)
-                elif signal == "BUY":
-                    if coin_id not in trader.portfolio["holdings"]:
-                        trader.simulate_buy(coin_id, current_price, target_profit)
-                    else:
-                        logging.info(f"HOLD for {coin_id}: Already holding a position")
-                elif signal == "SELL":
-                    if coin_id in trader.portfolio["holdings"]:
-                        trader.simulate_sell(coin_id, current_price, "AI Signal")
-                    else:
-                        logging.info(f"HOLD for {coin_id}: No position to sell")
-                else:
-                    logging.info(f"HOLD for {coin_id}: Neutral signal")
-            except Exception as e:
-                logging.error(f"Error processing {coin_id}: {e}")
-                continue
+        # Fetch data and evaluate signals concurrently; execute trades one at a time in priority order
+        max_workers = max(1, int(trader.settings.get("MAX_CONCURRENT_COINS", 4)))
+        logging.info(f"Evaluating {len(coins_to_track)} coins with up to {max_workers} workers ({scheduler.remaining():.0f}s left)")
+
+        evaluations = scheduler.run(
+            coins_to_track,
+            lambda wave: evaluate_coins(trader, cg, wave, prompt_template, min_volume, max_workers),
+            # One coin per worker per wave, so the budget is checked before every round of coins
+            wave_size=max(max_workers, int(trader.settings.get("LLM_BATCH_SIZE", 1)))
+        )
+
+        with metrics.span("execution"):
+            for coin_id in scheduler.evaluated:
+                try:
+                    evaluation = evaluations.get(coin_id)
+                    if evaluation:
+                        execute_coin(trader, coin_id, evaluation)
+                except Exception as e:
+                    logging.error(f"Error processing {coin_id}: {e}")
+                    continue
 
-        # After processing all coins, log equity
-        trader.log_equity_curve()
+        # After processing all coins, flush the portfolio and log equity
+        with metrics.span("persistence"):
+            trader.commit()
+            trader.log_equity_curve()
+            trader.cosmos.save_cycle_checkpoint(scheduler.checkpoint())
+        logging.info(f"HTTP connection stats: {get_connection_stats()}")
+        logging.info(f"Signal cache stats: {signal_cache.stats()}")
+        signal_cache.save()
         logging.info("Trading cycle completed.")
         
     except Exception as e:
         logging.error(f"Critical error in trading cycle: {e}")
+    finally:
+        # Don't lose in-memory price refreshes or buffered events if the cycle stopped early
+        if trader is not None:
+            with metrics.span("persistence"):
+                try:
+                    if trader.portfolio_dirty:
+                        trader.commit()
+                finally:
+                    trader.cosmos.end_event_buffer()
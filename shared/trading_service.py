@@ -1,10 +1,14 @@
 import os
 import logging
 from datetime import datetime
-from .cosmos_db import CosmosDBService
+from .cosmos_db import CosmosDBService, PortfolioConflictError
 
 class TradingService:
-    def __init__(self):
+    def __init__(self, deferred_writes=False):
+        """With deferred_writes, portfolio changes stay in memory until commit().
+
+        Trades are still flushed immediately while PERSIST_TRADES_IMMEDIATELY is enabled.
+        """
         self.cosmos = CosmosDBService()
         self.settings = self.cosmos.get_settings()
         
@@ -12,9 +16,67 @@ class TradingService:
         self.take_profit = float(self.settings.get("TAKE_PROFIT", 15)) / 100
         self.stop_loss = float(self.settings.get("STOP_LOSS", 8)) / 100
         
-        # Load portfolio from Cosmos
+        # Load portfolio from Cosmos (one document, or cash + position documents)
+        self.cosmos.portfolio_layout = self.settings.get("PORTFOLIO_LAYOUT", "document")
         self.portfolio = self.cosmos.get_portfolio()
 
+        self.deferred_writes = deferred_writes
+        self.flush_on_trade = bool(self.settings.get("PERSIST_TRADES_IMMEDIATELY", True))
+        self.portfolio_dirty = False
+        # Holding fields changed since the last write ({coin_id: {field: value}}); while
+        # nothing else changed they are written as a patch instead of the whole document
+        self.pending_fields = {}
+        self.full_write = False
+        # Writes lost to a concurrent writer (the portfolio was reloaded each time)
+        self.conflicts = 0
+
+    def save_portfolio(self, trade=False, fields_only=False):
+        """Persist the portfolio now, or only mark it dirty when writes are deferred."""
+        self.portfolio_dirty = True
+        if not fields_only:
+            self.full_write = True
+        if self.deferred_writes and not (trade and self.flush_on_trade):
+            return True
+        return self.commit()
+
+    def commit(self):
+        """Flush pending portfolio changes in a single conditional write.
+
+        Field-only changes to holdings go out as a patch in the document layout; anything
+        else (trades, layout "sharded", which diffs by itself) as a full save.
+        """
+        if not self.portfolio_dirty:
+            return True
+        try:
+            if not self.full_write and self.pending_fields and self.cosmos.portfolio_layout == "document":
+                self.cosmos.patch_holdings(self.portfolio, self.pending_fields)
+            else:
+                self.cosmos.save_portfolio(self.portfolio)
+        except PortfolioConflictError as e:
+            # Never overwrite someone else's update: drop our copy and reload
+            logging.error(f"{e}. Reloading portfolio, local changes discarded.")
+            self.portfolio = self.cosmos.get_portfolio()
+            self.conflicts += 1
+            self.clear_pending()
+            return False
+        # Any other error propagates with the changes still pending, so they can be retried
+        self.clear_pending()
+        return True
+
+    def clear_pending(self):
+        self.portfolio_dirty = False
+        self.pending_fields = {}
+        self.full_write = False
+
+    def update_holding_fields(self, coin_id, fields):
+        """Set fields on an existing holding, written as a field-level patch where possible."""
+        if coin_id not in self.portfolio["holdings"]:
+            return False
+        self.portfolio["holdings"][coin_id].update(fields)
+        self.pending_fields.setdefault(coin_id, {}).update(fields)
+        self.save_portfolio(fields_only=True)
+        return True
+
     def simulate_buy(self, coin_id, current_price, target_profit=None):
         if self.portfolio["balance_usd"] < self.order_amount:
             logging.info(f"Insufficient funds to buy {coin_id}")
@@ -31,8 +93,9 @@ class TradingService:
         }
         self.portfolio["balance_usd"] -= self.order_amount
         
-        # Save updated portfolio to Cosmos
-        self.cosmos.save_portfolio(self.portfolio)
+        # Save updated portfolio to Cosmos (a conflict reloads it and drops this buy)
+        if not self.save_portfolio(trade=True):
+            return False
         
         logging.info(f"Simulated BUY: {quantity} of {coin_id} at ${current_price}")
         
@@ -59,8 +122,9 @@ class TradingService:
         self.portfolio["balance_usd"] += net_value
         del self.portfolio["holdings"][coin_id]
         
-        # Save updated portfolio
-        self.cosmos.save_portfolio(self.portfolio)
+        # Save updated portfolio (a conflict reloads it and drops this sell)
+        if not self.save_portfolio(trade=True):
+            return False
         
         logging.info(f"Simulated SELL: {coin_id} for ${net_value:.2f} ({reason}, P/L: ${profit_loss:.2f})")
         
@@ -77,14 +141,13 @@ class TradingService:
     def update_holding_stats(self, coin_id, current_price):
         """Update the latest price and URL for an existing holding."""
         if coin_id in self.portfolio["holdings"]:
-            self.portfolio["holdings"][coin_id]["current_price"] = current_price
+            fields = {"current_price": current_price}
             # Ensure URL is present even if position was opened before this update
             if "url" not in self.portfolio["holdings"][coin_id]:
-                self.portfolio["holdings"][coin_id]["url"] = f"https://www.coingecko.com/en/coins/{coin_id}"
+                fields["url"] = f"https://www.coingecko.com/en/coins/{coin_id}"
             
-            # Save updated portfolio to Cosmos
-            self.cosmos.save_portfolio(self.portfolio)
-            return True
+            # Save updated fields to Cosmos (deferred until commit in cycle mode)
+            return self.update_holding_fields(coin_id, fields)
         return False
 
     def get_coin_performance(self, coin_id, current_price):
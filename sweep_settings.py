@@ -0,0 +1,82 @@
+
+import argparse
+import logging
+import sys
+import os
+import json
+import time
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load local.settings.json values into environment if running locally
+try:
+    with open("local.settings.json", "r") as f:
+        settings = json.load(f)
+        for k, v in settings.get("Values", {}).items():
+            os.environ.setdefault(k, str(v))
+except:
+    pass
+
+from shared.backtest import load_price_history
+from shared.cosmos_db import CosmosDBService
+from shared.coingecko_service import BinanceService
+from shared.kline_store import get_kline_store
+from shared.sweep import grid_search, random_search, run_sweep, to_settings_document
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def parse_values(text):
+    return [float(v) for v in text.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep TAKE_PROFIT / STOP_LOSS / ORDER_AMOUNT over stored klines.")
+    parser.add_argument("--take-profit", default="5,8,10,15,20,25", help="Grid values (percent)")
+    parser.add_argument("--stop-loss", default="3,5,8,10,15", help="Grid values (percent)")
+    parser.add_argument("--order-amount", default="25,50,100", help="Grid values (USD)")
+    parser.add_argument("--random", type=int, default=0, help="Use N random combinations instead of the grid")
+    parser.add_argument("--days", type=int, default=365, help="History length to sync and test")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-drawdown", type=float, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--write", action="store_true", help="Upsert the best result as the 'candidate_settings' document")
+    args = parser.parse_args()
+
+    cosmos = CosmosDBService()
+    settings = cosmos.get_settings()
+    coins = settings.get("COINS_TO_TRACK", [])
+    if isinstance(coins, str):
+        coins = [c.strip() for c in coins.split(",")]
+
+    # Make sure the kline store holds the requested history
+    binance = BinanceService()
+    store = get_kline_store()
+    start_time = int((time.time() - args.days * 86400) * 1000)
+    symbols = []
+    for coin in coins:
+        symbol = binance._get_symbol(coin)
+        if symbol:
+            store.backfill(binance.client, symbol, "1h", start_time)
+            store.sync(binance.client, symbol, "1h", 1000)
+            symbols.append(symbol)
+
+    timestamps, prices = load_price_history(store, symbols, start_time=start_time)
+    print(f"Loaded {prices.shape[1]} hourly candles for {len(symbols)} symbols")
+
+    if args.random:
+        param_sets = random_search(args.random)
+    else:
+        param_sets = grid_search(parse_values(args.take_profit), parse_values(args.stop_loss), parse_values(args.order_amount))
+
+    ranked = run_sweep(timestamps, prices, param_sets, max_workers=args.workers, max_drawdown_pct=args.max_drawdown)
+    for r in ranked[:args.top]:
+        print(json.dumps(r))
+
+    if args.write and ranked:
+        candidate = to_settings_document(ranked[0], settings)
+        cosmos.update_settings(candidate)
+        print(f"Wrote candidate settings: TP={candidate['TAKE_PROFIT']} SL={candidate['STOP_LOSS']} ORDER={candidate['ORDER_AMOUNT']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+
+import logging
+import sys
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.openai_service import RateLimiter
+from shared.async_llm import Endpoint, get_trading_signals_async
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class StubHTTPServer(ThreadingHTTPServer):
+    # The default listen backlog (5) would stall concurrent test requests
+    request_queue_size = 64
+    daemon_threads = True
+
+class StubServer:
+    """Local OpenAI-compatible server answering every request with `action` after `delay`."""
+    def __init__(self, action="BUY", delay=0.0, status=200):
+        self.action = action
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                time.sleep(stub.delay)
+                if stub.status != 200:
+                    body = json.dumps({"error": {"message": "stub failure"}}).encode()
+                else:
+                    body = json.dumps({
+                        "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                        "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                            "role": "assistant", "content": json.dumps({"action": stub.action, "target_profit_pct": 6})
+                        }}],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+                    }).encode()
+                try:
+                    self.send_response(stub.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client already moved on (hedged or timed out)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = StubHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def endpoint(self, name):
+        return Endpoint(name, self.url, "test-key", "stub", RateLimiter(600, 100000))
+
+def make_items(count):
+    return [{"coin_id": f"coin{i}", "prompt": f"prompt {i}", "cache_key": None} for i in range(count)]
+
+def test_async_llm():
+    print("--- Testing Async LLM Client ---")
+    settings = {"LLM_MAX_IN_FLIGHT": 8, "LLM_DEADLINE_SECONDS": 4, "LLM_HEDGE_AFTER_SECONDS": 1.0}
+    primary = StubServer("BUY", delay=0.2)
+    fallback = StubServer("SELL")
+    try:
+        # Requests run concurrently: 8 coins at 0.2s each take ~0.2s, not 1.6s
+        start = time.monotonic()
+        signals = get_trading_signals_async(make_items(8), settings, use_cache=False,
+                                            endpoints=[primary.endpoint("primary"), fallback.endpoint("fallback")])
+        elapsed = time.monotonic() - start
+        assert all(s == {"action": "BUY", "target": 6} for s in signals.values()) and len(signals) == 8
+        assert elapsed < 1.5, f"Requests were not concurrent ({elapsed:.2f}s)"
+        assert fallback.requests == 0
+        print(f"PASS: 8 concurrent signals in {elapsed:.2f}s")
+
+        # A slow primary is hedged to the fallback after the threshold
+        primary.delay = 3.0
+        start = time.monotonic()
+        signals = get_trading_signals_async(make_items(2), settings, use_cache=False,
+                                            endpoints=[primary.endpoint("primary"), fallback.endpoint("fallback")])
+        elapsed = time.monotonic() - start
+        assert [s["action"] for s in signals.values()] == ["SELL", "SELL"]
+        assert elapsed < 2.5, f"Hedge did not cut latency ({elapsed:.2f}s)"
+        print(f"PASS: slow primary hedged to fallback in {elapsed:.2f}s")
+
+        # A failing primary fails over immediately
+        primary.delay, primary.status = 0.0, 500
+        signals = get_trading_signals_async(make_items(1), settings, use_cache=False,
+                                            endpoints=[primary.endpoint("primary"), fallback.endpoint("fallback")])
+        assert signals["coin0"]["action"] == "SELL"
+        print("PASS: failed primary failed over to fallback")
+
+        # Nothing answers in time: HOLD within the deadline
+        primary.status, primary.delay, fallback.delay = 200, 5.0, 5.0
+        start = time.monotonic()
+        signals = get_trading_signals_async(make_items(1), {**settings, "LLM_DEADLINE_SECONDS": 0.8}, use_cache=False,
+                                            endpoints=[primary.endpoint("primary"), fallback.endpoint("fallback")])
+        elapsed = time.monotonic() - start
+        assert signals["coin0"] == {"action": "HOLD"} and elapsed < 2.5
+        print(f"PASS: deadline enforced ({elapsed:.2f}s)")
+    finally:
+        primary.server.shutdown()
+        fallback.server.shutdown()
+
+if __name__ == "__main__":
+    test_async_llm()
@@ -0,0 +1,39 @@
+import logging
+import sys
+import os
+import json
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.bench_cycle import run_cycle_benchmark, find_regressions, BASELINE_PATH
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def test_benchmarks():
+    print("--- Testing Cycle Benchmark Harness ---")
+    latency = {"binance": 0, "coingecko": 0, "llm": 0, "cosmos": 0}
+    result = run_cycle_benchmark(5, latency)
+    print(f"Requests: {result['requests']}")
+
+    # Every service was served by its fake, and the cycle itself was measured
+    assert all(result["requests"][service] > 0 for service in ("binance", "coingecko", "llm", "cosmos"))
+    assert result["cycle"]["cycle"] == "trading_cycle"
+    assert result["cycle"]["stages"]["data_fetch"]["count"] == 5
+    print("PASS: cycle ran against the fakes")
+
+    # Request counts stay within the regression tolerance of the committed baseline
+    with open(BASELINE_PATH, "r") as f:
+        baseline = json.load(f)["results"]
+    regressions = find_regressions({"5": {**result, "wall_seconds": None}}, baseline)
+    assert not regressions, regressions
+    print("PASS: request counts within the baseline tolerance")
+
+    # A request-count regression is reported
+    inflated = {**result, "wall_seconds": None, "requests": {**result["requests"], "llm": result["requests"]["llm"] * 3}}
+    assert find_regressions({"5": inflated}, baseline)
+    print("PASS: regressions are detected")
+
+if __name__ == "__main__":
+    test_benchmarks()
@@ -0,0 +1,95 @@
+import logging
+import sys
+import os
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks import fakes
+from benchmarks.bench_cycle import run_cycle_benchmark
+from shared import trader as trader_module
+from shared.trader import evaluate_coins
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class ConcurrencyProbe:
+    """Counts how many calls are running at once."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.active -= 1
+
+def test_bounded_evaluation():
+    print("--- Testing Concurrent Coin Evaluation ---")
+    probe = ConcurrencyProbe()
+    def slow_evaluate(trader, cg, coin_id, prompt_template, min_volume):
+        with probe:
+            time.sleep(0.2)
+            if coin_id == "c3":
+                raise Exception("exchange timeout")
+            return {"coin_id": coin_id, "signal": "HOLD"}
+
+    trader = MagicMock()
+    trader.settings = {}
+    coins = [f"c{i}" for i in range(8)]
+    with patch("shared.trader.evaluate_coin", side_effect=slow_evaluate):
+        start = time.monotonic()
+        evaluations = evaluate_coins(trader, MagicMock(), coins, "template", 0, max_workers=3)
+        elapsed = time.monotonic() - start
+
+    assert probe.peak == 3, probe.peak
+    assert elapsed < 8 * 0.2 / 2, f"Evaluation was not concurrent ({elapsed:.2f}s)"
+    print(f"PASS: 8 coins evaluated in {elapsed:.2f}s with at most {probe.peak} at once")
+
+    assert evaluations["c3"] is None
+    assert all(evaluations[c]["signal"] == "HOLD" for c in coins if c != "c3")
+    print("PASS: a failing coin does not abort the others")
+
+def test_serial_execution():
+    print("--- Testing Serialized Trade Execution ---")
+    probe = ConcurrencyProbe()
+    executed = []
+    real_execute = trader_module.execute_coin
+    real_evaluate = trader_module.evaluate_coin
+
+    def recording_execute(trader, coin_id, evaluation):
+        with probe:
+            time.sleep(0.01)
+            executed.append(coin_id)
+            if coin_id == "bench003":
+                raise Exception("order rejected")
+            return real_execute(trader, coin_id, evaluation)
+
+    def failing_evaluate(trader, cg, coin_id, prompt_template, min_volume):
+        if coin_id == "bench005":
+            raise Exception("bad candles")
+        return real_evaluate(trader, cg, coin_id, prompt_template, min_volume)
+
+    settings = {"MAX_CONCURRENT_COINS": 4, "LAST_DISCOVERY_TIME": datetime.utcnow().isoformat()}
+    with patch("shared.trader.execute_coin", side_effect=recording_execute), \
+         patch("shared.trader.evaluate_coin", side_effect=failing_evaluate):
+        result = run_cycle_benchmark(10, {"binance": 0, "coingecko": 0, "llm": 0.05, "cosmos": 0}, settings)
+
+    coins = fakes.coin_ids(10)
+    assert probe.peak == 1
+    assert executed == [c for c in coins if c != "bench005"], executed
+    assert result["equity_points"] == 1
+    print("PASS: trades executed one at a time in coin order, past a failed evaluation and a failed trade")
+
+if __name__ == "__main__":
+    test_bounded_evaluation()
+    test_serial_execution()
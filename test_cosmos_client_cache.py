@@ -0,0 +1,71 @@
+import logging
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared import cosmos_db
+from shared.cosmos_db import CosmosDBService, get_container, get_cosmos_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+CONNECTION_STRING = "AccountEndpoint=https://test.invalid/;AccountKey=dGVzdA==;"
+
+def reset_caches():
+    cosmos_db.client_cache.clear()
+    cosmos_db.container_cache.clear()
+    cosmos_db.bootstrapped.clear()
+
+def test_client_cache():
+    print("--- Testing Cosmos Client Cache ---")
+    reset_caches()
+    with patch.object(cosmos_db.CosmosClient, "from_connection_string", side_effect=lambda *a, **k: MagicMock()) as factory:
+        client = get_cosmos_client(CONNECTION_STRING)
+        assert get_cosmos_client(CONNECTION_STRING) is client
+        assert get_cosmos_client(CONNECTION_STRING + "x") is not client
+        assert factory.call_count == 2
+    print("PASS: one client per connection string")
+
+    first = get_container(client, "tradingdb", "portfolio")
+    assert get_container(client, "tradingdb", "portfolio") is first
+    get_container(client, "otherdb", "portfolio")
+    assert [c.args for c in client.get_database_client.call_args_list] == [("tradingdb",), ("otherdb",)]
+    print("PASS: container handles cached per database and container")
+    reset_caches()
+
+def test_bootstrap_setting():
+    print("--- Testing COSMOS_DB_BOOTSTRAP ---")
+    reset_caches()
+    client = MagicMock()
+    with patch.object(cosmos_db, "get_cosmos_client", return_value=client), \
+         patch.object(cosmos_db, "bootstrap_cosmos", wraps=cosmos_db.bootstrap_cosmos) as bootstrap:
+        with patch.dict(os.environ, {"COSMOS_DB_CONNECTION_STRING": CONNECTION_STRING, "COSMOS_DB_BOOTSTRAP": "false"}):
+            service = CosmosDBService()
+        assert bootstrap.call_count == 0 and not client.create_database_if_not_exists.called
+        assert service.client is client
+        print("PASS: no provisioning calls unless COSMOS_DB_BOOTSTRAP is true")
+
+        with patch.dict(os.environ, {"COSMOS_DB_CONNECTION_STRING": CONNECTION_STRING, "COSMOS_DB_BOOTSTRAP": "true"}):
+            CosmosDBService()
+            CosmosDBService()
+        assert bootstrap.call_count == 1
+        assert client.create_database_if_not_exists.call_count == 1
+        database = client.create_database_if_not_exists.return_value
+        assert database.create_container_if_not_exists.call_count == len(cosmos_db.CONTAINERS)
+        ttls = {c.kwargs["id"]: c.kwargs.get("default_ttl") for c in database.create_container_if_not_exists.call_args_list}
+        assert ttls["cycle_work"] == 7 * 24 * 3600 and ttls["portfolio"] is None
+        print("PASS: bootstrap runs once per connection")
+
+        with patch.dict(os.environ, {"COSMOS_DB_CONNECTION_STRING": CONNECTION_STRING, "COSMOS_DB_BOOTSTRAP": "true",
+                                     "COSMOS_DB_DATABASE_NAME": "otherdb"}):
+            CosmosDBService()
+        assert bootstrap.call_count == 2
+        print("PASS: bootstrap runs once per database")
+    reset_caches()
+
+if __name__ == "__main__":
+    test_client_cache()
+    test_bootstrap_setting()
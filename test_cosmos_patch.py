@@ -0,0 +1,75 @@
+import logging
+import sys
+import os
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fakes import FakeCosmosClient
+from shared import cosmos_db
+from shared.trading_service import TradingService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_trader(client):
+    with patch.dict(os.environ, {"COSMOS_DB_CONNECTION_STRING": "AccountEndpoint=https://test.invalid/;AccountKey=dGVzdA==;"}), \
+         patch.object(cosmos_db, "get_cosmos_client", lambda connection_string: client):
+        cosmos_db.container_cache.clear()
+        return TradingService(deferred_writes=True)
+
+def seed(client):
+    client.get_container_client("settings").items[("main_settings", "main_settings")] = {
+        "id": "main_settings", "PROMPT_TEMPLATE": "x" * 2000, "_etag": '"s"'
+    }
+    client.get_container_client("portfolio").items[("main_portfolio", "main_portfolio")] = {
+        "id": "main_portfolio", "balance_usd": 900, "_etag": '"p"',
+        "holdings": {"btc": {"quantity": 0.001, "entry_price": 50000, "value_usd": 50},
+                     "a/b": {"quantity": 1, "entry_price": 1, "value_usd": 1, "url": "u"}}
+    }
+
+def test_cosmos_patch():
+    print("--- Testing Field-Level Patch Writes ---")
+    client = FakeCosmosClient()
+    seed(client)
+    trader = make_trader(client)
+    portfolios = client.get_container_client("portfolio")
+
+    # Price refreshes are written as one patch, escaping '/' in the coin id
+    trader.update_holding_stats("btc", 51000)
+    trader.update_holding_stats("a/b", 2)
+    trader.commit()
+    assert client.requests.get("portfolio.patch") == 1 and "portfolio.upsert" not in client.requests
+    stored = portfolios.items[("main_portfolio", "main_portfolio")]
+    assert stored["holdings"]["btc"]["current_price"] == 51000
+    assert stored["holdings"]["btc"]["url"] == "https://www.coingecko.com/en/coins/btc"
+    assert stored["holdings"]["a/b"]["current_price"] == 2
+    assert trader.portfolio["_etag"] == stored["_etag"]
+    print("PASS: holding refresh patched instead of rewriting the portfolio")
+
+    # A trade in the same flush needs the whole document
+    trader.update_holding_stats("btc", 52000)
+    trader.simulate_sell("a/b", 2, "Test")
+    trader.commit()
+    assert client.requests.get("portfolio.upsert") == 1
+    assert "a/b" not in portfolios.items[("main_portfolio", "main_portfolio")]["holdings"]
+    print("PASS: structural changes still write the full document")
+
+    # A patch against a stale etag is a conflict: the portfolio is reloaded
+    portfolios.items[("main_portfolio", "main_portfolio")]["_etag"] = '"changed elsewhere"'
+    trader.update_holding_stats("btc", 53000)
+    assert not trader.commit()
+    assert trader.conflicts == 1 and trader.portfolio["holdings"]["btc"]["current_price"] == 52000
+    print("PASS: conflicting patch rejected")
+
+    # Settings timestamps are patched, leaving the large template untouched
+    trader.settings["LAST_DISCOVERY_TIME"] = "2026-01-01T00:00:00"
+    trader.cosmos.patch_settings(trader.settings, ["LAST_DISCOVERY_TIME"])
+    settings = client.get_container_client("settings").items[("main_settings", "main_settings")]
+    assert settings["LAST_DISCOVERY_TIME"] == "2026-01-01T00:00:00"
+    assert "TAKE_PROFIT" not in settings and "settings.upsert" not in client.requests
+    print("PASS: settings field patched")
+
+if __name__ == "__main__":
+    test_cosmos_patch()
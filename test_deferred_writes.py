@@ -0,0 +1,97 @@
+
+import logging
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.trading_service import TradingService
+from shared.cosmos_db import PortfolioConflictError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_trader():
+    trader = TradingService(deferred_writes=True)
+    trader.cosmos = MagicMock()
+    trader.portfolio = {
+        "id": "main_portfolio",
+        "balance_usd": 1000,
+        "holdings": {
+            "btc": {"quantity": 0.001, "entry_price": 50000, "value_usd": 50},
+            "eth": {"quantity": 0.02, "entry_price": 2500, "value_usd": 50}
+        }
+    }
+    return trader
+
+def test_deferred_portfolio_writes():
+    print("--- Testing Write-Behind Portfolio Persistence ---")
+
+    trader = make_trader()
+
+    # Price refreshes stay in memory
+    trader.update_holding_stats("btc", 51000)
+    trader.update_holding_stats("eth", 2600)
+    assert trader.cosmos.save_portfolio.call_count == 0
+    assert trader.portfolio_dirty
+
+    # A trade is flushed immediately (PERSIST_TRADES_IMMEDIATELY defaults to True)
+    trader.simulate_sell("eth", 2600, "Test")
+    assert trader.cosmos.save_portfolio.call_count == 1
+    assert not trader.portfolio_dirty
+
+    # Commit coalesces later refreshes into one write and is a no-op when clean
+    trader.update_holding_stats("btc", 52000)
+    trader.update_holding_stats("btc", 53000)
+    trader.commit()
+    trader.commit()
+    assert trader.cosmos.save_portfolio.call_count == 2
+    print("PASS: refreshes coalesced, trades flushed immediately")
+
+    # Trades can be deferred too
+    trader = make_trader()
+    trader.flush_on_trade = False
+    trader.simulate_buy("sol", 100)
+    trader.update_holding_stats("sol", 101)
+    assert trader.cosmos.save_portfolio.call_count == 0
+    trader.commit()
+    assert trader.cosmos.save_portfolio.call_count == 1
+    print("PASS: deferred trades flushed in a single upsert")
+
+    # A conflicting writer never gets overwritten: the portfolio is reloaded instead
+    trader = make_trader()
+    trader.cosmos.save_portfolio.side_effect = PortfolioConflictError("conflict")
+    trader.cosmos.get_portfolio.return_value = {"id": "main_portfolio", "balance_usd": 500, "holdings": {}}
+    trader.update_holding_stats("btc", 51000)
+    assert trader.commit() is False
+    assert trader.portfolio["balance_usd"] == 500
+    assert not trader.portfolio_dirty
+    print("PASS: etag conflict reloads the portfolio")
+
+    # A trade lost to a conflict is reported as failed and not logged
+    trader = make_trader()
+    trader.cosmos.save_portfolio.side_effect = PortfolioConflictError("conflict")
+    trader.cosmos.get_portfolio.return_value = {"id": "main_portfolio", "balance_usd": 500, "holdings": {}}
+    assert trader.simulate_buy("sol", 100) is False
+    assert trader.cosmos.log_trade.call_count == 0
+    print("PASS: conflicting buy not reported or logged")
+
+    # Any other write failure keeps the changes pending for the next commit
+    trader = make_trader()
+    trader.cosmos.save_portfolio.side_effect = Exception("503 Service Unavailable")
+    trader.update_holding_stats("btc", 51000)
+    try:
+        trader.commit()
+        assert False, "Expected the write error to propagate"
+    except Exception as e:
+        assert "503" in str(e)
+    assert trader.portfolio_dirty and trader.pending_fields
+    trader.cosmos.save_portfolio.side_effect = None
+    assert trader.commit() is True
+    assert trader.cosmos.save_portfolio.call_count == 2 and not trader.portfolio_dirty
+    print("PASS: failed write left the portfolio dirty")
+
+if __name__ == "__main__":
+    test_deferred_portfolio_writes()
@@ -0,0 +1,68 @@
+
+import logging
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.cosmos_db import CosmosDBService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_service():
+    cosmos = CosmosDBService()
+    cosmos.client = MagicMock()
+    cosmos.trades_container = MagicMock(id="trades")
+    cosmos.equity_container = MagicMock(id="equity_logs")
+    return cosmos
+
+def test_buffered_event_writes():
+    print("--- Testing Buffered Trade/Equity Writes ---")
+
+    cosmos = make_service()
+    with cosmos.buffered_events():
+        for i in range(3):
+            cosmos.log_trade({"id": f"btc-{i}", "action": "BUY", "coin": "btc"})
+        cosmos.log_trade({"id": "eth-0", "action": "SELL", "coin": "eth"})
+        cosmos.log_equity({"total_value": 1000})
+        # Nothing is written during the cycle
+        assert cosmos.trades_container.create_item.call_count == 0
+        assert cosmos.trades_container.execute_item_batch.call_count == 0
+
+    # One transactional batch per partition key
+    batches = cosmos.trades_container.execute_item_batch.call_args_list
+    assert sorted(c.kwargs["partition_key"] for c in batches) == ["btc", "eth"]
+    btc_batch = [c for c in batches if c.kwargs["partition_key"] == "btc"][0]
+    assert len(btc_batch.kwargs["batch_operations"]) == 3
+    assert cosmos.equity_container.execute_item_batch.call_count == 1
+    assert cosmos.event_buffer is None
+    print("PASS: events grouped into per-partition batches")
+
+    # Bounded memory: a full buffer flushes early, large groups split into 100-op batches
+    cosmos = make_service()
+    cosmos.begin_event_buffer(max_events=150)
+    for i in range(150):
+        cosmos.log_trade({"id": f"btc-{i}", "action": "BUY", "coin": "btc"})
+    sizes = [len(c.kwargs["batch_operations"]) for c in cosmos.trades_container.execute_item_batch.call_args_list]
+    assert sizes == [100, 50], sizes
+    assert cosmos.event_buffer.events == []
+    cosmos.end_event_buffer()
+    print("PASS: full buffer flushed in chunks of 100")
+
+    # Exceptions still flush; failed batches fall back to single writes
+    cosmos = make_service()
+    cosmos.trades_container.execute_item_batch.side_effect = Exception("batch rejected")
+    try:
+        with cosmos.buffered_events():
+            cosmos.log_trade({"id": "sol-0", "action": "BUY", "coin": "sol"})
+            raise RuntimeError("cycle failed")
+    except RuntimeError:
+        pass
+    assert cosmos.trades_container.create_item.call_count == 1
+    print("PASS: buffer flushed on exception with per-item fallback")
+
+if __name__ == "__main__":
+    test_buffered_event_writes()
@@ -0,0 +1,127 @@
+import logging
+import sys
+import os
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fakes import FakeCosmosClient
+from benchmarks.bench_cycle import run_cycle_benchmark
+from shared import fanout
+from shared.trading_service import TradingService
+from shared.cosmos_db import PortfolioConflictError
+from shared.trader import execute_with_retry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_cosmos():
+    return SimpleNamespace(cycle_work_container=FakeCosmosClient().get_container_client("cycle_work"))
+
+def test_fanout_bookkeeping():
+    print("--- Testing Fan-Out Work Items ---")
+    cosmos = make_cosmos()
+    messages = fanout.plan_cycle(cosmos, ["btc", "eth"], cycle_id="c1")
+    assert [json.loads(m) for m in messages] == [{"cycle_id": "c1", "coin_id": "btc"}, {"cycle_id": "c1", "coin_id": "eth"}]
+
+    # A (cycle, coin) is claimed once; a duplicate delivery is skipped
+    assert fanout.claim(cosmos, "c1", "btc")
+    assert not fanout.claim(cosmos, "c1", "btc")
+    fanout.complete(cosmos, "c1", "btc", {"signal": "BUY"})
+    assert not fanout.claim(cosmos, "c1", "btc")
+    print("PASS: duplicate deliveries skipped")
+
+    # A failed worker releases its claim so the queue retry can take it
+    assert fanout.claim(cosmos, "c1", "eth")
+    fanout.release(cosmos, "c1", "eth")
+    assert fanout.claim(cosmos, "c1", "eth")
+
+    # Fan-in fires once, only after every coin is done
+    assert not fanout.try_finish(cosmos, "c1")
+    fanout.complete(cosmos, "c1", "eth")
+    assert fanout.try_finish(cosmos, "c1")
+    assert not fanout.try_finish(cosmos, "c1")
+    print("PASS: fan-in completes the cycle exactly once")
+
+    # An abandoned claim is taken over after the timeout
+    fanout.plan_cycle(cosmos, ["sol"], cycle_id="c2")
+    assert fanout.claim(cosmos, "c2", "sol")
+    doc = cosmos.cycle_work_container.read_item(item="sol", partition_key="c2")
+    doc["claimed_at"] = "2000-01-01T00:00:00"
+    cosmos.cycle_work_container.upsert_item(body=doc)
+    assert fanout.claim(cosmos, "c2", "sol")
+    print("PASS: abandoned claim taken over")
+
+    # Marking a coin done survives a transient write failure
+    assert fanout.claim(cosmos, "c2", "btc")
+    upsert_item = cosmos.cycle_work_container.upsert_item
+    failures = []
+    def flaky_upsert(body, **kwargs):
+        if not failures:
+            failures.append(body["id"])
+            raise Exception("503 Service Unavailable")
+        return upsert_item(body=body, **kwargs)
+    with patch.object(cosmos.cycle_work_container, "upsert_item", flaky_upsert), patch("shared.fanout.time.sleep"):
+        assert fanout.complete(cosmos, "c2", "btc")
+    assert failures == ["btc"]
+    assert cosmos.cycle_work_container.read_item(item="btc", partition_key="c2")["status"] == "done"
+    print("PASS: completion retried after a transient failure")
+
+    # A redelivery after the trade was committed finishes the bookkeeping without trading again
+    fanout.plan_cycle(cosmos, ["btc", "eth"], cycle_id="c3")
+    assert fanout.claim(cosmos, "c3", "btc")
+    fanout.mark_committed(cosmos, "c3", "btc", {"signal": "BUY"})
+    assert not fanout.claim(cosmos, "c3", "btc")
+    assert not fanout.resume(cosmos, "c3", "btc")
+    doc = cosmos.cycle_work_container.read_item(item="btc", partition_key="c3")
+    assert doc["status"] == "done" and doc["result"] == {"signal": "BUY"}
+    print("PASS: committed coin completed on redelivery")
+
+    # A done coin whose worker died before the fan-in retries it on redelivery
+    assert fanout.claim(cosmos, "c3", "eth")
+    fanout.complete(cosmos, "c3", "eth")
+    assert not fanout.claim(cosmos, "c3", "eth")
+    assert fanout.resume(cosmos, "c3", "eth")
+    assert cosmos.cycle_work_container.read_item(item="cycle", partition_key="c3")["status"] == "completed"
+    assert not fanout.resume(cosmos, "c3", "eth")
+    print("PASS: fan-in retried by a redelivered message")
+
+    # A claim still in progress elsewhere is left alone
+    fanout.plan_cycle(cosmos, ["sol"], cycle_id="c4")
+    assert fanout.claim(cosmos, "c4", "sol")
+    assert not fanout.resume(cosmos, "c4", "sol")
+
+def test_execute_with_retry():
+    print("--- Testing Execution Against Concurrent Writers ---")
+    trader = TradingService(deferred_writes=True)
+    trader.cosmos = MagicMock()
+    trader.portfolio = {"id": "main_portfolio", "balance_usd": 1000, "holdings": {}}
+    # Another worker bought first: our buy conflicts once, then lands on the reloaded portfolio
+    trader.cosmos.save_portfolio.side_effect = [PortfolioConflictError("conflict"), None]
+    trader.cosmos.get_portfolio.return_value = {
+        "id": "main_portfolio", "balance_usd": 950,
+        "holdings": {"eth": {"quantity": 1, "entry_price": 50, "value_usd": 50}}
+    }
+    evaluation = {"current_price": 100.0, "signal": "BUY", "target": 5}
+    assert execute_with_retry(trader, "btc", evaluation)
+    assert set(trader.portfolio["holdings"]) == {"btc", "eth"}
+    assert trader.portfolio["balance_usd"] == 900
+    print("PASS: conflicting buy re-applied to the reloaded portfolio")
+
+def test_fanout_cycle():
+    print("--- Testing Fan-Out Cycle End To End ---")
+    result = run_cycle_benchmark(10, {"binance": 0, "coingecko": 0, "llm": 0, "cosmos": 0},
+                                 {"EXECUTION_MODE": "fanout"}, instances=4)
+    assert result["work_items"] == 10
+    assert result["requests"]["llm"] > 0
+    # Only the worker finishing the last coin logs the equity curve
+    assert result["equity_points"] == 1
+    print(f"PASS: {result['work_items']} work items processed by 4 workers, equity logged once")
+
+if __name__ == "__main__":
+    test_fanout_bookkeeping()
+    test_execute_with_retry()
+    test_fanout_cycle()
@@ -0,0 +1,45 @@
+import logging
+import sys
+import os
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared import http_session
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def test_http_session():
+    print("--- Testing Shared HTTP Session ---")
+    http_session.session = None
+    first = http_session.get_session()
+    assert http_session.get_session() is first
+    print("PASS: one session reused across callers")
+
+    adapter = first.get_adapter("https://api.binance.com")
+    assert isinstance(adapter, http_session.PooledHTTPAdapter)
+    assert first.get_adapter("http://example.com") is adapter
+    assert adapter.timeout == http_session.DEFAULT_TIMEOUT
+    assert adapter._pool_maxsize == http_session.DEFAULT_POOL_SIZE and adapter._pool_block
+    retry = adapter.max_retries
+    assert retry.total == 3 and retry.backoff_factor == 0.5
+    assert set(retry.status_forcelist) == {429, 500, 502, 503, 504}
+    assert retry.allowed_methods == frozenset(["GET"])
+    assert retry.respect_retry_after_header and not retry.raise_on_status
+    print("PASS: default retry and pool configuration")
+
+    env = {"HTTP_MAX_RETRIES": "5", "HTTP_BACKOFF_FACTOR": "1.5", "HTTP_POOL_SIZE": "4", "HTTP_TIMEOUT_SECONDS": "2"}
+    with patch.dict(os.environ, env):
+        custom = http_session.build_session()
+    adapter = custom.get_adapter("https://api.binance.com")
+    assert adapter.max_retries.total == 5 and adapter.max_retries.backoff_factor == 1.5
+    assert adapter._pool_maxsize == 4 and adapter.timeout == 2.0
+    assert http_session.get_session() is first
+    print("PASS: configuration read from the environment")
+
+    http_session.session = None
+
+if __name__ == "__main__":
+    test_http_session()
@@ -0,0 +1,64 @@
+
+import logging
+import sys
+import os
+import numpy as np
+from unittest.mock import MagicMock, patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.indicators import compute_indicators, is_flat, format_indicators
+from shared import trader as trader_module
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_klines(closes, volumes=None, spread=0.001):
+    volumes = volumes if volumes is not None else [1000.0] * len(closes)
+    return [
+        [i * 3_600_000, c, c * (1 + spread), c * (1 - spread), c, v]
+        for i, (c, v) in enumerate(zip(closes, volumes))
+    ]
+
+def test_indicators():
+    print("--- Testing Indicator Gate ---")
+
+    # A quiet sideways market is flat; a trend or a volume spike is not
+    rng = np.random.default_rng(1)
+    quiet = list(100 * (1 + rng.normal(0, 0.0005, 72)).cumprod())
+    flat = compute_indicators(make_klines(quiet))
+    assert flat is not None and is_flat(flat), f"Quiet market should be gated: {flat}"
+
+    trending = list(np.linspace(100, 108, 72))
+    trend = compute_indicators(make_klines(trending))
+    assert trend["momentum_pct"] > 1.5 and trend["rsi"] == 100.0
+    assert not is_flat(trend)
+
+    spike = compute_indicators(make_klines(quiet, volumes=[1000.0 + (i % 3) for i in range(71)] + [5000.0]))
+    assert spike["volume_z"] > 2 and not is_flat(spike)
+    assert compute_indicators(make_klines(quiet[:10])) is None and not is_flat(None)
+    assert not is_flat(flat, {"GATE_MIN_VOLATILITY_PCT": 0.0})
+    print(f"PASS: flat={format_indicators(flat)} | trend={format_indicators(trend)}")
+
+    # Gated coins never reach the LLM
+    trader = MagicMock()
+    trader.settings = {"MIN_VOLUME_24H": 0}
+    trader.portfolio = {"holdings": {}}
+    cg = MagicMock()
+    cg.get_market_data.return_value = {"name": "Quiet", "total_volume": 1e9}
+    cg.get_ohlc.return_value = make_klines(quiet)
+    cg.get_current_price.return_value = quiet[-1]
+    with patch.object(trader_module, "get_trading_signal") as get_signal:
+        evaluation = trader_module.evaluate_coin(trader, cg, "quiet", "{coin_name} {current_price} {holding_info}", 0)
+        assert evaluation["signal"] == "HOLD" and get_signal.call_count == 0
+
+        get_signal.return_value = {"action": "BUY", "target": 5}
+        cg.get_ohlc.return_value = make_klines(trending)
+        cg.get_current_price.return_value = trending[-1]
+        evaluation = trader_module.evaluate_coin(trader, cg, "trend", "{coin_name} {current_price} {holding_info}", 0)
+        assert evaluation["signal"] == "BUY" and get_signal.call_count == 1
+    print("PASS: flat coin gated to HOLD, trending coin sent to the LLM")
+
+if __name__ == "__main__":
+    test_indicators()
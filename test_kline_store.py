@@ -0,0 +1,95 @@
+
+import logging
+import sys
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.kline_store import KlineStore, INTERVAL_MS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+HOUR = INTERVAL_MS["1h"]
+
+def make_klines(start, count):
+    return [[start + i * HOUR, "1.0", "1.2", "0.9", str(1.0 + i), "100.0"] for i in range(count)]
+
+def test_kline_store_delta_fetch():
+    print("--- Testing Incremental Kline Store ---")
+
+    now_hour = int(time.time() * 1000) // HOUR * HOUR
+    history = make_klines(now_hour - 719 * HOUR, 720)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = KlineStore(path=os.path.join(tmp, "klines.sqlite3"), min_sync_interval=0)
+        client = MagicMock()
+
+        # First sync downloads the full window
+        client.get_klines.return_value = history
+        assert store.sync(client, "BTCUSDT", "1h", 720) == 720
+        assert "startTime" not in client.get_klines.call_args.kwargs
+
+        # Next sync only asks for candles from the last stored open time
+        client.get_klines.return_value = make_klines(now_hour, 2)
+        store.sync(client, "BTCUSDT", "1h", 720)
+        assert client.get_klines.call_args.kwargs["startTime"] == now_hour
+        print(f"PASS: delta fetch started at last stored candle ({now_hour})")
+
+        # Trailing windows are served locally in ascending order
+        window = store.get_window("BTCUSDT", "1h", limit=30)
+        assert len(window) == 30
+        assert window[-1][0] == now_hour + HOUR
+        assert window[0][0] < window[-1][0]
+        assert len(window[0]) == 5
+        assert len(store.get_window("BTCUSDT", "1h", limit=3, include_volume=True)[0]) == 6
+        assert store.get_window("ETHUSDT", "1h", limit=30) == []
+        print("PASS: trailing window served from the store")
+
+        # Recently synced series skip the network entirely
+        store.min_sync_interval = 60
+        calls = client.get_klines.call_count
+        assert store.sync(client, "BTCUSDT", "1h", 720) == 0
+        assert client.get_klines.call_count == calls
+        print("PASS: repeated sync within the interval made no request")
+
+def fake_history(history):
+    """get_klines over `history`, honouring startTime/endTime/limit like Binance."""
+    def get_klines(symbol, interval, startTime=None, endTime=None, limit=500):
+        rows = [k for k in history if (startTime is None or k[0] >= startTime) and (endTime is None or k[0] <= endTime)]
+        return rows[:limit]
+    return get_klines
+
+def test_kline_store_backfill():
+    print("--- Testing Kline Backfill ---")
+    start = (int(time.time() * 1000) // HOUR - 100) * HOUR
+    history = make_klines(start, 100)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = KlineStore(path=os.path.join(tmp, "klines.sqlite3"), min_sync_interval=0)
+        # Stored: candles 20-39 and 60-99, i.e. a leading gap and a hole at 40-59
+        store.upsert("BTCUSDT", "1h", history[20:40] + history[60:])
+        assert store.missing_ranges("BTCUSDT", "1h", start) == [
+            (start, start + 20 * HOUR), (start + 40 * HOUR, start + 60 * HOUR)
+        ]
+
+        client = MagicMock()
+        client.get_klines.side_effect = fake_history(history)
+        assert store.backfill(client, "BTCUSDT", "1h", start) == 40
+        assert client.get_klines.call_count == 2
+        assert [c[0] for c in store.get_window("BTCUSDT", "1h")] == [k[0] for k in history]
+        print("PASS: leading gap and inner hole backfilled, stored candles not re-fetched")
+
+        # A complete series needs no requests
+        assert store.missing_ranges("BTCUSDT", "1h", start) == []
+        assert store.backfill(client, "BTCUSDT", "1h", start) == 0
+        assert client.get_klines.call_count == 2
+        print("PASS: complete history makes no request")
+
+if __name__ == "__main__":
+    test_kline_store_delta_fetch()
+    test_kline_store_backfill()
@@ -0,0 +1,80 @@
+
+import logging
+import sys
+import os
+import json
+from unittest.mock import MagicMock, patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared import openai_service
+from shared.openai_service import SignalCache, get_trading_signals_batch, normalize_signal
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def fake_response(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+def make_items(count):
+    return [
+        {"coin_id": f"coin{i}", "section": f"Coin: coin{i}\nCurrent price: ${i + 1}", "prompt": f"full prompt {i}", "cache_key": f"key{i}"}
+        for i in range(count)
+    ]
+
+def test_llm_batch():
+    print("--- Testing Batched LLM Signals ---")
+    assert normalize_signal({"action": " buy ", "target_profit_pct": 7}) == {"action": "BUY", "target": 7}
+    assert normalize_signal({"action": "MOON"})["action"] == "HOLD"
+
+    openai_service.signal_cache = SignalCache(ttl_seconds=60)
+    with patch.object(openai_service, "get_client") as get_client, \
+         patch.object(openai_service, "create_completion") as create_completion:
+        get_client.return_value = MagicMock()
+
+        # 20 coins in batches of 10: two requests, the template sent once per batch
+        def answer(client, messages, max_tokens):
+            coins = [line[4:] for line in messages[1]["content"].splitlines() if line.startswith("### ")]
+            return fake_response(json.dumps({c: {"action": "BUY", "target_profit_pct": 5} for c in coins}))
+        create_completion.side_effect = answer
+        signals = get_trading_signals_batch(make_items(20), "system prompt", batch_size=10)
+        assert create_completion.call_count == 2
+        assert all(s == {"action": "BUY", "target": 5} for s in signals.values()) and len(signals) == 20
+        assert create_completion.call_args.kwargs["messages"][0]["content"] == "system prompt"
+        print("PASS: 20 coins evaluated in 2 requests")
+
+        # Now cached: no further requests
+        create_completion.reset_mock()
+        get_trading_signals_batch(make_items(20), "system prompt", batch_size=10)
+        assert create_completion.call_count == 0
+        print("PASS: cached coins skipped the batch")
+
+        # A missing and a malformed coin fall back to single-coin requests
+        openai_service.signal_cache = SignalCache(ttl_seconds=60)
+        responses = [
+            fake_response(json.dumps({"coin0": {"action": "SELL"}, "coin1": "BUY"})),
+            fake_response(json.dumps({"action": "HOLD"})),
+            fake_response(json.dumps({"action": "BUY", "target_profit_pct": 9})),
+        ]
+        create_completion.side_effect = responses
+        signals = get_trading_signals_batch(make_items(3), "system prompt", batch_size=10)
+        assert signals["coin0"] == {"action": "SELL", "target": None}
+        assert signals["coin1"] == {"action": "HOLD", "target": None}
+        assert signals["coin2"] == {"action": "BUY", "target": 9}
+        assert create_completion.call_count == 3
+        print("PASS: malformed entries fell back to per-coin calls")
+
+        # An unparseable batch falls back for every coin
+        create_completion.reset_mock()
+        openai_service.signal_cache = None
+        create_completion.side_effect = [fake_response("not json")] + [fake_response(json.dumps({"action": "HOLD"}))] * 2
+        signals = get_trading_signals_batch(make_items(2), "system prompt", batch_size=10, use_cache=False)
+        assert [s["action"] for s in signals.values()] == ["HOLD", "HOLD"] and create_completion.call_count == 3
+        print("PASS: malformed batch fell back for all coins")
+    openai_service.signal_cache = None
+
+if __name__ == "__main__":
+    test_llm_batch()
@@ -0,0 +1,91 @@
+import logging
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from binance.exceptions import BinanceAPIException
+from shared.coingecko_service import BinanceService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def api_error(status_code, code, msg):
+    return BinanceAPIException(None, status_code, json.dumps({"code": code, "msg": msg}))
+
+class FakeTickerClient:
+    """Rejects any bulk request containing an unknown symbol, like Binance does."""
+    def __init__(self, listed):
+        self.listed = listed
+        self.bulk_requests = 0
+        self.single_requests = 0
+        self.outage = None
+
+    def get_ticker(self, symbol=None, symbols=None):
+        if symbols is not None:
+            self.bulk_requests += 1
+            if self.outage:
+                raise self.outage
+            requested = json.loads(symbols)
+            if any(s not in self.listed for s in requested):
+                raise api_error(400, -1121, "Invalid symbol.")
+            return [self._ticker(s) for s in requested]
+        self.single_requests += 1
+        if symbol not in self.listed:
+            raise api_error(400, -1121, "Invalid symbol.")
+        return self._ticker(symbol)
+
+    def _ticker(self, symbol):
+        price = self.listed[symbol]
+        return {"symbol": symbol, "lastPrice": str(price), "priceChangePercent": "1.0",
+                "quoteVolume": "5000000", "highPrice": str(price * 1.1), "lowPrice": str(price * 0.9)}
+
+    def get_symbol_ticker(self, symbol):
+        self.single_requests += 1
+        return {"symbol": symbol, "price": str(self.listed[symbol])}
+
+def test_market_snapshot():
+    print("--- Testing Bulk Ticker Snapshot ---")
+    client = FakeTickerClient({"BTCUSDT": 50000, "ETHUSDT": 2500, "SOLUSDT": 100, "PEPEUSDT": 0.00001})
+    with patch("shared.coingecko_service.get_binance_client", return_value=client):
+        cg = BinanceService()
+    cg.coin_mapping["dead"] = "DEADUSDT"
+    coins = ["btc", "eth", "dead", "sol", "pepe"]
+
+    # One request serves every listed coin
+    cg.load_snapshot(["btc", "eth", "sol", "pepe"])
+    assert client.bulk_requests == 1 and len(cg.snapshot) == 4
+    assert cg.get_current_price("eth") == 2500.0
+    assert cg.get_market_data("sol")["total_volume"] == 5000000.0
+    assert client.single_requests == 0
+    print("PASS: prices and 24h data served from one bulk request")
+
+    # A delisted symbol is dropped instead of failing the whole chunk
+    client.bulk_requests = 0
+    assert cg.load_snapshot(coins) == 4
+    assert "DEADUSDT" not in cg.snapshot
+    # 5 -> 2 + 3 -> 1 + 2: only the halves containing the bad symbol are retried
+    assert client.bulk_requests == 5
+    assert cg.get_current_price("pepe") == 0.00001 and client.single_requests == 0
+    print(f"PASS: invalid symbol dropped with {client.bulk_requests} bulk requests")
+
+    # Chunks are split by chunk_size
+    client.bulk_requests = 0
+    cg.load_snapshot(["btc", "eth", "sol", "pepe"], chunk_size=2)
+    assert client.bulk_requests == 2 and len(cg.snapshot) == 4
+    print("PASS: symbols requested in chunks")
+
+    # Rate limits and outages are not split into more requests
+    for outage in (api_error(429, -1003, "Too many requests."), Exception("Read timed out")):
+        client.bulk_requests = 0
+        client.outage = outage
+        assert cg.load_snapshot(coins) == 0
+        assert client.bulk_requests == 1
+    client.outage = None
+    print("PASS: other errors leave the chunk to the per-coin fallback")
+
+if __name__ == "__main__":
+    test_market_snapshot()
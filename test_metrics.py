@@ -0,0 +1,74 @@
+import logging
+import sys
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def fake_cosmos_response(charge):
+    response = MagicMock()
+    response.http_response.headers = {"x-ms-request-charge": str(charge)}
+    return response
+
+def fetch_coin(coin_id):
+    with metrics.span("data_fetch"):
+        metrics.record("http_requests", 2)
+        time.sleep(0.05)
+    with metrics.span("signal"):
+        metrics.record("llm_requests")
+        metrics.record("llm_tokens", 120)
+
+def test_metrics():
+    print("--- Testing Cycle Metrics ---")
+
+    # Outside a cycle everything is a no-op
+    with metrics.span("orphan") as orphan:
+        metrics.record("http_requests")
+    assert orphan is None
+
+    with metrics.cycle("trading_cycle") as recorder:
+        with metrics.span("discovery"):
+            metrics.record("http_requests")
+            metrics.record_cosmos_response(fake_cosmos_response(5.71))
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [metrics.submit(executor, fetch_coin, f"coin{i}") for i in range(8)]
+        for f in futures:
+            f.result()
+        with metrics.span("persistence"):
+            metrics.record_cosmos_response(fake_cosmos_response(10.29))
+        metrics.record("cosmos_ru", 1.0)  # charged to the cycle itself
+
+    summary = metrics.log_summary(recorder)
+    json.dumps(summary)
+    assert summary["cycle"] == "trading_cycle" and summary["duration_seconds"] >= 0.1
+    assert summary["totals"] == {
+        "http_requests": 17, "cosmos_requests": 2, "cosmos_ru": 17.0, "llm_requests": 8, "llm_tokens": 960
+    }, summary["totals"]
+    stages = summary["stages"]
+    assert stages["data_fetch"]["count"] == 8 and stages["data_fetch"]["http_requests"] == 16
+    # 8 fetches of 50ms on 4 threads: ~0.4s busy, ~0.1s wall
+    assert stages["data_fetch"]["duration_seconds"] >= 0.4
+    assert stages["data_fetch"]["wall_seconds"] < stages["data_fetch"]["duration_seconds"]
+    assert stages["signal"]["llm_tokens"] == 960
+    assert stages["discovery"]["cosmos_ru"] == 5.71 and stages["persistence"]["cosmos_ru"] == 10.29
+    print(f"PASS: summary {json.dumps(summary['totals'])}")
+
+    # OpenTelemetry export is optional
+    if metrics.otel_trace is None:
+        assert metrics.export_otel(recorder) is False
+        print("PASS: export skipped without opentelemetry")
+    else:
+        assert metrics.export_otel(recorder) is True
+        print("PASS: spans exported to OpenTelemetry")
+
+if __name__ == "__main__":
+    test_metrics()
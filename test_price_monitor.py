@@ -0,0 +1,94 @@
+import logging
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.trading_service import TradingService
+from shared.cosmos_db import PortfolioConflictError
+from shared.price_monitor import PriceMonitor, ReplayFeed, run_price_monitor, sell_thresholds
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_trader():
+    trader = TradingService()
+    trader.cosmos = MagicMock()
+    trader.take_profit = 0.15
+    trader.stop_loss = 0.08
+    trader.portfolio = {
+        "id": "main_portfolio",
+        "balance_usd": 1000,
+        "holdings": {
+            "btc": {"quantity": 0.001, "entry_price": 50000, "value_usd": 50},
+            "eth": {"quantity": 0.02, "entry_price": 2500, "value_usd": 50, "target_profit_pct": 5},
+            "sol": {"quantity": 0.5, "entry_price": 100, "value_usd": 50}
+        }
+    }
+    return trader
+
+def make_binance():
+    binance = MagicMock()
+    binance._get_symbol.side_effect = lambda coin_id: f"{coin_id.upper()}USDT"
+    return binance
+
+def test_price_monitor():
+    print("--- Testing Real-Time Price Monitor ---")
+    trader = make_trader()
+    assert sell_thresholds(trader, "eth") == (2625.0, 2300.0), "Dynamic target below the fixed TP wins"
+
+    ticks = [
+        ("BTCUSDT", 49000), ("ETHUSDT", 2550), ("SOLUSDT", 101),
+        ("BTCUSDT", 45900),   # below the 8% stop loss (46000)
+        ("ETHUSDT", 2630),    # above the 5% dynamic target (2625)
+        ("BTCUSDT", 40000),   # already sold: ignored
+        ("DOGEUSDT", 1.0),    # not held: ignored
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ticks.jsonl")
+        with open(path, "w") as f:
+            f.writelines(json.dumps({"s": s, "c": str(p)}) + "\n" for s, p in ticks)
+        monitor = PriceMonitor(trader, make_binance(), lambda symbols: ReplayFeed.from_file(path))
+        sells = monitor.run(window_seconds=5)
+
+    assert [(s["coin"], s["price"]) for s in sells] == [("btc", 45900), ("eth", 2630)]
+    assert sells[0]["reason"].startswith("Stop Loss") and sells[1]["reason"].startswith("Dynamic Take Profit")
+    assert all(s["latency_seconds"] < 1 for s in sells)
+    assert list(trader.portfolio["holdings"]) == ["sol"]
+    assert trader.cosmos.save_portfolio.call_count == 2
+    assert list(monitor.watched) == ["SOLUSDT"]
+    print(f"PASS: SL and TP triggered on the crossing tick, {len(sells)} sells")
+
+    # Stops as soon as nothing is held anymore
+    trader = make_trader()
+    del trader.portfolio["holdings"]["eth"], trader.portfolio["holdings"]["sol"]
+    feed = ReplayFeed([("BTCUSDT", 45000)] + [("BTCUSDT", 44000)] * 100)
+    monitor = PriceMonitor(trader, make_binance(), lambda symbols: feed)
+    assert len(monitor.run(window_seconds=5)) == 1 and not monitor.watched
+    print("PASS: monitor stopped once all holdings were sold")
+
+    # A conflicting write reloads the portfolio and the sell is re-checked against it
+    trader = make_trader()
+    reloaded = make_trader().portfolio
+    reloaded["holdings"]["btc"]["entry_price"] = 40000
+    trader.cosmos.save_portfolio.side_effect = PortfolioConflictError("etag mismatch")
+    trader.cosmos.get_portfolio.return_value = reloaded
+    monitor = PriceMonitor(trader, make_binance(), lambda symbols: ReplayFeed([("BTCUSDT", 45900)]))
+    assert monitor.run(window_seconds=5) == []
+    assert "btc" in trader.portfolio["holdings"] and trader.cosmos.log_trade.call_count == 0
+    assert monitor.thresholds["btc"][1] == 40000 * 0.92
+    print("PASS: conflicting write did not record a sell")
+
+    # Without the app setting the minute timer returns before touching Cosmos
+    with patch.dict(os.environ, {"PRICE_MONITOR_ENABLED": "false"}), \
+         patch("shared.price_monitor.TradingService") as trading_service:
+        assert run_price_monitor() == []
+        assert trading_service.call_count == 0
+    print("PASS: disabled monitor made no Cosmos reads")
+
+if __name__ == "__main__":
+    test_price_monitor()
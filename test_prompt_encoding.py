@@ -0,0 +1,52 @@
+
+import logging
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.prompt_encoding import encode_ohlc, pct_decimals, format_price
+from shared.openai_service import estimate_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_ohlc(count=30, start=1_700_000_000_000, base=61234.56):
+    rows = []
+    for i in range(count):
+        price = base * (1 + 0.001 * ((i * 7) % 11 - 5))
+        rows.append([start + i * 3_600_000, price, price * 1.0021, price * 0.9987, price * 1.0008])
+    return rows
+
+def test_prompt_encoding():
+    print("--- Testing Compact OHLC Prompt Encoding ---")
+    ohlc = make_ohlc()
+    raw = encode_ohlc(ohlc, "raw")
+    assert raw == str(ohlc), "Raw mode must keep the existing prompt format"
+
+    compact = encode_ohlc(ohlc, "compact", tick_size=0.01)
+    raw_tokens, compact_tokens = estimate_tokens(raw), estimate_tokens(compact)
+    assert compact_tokens < raw_tokens / 2, f"Compact encoding too large: {compact_tokens} vs {raw_tokens}"
+    print(f"PASS: ~{raw_tokens} tokens raw -> ~{compact_tokens} tokens compact")
+
+    # Relative candle times, values as % change from the first open
+    assert compact.startswith(f"base={ohlc[0][1]:.2f} (candle 1h) ")
+    first, last = compact.split(": ", 1)[1].split("|")[0], compact.split("|")[-1]
+    assert first.startswith("-29,+0.000,")
+    assert last.startswith("0,")
+    close_pct = float(last.split(",")[4])
+    assert abs(ohlc[0][1] * (1 + close_pct / 100) - ohlc[-1][4]) < ohlc[0][1] * 0.00001
+    print(f"PASS: compact rows decode back to prices ({first} ... {last})")
+
+    # Precision follows the tick size
+    assert pct_decimals(61234.56, 0.01) == 3
+    assert pct_decimals(0.5123, 0.0001) == 2
+    assert pct_decimals(2.5, 0.1) == 0
+    assert pct_decimals(100, None) == 2
+    assert format_price(0.51234567, 0.0001) == "0.5123"
+    assert encode_ohlc([], "compact") == "[]"
+    print("PASS: precision matched to tick size")
+
+if __name__ == "__main__":
+    test_prompt_encoding()
@@ -0,0 +1,64 @@
+
+import logging
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.openai_service import RateLimiter, parse_reset_duration
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def test_rate_limiter():
+    print("--- Testing LLM Rate Limiter ---")
+
+    # Reset durations in Groq's header format
+    assert parse_reset_duration("7.66s") == 7.66
+    assert abs(parse_reset_duration("2m59.56s") - 179.56) < 1e-9
+    assert parse_reset_duration("120ms") == 0.12
+    assert parse_reset_duration("12") == 12.0
+    assert parse_reset_duration(None) == 0.0
+
+    # Plenty of budget: calls go through without waiting
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+    start = time.monotonic()
+    for _ in range(5):
+        assert limiter.acquire(100) == 0.0
+    elapsed = time.monotonic() - start
+    print(f"5 calls within budget took {elapsed:.3f}s")
+    assert elapsed < 0.5, "Limiter should not block while budget remains"
+
+    # Request budget exhausted: 60 rpm refills one request per second
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=60000)
+    limiter.request_budget = 0
+    waited = limiter.acquire(100)
+    print(f"Waited {waited:.2f}s for an exhausted request bucket")
+    assert 0.5 < waited < 1.5
+
+    # Headers reporting zero remaining tokens block until the reset time
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+    limiter.update_from_headers({
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "300ms"
+    })
+    assert limiter.token_budget == 0
+    waited = limiter.acquire(10)
+    print(f"Waited {waited:.2f}s after headers reported an empty token bucket")
+    assert waited >= 0.25
+
+    # Consecutive 429s grow the backoff; a successful response resets it
+    limiter = RateLimiter()
+    first = limiter.on_rate_limited()
+    second = limiter.on_rate_limited()
+    assert second == first * 2
+    assert limiter.on_rate_limited({"retry-after": "30"}) == 30.0
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "10"})
+    assert limiter.backoff_seconds == 0.0
+
+    print("\nVERIFICATION COMPLETE: Rate limiter only blocks when a budget is exhausted.")
+
+if __name__ == "__main__":
+    test_rate_limiter()
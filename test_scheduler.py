@@ -0,0 +1,107 @@
+import logging
+import sys
+import os
+from datetime import datetime
+from unittest.mock import MagicMock
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.bench_cycle import run_cycle_benchmark
+from shared.scheduler import CycleScheduler
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_trader():
+    trader = MagicMock()
+    trader.take_profit = 0.15
+    trader.stop_loss = 0.08
+    trader.portfolio = {
+        "holdings": {
+            "btc": {"entry_price": 100},   # at 101: 7% from TP, 9% from SL
+            "eth": {"entry_price": 100},   # at 92.5: 0.5% from SL
+        }
+    }
+    return trader
+
+def make_cg():
+    cg = MagicMock()
+    prices = {"btc": 101.0, "eth": 92.5}
+    cg.get_current_price.side_effect = lambda coin_id: prices.get(coin_id, 1.0)
+    return cg
+
+def test_scheduler():
+    print("--- Testing Time-Budgeted Cycle Scheduler ---")
+    coins = ["sol", "pepe", "bonk", "btc", "eth", "floki", "shib"]
+    trader, cg = make_trader(), make_cg()
+
+    # Held coins first (nearest to a threshold first), then the rest in list order
+    clock = FakeClock()
+    scheduler = CycleScheduler(10, clock=clock)
+    order = scheduler.plan(coins, trader, cg)
+    assert order == ["eth", "btc", "sol", "pepe", "bonk", "floki", "shib"], order
+    print(f"PASS: priority order {order}")
+
+    # Each coin takes 1s: waves of 2 stop once the next wave would overrun the 10s budget
+    evaluated = []
+    def evaluate(wave):
+        clock.now += 1.0 * len(wave)
+        evaluated.extend(wave)
+        return {c: {"signal": "HOLD"} for c in wave}
+
+    clock.now = 3.5  # discovery/review already used 3.5s
+    evaluations = scheduler.run(order, evaluate, wave_size=2)
+    assert list(evaluations) == ["eth", "btc", "sol", "pepe", "bonk", "floki"]
+    assert scheduler.unfinished == ["shib"]
+    print(f"PASS: evaluated {len(evaluations)} coins within budget, deferred {scheduler.unfinished}")
+
+    # The next cycle resumes the unfinished coin right after the holdings, and rotates the rest
+    checkpoint = scheduler.checkpoint()
+    assert checkpoint["pending"] == ["shib"] and checkpoint["rotation"] == 4
+    order = CycleScheduler(10, checkpoint, clock=FakeClock()).plan(coins, trader, cg)
+    assert order == ["eth", "btc", "shib", "sol", "pepe", "bonk", "floki"], order
+    print(f"PASS: next cycle order {order}")
+
+    # Without a checkpoint to resume, the rotation moves the starting coin
+    order = CycleScheduler(10, {"rotation": 2, "pending": []}, clock=FakeClock()).plan(coins, trader, cg)
+    assert order[2:] == ["bonk", "floki", "shib", "sol", "pepe"], order
+    print("PASS: starting position rotates across cycles")
+
+    # Holdings that cannot be ranked keep their original order instead of failing the cycle
+    unranked = MagicMock()
+    unranked.portfolio = trader.portfolio
+    order = CycleScheduler(10, clock=FakeClock()).plan(coins, unranked, cg)
+    assert order[:2] == ["btc", "eth"], order
+    print("PASS: unsortable holdings fall back to list order")
+
+    # An exhausted budget starts nothing rather than overrunning
+    clock = FakeClock()
+    scheduler = CycleScheduler(10, clock=clock)
+    clock.now = 11.0
+    assert scheduler.run(coins, evaluate, wave_size=2) == {}
+    assert scheduler.unfinished == coins
+    print("PASS: nothing started after the budget is spent")
+
+def test_cycle_budget():
+    print("--- Testing Cycle Budget In The Trading Cycle ---")
+    # 20 coins, 4 workers, 0.2s per LLM call: each round of 4 coins takes ~0.2s, so a 0.5s
+    # budget fits two rounds and defers the rest instead of running one unbudgeted wave
+    settings = {"CYCLE_TIME_BUDGET_SECONDS": 0.5, "MAX_CONCURRENT_COINS": 4,
+                "LAST_DISCOVERY_TIME": datetime.utcnow().isoformat()}
+    result = run_cycle_benchmark(20, {"binance": 0, "coingecko": 0, "llm": 0.2, "cosmos": 0}, settings)
+    pending = result["checkpoint"]["pending"]
+    assert 0 < len(pending) < 20, pending
+    assert result["cycle"]["stages"]["data_fetch"]["count"] == 20 - len(pending)
+    print(f"PASS: {20 - len(pending)} of 20 coins evaluated within budget, {len(pending)} checkpointed")
+
+if __name__ == "__main__":
+    test_scheduler()
+    test_cycle_budget()
@@ -0,0 +1,119 @@
+import logging
+import sys
+import os
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fakes import FakeCosmosClient
+from shared import cosmos_db
+from shared.cosmos_db import CosmosDBService, PortfolioConflictError, json_pointer, patch_operations
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_service(client):
+    with patch.dict(os.environ, {"COSMOS_DB_CONNECTION_STRING": "AccountEndpoint=https://test.invalid/;AccountKey=dGVzdA==;"}), \
+         patch.object(cosmos_db, "get_cosmos_client", lambda connection_string: client):
+        cosmos_db.container_cache.clear()
+        service = CosmosDBService()
+    service.portfolio_layout = "sharded"
+    return service
+
+def test_sharded_portfolio():
+    print("--- Testing Sharded Portfolio Layout ---")
+    client = FakeCosmosClient()
+    client.get_container_client("portfolio").items[("main_portfolio", "main_portfolio")] = {
+        "id": "main_portfolio", "balance_usd": 900, "_etag": '"legacy"',
+        "holdings": {"btc": {"quantity": 0.001, "entry_price": 50000, "value_usd": 50, "target_profit_pct": 5},
+                     "eth": {"quantity": 0.02, "entry_price": 2500, "value_usd": 50}}
+    }
+    positions = client.get_container_client("positions")
+
+    # The legacy document is migrated once and read back in the same shape
+    writer_a = make_service(client)
+    portfolio = writer_a.get_portfolio()
+    assert portfolio["balance_usd"] == 900
+    assert portfolio["holdings"]["btc"] == {"quantity": 0.001, "entry_price": 50000, "value_usd": 50, "target_profit_pct": 5}
+    assert len(positions.items) == 3
+    print("PASS: legacy portfolio migrated to cash + position documents")
+
+    # A price refresh patches one position document
+    before = dict(client.requests)
+    portfolio["holdings"]["btc"]["current_price"] = 51000
+    writer_a.save_portfolio(portfolio)
+    assert client.requests["positions.batch"] == before["positions.batch"] + 1
+    assert positions.items[("main_portfolio", "position:btc")]["current_price"] == 51000
+    print("PASS: price refresh written as a single patch")
+
+    # Two writers changing different positions both succeed; cash moves are increments
+    writer_b = make_service(client)
+    other = writer_b.get_portfolio()
+    portfolio["holdings"]["sol"] = {"quantity": 0.5, "entry_price": 100, "value_usd": 50}
+    portfolio["balance_usd"] -= 50
+    writer_a.save_portfolio(portfolio)
+    del other["holdings"]["eth"]
+    other["balance_usd"] += 49.5
+    writer_b.save_portfolio(other)
+    assert positions.items[("main_portfolio", "cash")]["balance_usd"] == 899.5
+    assert other["balance_usd"] == 899.5
+    fresh = writer_a.get_portfolio()
+    assert set(fresh["holdings"]) == {"btc", "sol"}
+    print("PASS: concurrent writers on different positions do not conflict")
+
+    # Writers changing the same position conflict, and nothing from the losing batch is applied
+    portfolio = writer_a.get_portfolio()
+    other = writer_b.get_portfolio()
+    portfolio["holdings"]["sol"]["target_profit_pct"] = 8
+    writer_a.save_portfolio(portfolio)
+    del other["holdings"]["sol"]
+    other["balance_usd"] += 55
+    try:
+        writer_b.save_portfolio(other)
+        assert False, "Expected PortfolioConflictError"
+    except PortfolioConflictError:
+        pass
+    assert positions.items[("main_portfolio", "cash")]["balance_usd"] == 899.5
+    assert ("main_portfolio", "position:sol") in positions.items
+    print("PASS: conflicting write rejected atomically")
+
+    # Concurrent buys cannot overdraw the stored balance between them
+    portfolio = writer_a.get_portfolio()
+    other = writer_b.get_portfolio()
+    portfolio["holdings"]["ada"] = {"quantity": 1000, "entry_price": 0.5, "value_usd": 500}
+    portfolio["balance_usd"] -= 500
+    writer_a.save_portfolio(portfolio)
+    other["holdings"]["dot"] = {"quantity": 100, "entry_price": 5, "value_usd": 500}
+    other["balance_usd"] -= 500
+    try:
+        writer_b.save_portfolio(other)
+        assert False, "Expected PortfolioConflictError"
+    except PortfolioConflictError:
+        pass
+    assert positions.items[("main_portfolio", "cash")]["balance_usd"] == 399.5
+    assert ("main_portfolio", "position:dot") not in positions.items
+    print("PASS: withdrawal larger than the stored balance rejected")
+
+    # Tiny withdrawals are written as plain decimals in the guard
+    portfolio = writer_a.get_portfolio()
+    portfolio["balance_usd"] -= 0.00001
+    with patch.object(positions, "execute_item_batch", wraps=positions.execute_item_batch) as batch:
+        writer_a.save_portfolio(portfolio)
+    predicate = batch.call_args.kwargs["batch_operations"][0][2]["filter_predicate"]
+    assert predicate == "FROM c WHERE c.balance_usd >= 0.00001000", predicate
+    print("PASS: guard predicate formatted without exponent")
+
+def test_patch_operations():
+    print("--- Testing Patch Operation Builder ---")
+    assert json_pointer("holdings", "a/b~c", "current_price") == "/holdings/a~1b~0c/current_price"
+    operations = patch_operations({"a": 1, "b": 2, "_etag": "x"}, {"a": 1, "b": 3, "c": 4})
+    assert operations == [{"op": "set", "path": "/b", "value": 3}, {"op": "set", "path": "/c", "value": 4}]
+    assert patch_operations({"a": 1, "gone": 2}, {"a": 1}, prefix=("holdings", "btc")) == [
+        {"op": "remove", "path": "/holdings/btc/gone"}
+    ]
+    print("PASS: patch operations and pointer escaping")
+
+if __name__ == "__main__":
+    test_sharded_portfolio()
+    test_patch_operations()
@@ -0,0 +1,85 @@
+
+import logging
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared import openai_service
+from shared.openai_service import SignalCache, quantized_market_key, get_trading_signal
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def fake_response(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+def test_signal_cache():
+    print("--- Testing LLM Signal Cache ---")
+
+    # LRU eviction and TTL expiry
+    cache = SignalCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", {"action": "BUY"})
+    cache.put("b", {"action": "HOLD"})
+    assert cache.get("a") == {"action": "BUY"}
+    cache.put("c", {"action": "SELL"})
+    assert cache.get("b") is None, "Least recently used entry should be evicted"
+    assert cache.stats()["evictions"] == 1
+    cache.ttl_seconds = -1
+    cache.put("d", {"action": "HOLD"})
+    assert cache.get("d") is None, "Expired entry must not be served"
+    print(f"PASS: LRU/TTL behaviour, stats={cache.stats()}")
+
+    # Nearly identical flat markets share a key; a real move does not
+    flat = [[0, 100, 100.2, 99.8, 100.0]] * 30
+    key = quantized_market_key("btc", 100.0, flat)
+    assert quantized_market_key("btc", 100.05, flat) == key
+    assert quantized_market_key("btc", 103.0, flat) != key
+    assert quantized_market_key("btc", 100.0, flat, holding_pl=5.0) != key
+    print("PASS: quantized keys ignore noise but not moves")
+
+    # Prompt changes invalidate cached signals
+    assert quantized_market_key("btc", 100.0, flat, prompt_template="v1", features="ohlc") == \
+        quantized_market_key("btc", 100.0, flat, prompt_template="v1", features="ohlc")
+    assert quantized_market_key("btc", 100.0, flat, prompt_template="v2", features="ohlc") != \
+        quantized_market_key("btc", 100.0, flat, prompt_template="v1", features="ohlc")
+    assert quantized_market_key("btc", 100.0, flat, prompt_template="v1", features="both") != \
+        quantized_market_key("btc", 100.0, flat, prompt_template="v1", features="ohlc")
+    print("PASS: prompt template and features are part of the key")
+
+    # Only the first call reaches the LLM; errors are not cached
+    openai_service.signal_cache = SignalCache(ttl_seconds=60)
+    with patch.object(openai_service, "get_client") as get_client, \
+         patch.object(openai_service, "create_completion") as create_completion:
+        get_client.return_value = MagicMock()
+        create_completion.return_value = fake_response(json.dumps({"action": "buy", "target_profit_pct": 8}))
+        first = get_trading_signal("prompt", cache_key=key)
+        second = get_trading_signal("prompt", cache_key=key)
+        assert first == second == {"action": "BUY", "target": 8}
+        assert create_completion.call_count == 1
+
+        create_completion.side_effect = Exception("timeout")
+        assert get_trading_signal("other prompt") == {"action": "HOLD"}
+        create_completion.side_effect = None
+        create_completion.return_value = fake_response(json.dumps({"action": "SELL"}))
+        assert get_trading_signal("other prompt")["action"] == "SELL"
+    print("PASS: cached signal skipped the LLM call, failures not cached")
+
+    # Optional persistence across invocations
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "signals.json")
+        cache = SignalCache(ttl_seconds=60, path=path)
+        cache.put(key, {"action": "HOLD", "target": None})
+        cache.save()
+        assert SignalCache(path=path).get(key) == {"action": "HOLD", "target": None}
+    print("PASS: cache persisted and reloaded")
+    openai_service.signal_cache = None
+
+if __name__ == "__main__":
+    test_signal_cache()
@@ -0,0 +1,50 @@
+
+import logging
+import sys
+import os
+import numpy as np
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.backtest import run_backtest
+from shared.sweep import grid_search, random_search, run_sweep, to_settings_document
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def test_parameter_sweep():
+    print("--- Testing Parameter Sweep Runner ---")
+
+    rng = np.random.default_rng(7)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (10, 2000)), axis=1))
+    timestamps = np.arange(prices.shape[1]) * 3_600_000
+
+    param_sets = grid_search([5, 10, 15], [3, 8], [50, 100])
+    assert len(param_sets) == 12
+    assert len(random_search(5, seed=1)) == 5
+
+    ranked = run_sweep(timestamps, prices, param_sets, max_workers=2)
+    assert len(ranked) == 12
+    returns = [r["return_pct"] for r in ranked]
+    assert returns == sorted(returns, reverse=True), "Results must be ranked by return"
+
+    # Workers see the same data as an in-process run
+    best = ranked[0]
+    direct = run_backtest(timestamps, prices, take_profit=best["take_profit"], stop_loss=best["stop_loss"],
+                          order_amount=best["order_amount"], record_trades=False).stats()
+    assert direct["return_pct"] == best["return_pct"]
+    print(f"PASS: best of {len(ranked)}: {best}")
+
+    filtered = run_sweep(timestamps, prices, param_sets, max_workers=2, max_drawdown_pct=best["max_drawdown_pct"])
+    assert all(r["max_drawdown_pct"] <= best["max_drawdown_pct"] for r in filtered)
+
+    candidate = to_settings_document(best, {"id": "main_settings", "_etag": "x", "TAKE_PROFIT": 15, "COINS_TO_TRACK": ["btc"]})
+    assert candidate["id"] == "candidate_settings"
+    assert candidate["TAKE_PROFIT"] == best["take_profit"]
+    assert candidate["COINS_TO_TRACK"] == ["btc"]
+    assert "_etag" not in candidate
+    print("PASS: best result written as a candidate settings document")
+
+if __name__ == "__main__":
+    test_parameter_sweep()
@@ -0,0 +1,62 @@
+
+import logging
+import sys
+import os
+import tempfile
+from unittest.mock import MagicMock
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.symbol_index import SymbolIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+EXCHANGE_INFO = {
+    "symbols": [
+        {"symbol": "BTCUSDT", "status": "TRADING", "baseAsset": "BTC", "quoteAsset": "USDT",
+         "filters": [{"filterType": "PRICE_FILTER", "minPrice": "0.01000000", "tickSize": "0.01000000"}]},
+        {"symbol": "ETHBTC", "status": "TRADING", "baseAsset": "ETH", "quoteAsset": "BTC"},
+        {"symbol": "LUNAUSDT", "status": "BREAK", "baseAsset": "LUNA", "quoteAsset": "USDT"},
+    ]
+}
+
+def test_symbol_index():
+    print("--- Testing exchangeInfo Symbol Index ---")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "symbols.json")
+        client = MagicMock()
+        client.get_exchange_info.return_value = EXCHANGE_INFO
+
+        index = SymbolIndex(path=path, ttl_seconds=3600)
+        assert index.ensure_loaded(client)
+        assert client.get_exchange_info.call_count == 1
+
+        # Lookups are answered locally, misses cost nothing
+        assert index.lookup("btc") == "BTCUSDT"
+        assert index.lookup("eth") is None, "ETH only trades against BTC in this fixture"
+        assert index.lookup("luna") is None, "Non-TRADING symbols must be ignored"
+        assert index.lookup("notacoin") is None
+        assert client.get_exchange_info.call_count == 1
+        assert client.get_symbol_ticker.call_count == 0
+        print("PASS: lookups served without network calls")
+
+        # A new index (cold start) reuses the on-disk cache within the TTL
+        cold_client = MagicMock()
+        cold_index = SymbolIndex(path=path, ttl_seconds=3600)
+        assert cold_index.ensure_loaded(cold_client)
+        assert cold_client.get_exchange_info.call_count == 0
+        assert cold_index.get("BTCUSDT")["base"] == "BTC"
+        assert cold_index.tick_size("BTCUSDT") == 0.01 and cold_index.tick_size("ETHBTC") is None
+        print("PASS: cold start loaded index from disk")
+
+        # Expired cache triggers exactly one refresh
+        expired_index = SymbolIndex(path=path, ttl_seconds=0.000001)
+        assert expired_index.ensure_loaded(client)
+        assert client.get_exchange_info.call_count == 2
+        print("PASS: expired cache refreshed from exchangeInfo")
+
+if __name__ == "__main__":
+    test_symbol_index()
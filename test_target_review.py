@@ -0,0 +1,71 @@
+import logging
+import sys
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared.trading_service import TradingService
+from shared.trader import review_holdings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_trader():
+    trader = TradingService(deferred_writes=True)
+    trader.cosmos = MagicMock()
+    trader.cosmos.portfolio_layout = "document"
+    trader.portfolio = {
+        "id": "main_portfolio",
+        "balance_usd": 1000,
+        "holdings": {
+            coin: {"quantity": 1, "entry_price": 100, "value_usd": 100, "target_profit_pct": 10}
+            for coin in ("btc", "eth", "sol", "pepe")
+        }
+    }
+    return trader
+
+def slow_review(prompt):
+    time.sleep(0.3)
+    if "btc" in prompt or "sol" in prompt:
+        return {"action": "ADJUST", "new_target_pct": 4}
+    return {"action": "KEEP"}
+
+def test_target_review():
+    print("--- Testing Parallel Holding Target Review ---")
+    trader = make_trader()
+    cg = MagicMock()
+    cg.get_current_price.return_value = 105.0
+    cg.get_ohlc.return_value = [[i, 100, 101, 99, 100] for i in range(30)]
+
+    with patch("shared.trader.evaluate_holding_target", side_effect=slow_review):
+        start = time.monotonic()
+        adjusted = review_holdings(trader, cg, list(trader.portfolio["holdings"]), max_workers=4)
+        elapsed = time.monotonic() - start
+
+    # Four 0.3s reviews run together instead of one after another
+    assert elapsed < 0.9, f"Reviews were not concurrent ({elapsed:.2f}s)"
+    assert adjusted == {"btc": 4.0, "sol": 4.0}
+    assert trader.portfolio["holdings"]["btc"]["target_profit_pct"] == 4.0
+    assert trader.portfolio["holdings"]["eth"]["target_profit_pct"] == 10
+    print(f"PASS: 4 holdings reviewed in {elapsed:.2f}s")
+
+    # Adjustments are applied in memory and written once, as a field-level patch
+    assert trader.cosmos.patch_holdings.call_count == 0 and trader.portfolio_dirty
+    trader.commit()
+    assert trader.cosmos.patch_holdings.call_count == 1 and trader.cosmos.save_portfolio.call_count == 0
+    patched = trader.cosmos.patch_holdings.call_args[0][1]
+    assert set(patched) == {"btc", "sol"} and patched["btc"]["target_profit_pct"] == 4.0
+    print("PASS: target changes committed in one portfolio patch")
+
+    # A holding without a price is skipped
+    cg.get_current_price.return_value = 0
+    with patch("shared.trader.evaluate_holding_target", side_effect=slow_review) as review:
+        assert review_holdings(trader, cg, ["btc"], max_workers=4) == {}
+        assert review.call_count == 0
+    print("PASS: unpriced holding skipped")
+
+if __name__ == "__main__":
+    test_target_review()
@@ -0,0 +1,77 @@
+import logging
+import sys
+import os
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fakes import FakeCosmosClient
+from shared import cosmos_db
+from shared.cosmos_db import CosmosDBService, WatchlistCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_service(client):
+    with patch.dict(os.environ, {"COSMOS_DB_CONNECTION_STRING": "AccountEndpoint=https://test.invalid/;AccountKey=dGVzdA==;"}), \
+         patch.object(cosmos_db, "get_cosmos_client", lambda connection_string: client):
+        cosmos_db.container_cache.clear()
+        return CosmosDBService()
+
+def test_watchlist_cache():
+    print("--- Testing Watchlist TTL Cache ---")
+    clock = FakeClock()
+    cache = WatchlistCache(60)
+    with patch.object(cosmos_db.time, "monotonic", clock):
+        cache.put("pepe", {"coin": "pepe", "score": 1})
+        hit, item = cache.get("pepe")
+        assert hit and item == {"coin": "pepe", "score": 1}
+        item["score"] = 99
+        assert cache.get("pepe")[1]["score"] == 1
+        print("PASS: cached items are returned as copies")
+
+        cache.put("bonk", None)
+        assert cache.get("bonk") == (True, None)
+        clock.now += 61
+        assert cache.get("pepe") == (False, None) and cache.get("bonk") == (False, None)
+        print("PASS: entries (including misses) expire after the TTL")
+
+def test_watchlist_partitions():
+    print("--- Testing Watchlist Partition Reads ---")
+    client = FakeCosmosClient()
+    watchlist = client.get_container_client("watchlist")
+    for coin in ("pepe", "bonk"):
+        watchlist.items[(coin, f"{coin}-0xabc")] = {"id": f"{coin}-0xabc", "coin": coin, "score": 5}
+    service = make_service(client)
+    cosmos_db.watchlist_cache.clear()
+
+    partitions = []
+    query_items = watchlist.query_items
+    def recording_query(*args, **kwargs):
+        partitions.append(kwargs.get("partition_key"))
+        assert not kwargs.get("enable_cross_partition_query")
+        return query_items(*args, **kwargs)
+
+    with patch.object(watchlist, "query_items", recording_query):
+        items = service.get_watchlist_items(["pepe", "bonk", "wif"])
+        assert items["pepe"]["score"] == 5 and items["bonk"]["id"] == "bonk-0xabc" and items["wif"] is None
+        assert sorted(partitions) == ["bonk", "pepe", "wif"]
+        print("PASS: one single-partition query per coin")
+
+        items["pepe"]["score"] = 0
+        again = service.get_watchlist_items(["pepe", "bonk", "wif"])
+        assert len(partitions) == 3 and again["pepe"]["score"] == 5 and again["wif"] is None
+        print("PASS: repeat lookups (hits and misses) served from the cache")
+    cosmos_db.watchlist_cache.clear()
+
+if __name__ == "__main__":
+    test_watchlist_cache()
+    test_watchlist_partitions()